@@ -1,8 +1,7 @@
 import pathlib
 import bcrypt
 import os
-import json
-from flask import Flask, jsonify, render_template, request, session, redirect, send_file, abort
+from flask import Flask, jsonify, render_template, request, session, redirect, send_file, abort, Response, stream_with_context
 from flask_cors import CORS
 from pymongo.mongo_client import MongoClient
 from pymongo.server_api import ServerApi
@@ -11,12 +10,13 @@ from datetime import datetime, timedelta
 from datetime import datetime, timedelta, timezone
 import logging
 import threading
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 import csv
 from io import StringIO, BytesIO
 from dotenv import load_dotenv
 from functools import wraps # Ensure this is present for decorators
-import re # New: For regex matching in autosuggest if needed, but primarily MongoDB's regex is used.
 import secrets
 import smtplib
 from email.message import EmailMessage
@@ -50,7 +50,21 @@ except Exception:
                 return fn
             return _decorator
 from recommendation_engine import RecommendationEngine
-from gridfs import GridFS
+from meta_store import save_meta_store, load_meta_store, meta_store_count, export_meta_json
+from vector_index import (
+    ResidentIndex, FILTER_FIELDS, content_hash, plan_incremental_build, snapshot_vectors, reciprocal_rank_fusion,
+    choose_index_type, build_faiss_index, save_index_manifest, load_index_manifest,
+    versioned_path, index_file, prune_index_files,
+)
+from embedding_store import save_embedding_store, load_embedding_store, scales_path_for
+from llm_client import LLMClient, LLMBusy, LLMTimeout, LLMUnavailable, CircuitBreaker, OPENROUTER_URL, sse_event
+from gridfs_artifacts import put_stream, put_file, get_to_file, delete_files, file_sha256
+from lexical_index import BM25Index, save_bm25_index
+from embedding_service import MicroBatchEncoder, ModelRegistry, encode_in_chunks
+from search_cache import SearchCache, SemanticAnswerCache, answer_scope, normalize_query, embedding_digest
+from catalog_cache import CatalogCache, LANGS
+from autosuggest_index import AutosuggestIndex
+from gridfs import GridFSBucket
 from uuid import uuid4
 
 
@@ -105,12 +119,17 @@ eng_col = db["engagements"]         # User engagement logs
 
 # New collections for Task 07
 categories_col = db["categories"]   # New: category groups (e.g., Governance, Economic)
+catalog_versions_col = db["catalog_versions"]  # Version counter bumped on every services write
 officers_col = db["officers"]       # New: officers metadata
 ads_col = db["ads"]                 # New: ads & training program announcements
 users_col = db["users"]             # New: progressive profile / accounts
 
 # Jobs collection for durable index job status
 index_jobs_col = db["index_jobs"]
+# Vector index metadata, one record per index row keyed by (index_version, row)
+vector_docs_col = db["vector_docs"]
+# Every retained vector index build with its GridFS artifacts; vector_meta "current" points at one
+index_versions_col = db["index_versions"]
 
 # E-commerce collections (store)
 products_col = db["products"]
@@ -139,24 +158,162 @@ def is_db_available(timeout_seconds: int = 2) -> bool:
     except Exception:
         return False
 
+# Decoded services tree + its JSON bytes, shared by the catalog pages and endpoints.
+# Workers re-check the version counter at most every CATALOG_CHECK_SECONDS.
+CATALOG = CatalogCache(
+    services_col, catalog_versions_col,
+    check_seconds=float(os.getenv("CATALOG_CHECK_SECONDS", "1")),
+    max_age_seconds=float(os.getenv("CATALOG_MAX_AGE_SECONDS", "300")),
+)
+
+
+def catalog_response(snap):
+    """Pre-serialized catalog JSON, with an ETag so browsers can revalidate cheaply."""
+    resp = Response(snap.body, mimetype="application/json")
+    resp.set_etag(snap.etag)
+    return resp.make_conditional(request)
+
+
+# Browsers and proxies may reuse a catalog level this long before revalidating it by ETag
+CATALOG_LEVEL_MAX_AGE = int(os.getenv("CATALOG_LEVEL_MAX_AGE", "60"))
+
+
+def catalog_level_response(node_id=None):
+    """One level of the catalog tree, honouring the fields= and lang= query parameters."""
+    fields = tuple(sorted({f.strip() for f in request.args.get("fields", "").split(",") if f.strip()})) or None
+    lang = request.args.get("lang") or None
+    if lang is not None and lang not in LANGS:
+        return jsonify({"error": "unsupported_lang", "lang": lang, "supported": list(LANGS)}), 400
+    level = CATALOG.get().level(node_id, fields, lang)
+    if level is None:
+        return jsonify({"error": "not_found", "id": node_id}), 404
+    body, etag = level
+    resp = Response(body, mimetype="application/json")
+    resp.set_etag(etag)
+    resp.cache_control.public = True
+    resp.cache_control.max_age = CATALOG_LEVEL_MAX_AGE
+    return resp.make_conditional(request)
+
+
+def catalog_popularity():
+    """Engagement count per service name and per clicked question, the autosuggest ranking signal."""
+    counts = {}
+    for field in ("service", "question_clicked"):
+        rows = eng_col.aggregate([
+            {"$match": {field: {"$nin": [None, ""]}}},
+            {"$group": {"_id": "$" + field, "count": {"$sum": 1}}},
+        ])
+        for r in rows:
+            counts[r["_id"]] = counts.get(r["_id"], 0) + r["count"]
+    return counts
+
+
+# Typeahead over the cached catalog; rebuilt whenever the catalog version changes
+AUTOSUGGEST = AutosuggestIndex(
+    popularity_fn=catalog_popularity,
+    popularity_seconds=float(os.getenv("AUTOSUGGEST_POPULARITY_SECONDS", "600")),
+    fuzzy=os.getenv("AUTOSUGGEST_FUZZY", "true").lower() in ("1", "true", "yes"),
+    budget_ms=float(os.getenv("AUTOSUGGEST_BUDGET_MS", "5")),
+)
+# Build the index when the catalog reloads, not on the first keystroke that follows
+CATALOG.add_listener(AUTOSUGGEST.rebuild)
+
+
 # AI / embeddings
-EMBED_MODEL = None
 INDEX_PATH = pathlib.Path("./data/faiss.index")
-META_PATH = pathlib.Path("./data/faiss_meta.json")
+META_PATH = pathlib.Path("./data/vector_meta.bin")  # binary metadata sidecar: offsets table + packed rows
+META_JSON_PATH = pathlib.Path("./data/faiss_meta.json")  # debugging export; also read by pre-sidecar indexes
+# Write the pretty-printed JSON copy of the metadata next to the sidecar (debugging only)
+META_JSON_EXPORT = os.getenv("META_JSON_EXPORT", "false").lower() in ("1", "true", "yes")
+EMBEDDINGS_PATH = pathlib.Path("./data/embeddings.npy")
+BM25_PATH = pathlib.Path("./data/bm25_index.json")  # lexical postings over the same rows as META_PATH
+MANIFEST_PATH = pathlib.Path("./data/index_manifest.json")  # FAISS index type/params of the last build
+VECTOR_DOCS_BATCH = 1000  # metadata rows per insert/read round trip to vector_docs
+# Index builds kept in GridFS (the current one always included) so nodes can roll back
+INDEX_RETENTION_VERSIONS = int(os.getenv("INDEX_RETENTION_VERSIONS", "3"))
+# Fetch the current index from GridFS in the background when a process starts (skipped if local files match)
+INDEX_BOOTSTRAP_ON_STARTUP = os.getenv("INDEX_BOOTSTRAP_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+# On-disk dtype for the NumPy fallback store: float32 (exact), float16 or int8 (per-row scales)
+EMBED_STORE_DTYPE = os.getenv("EMBED_STORE_DTYPE", "float32")
 VECTOR_DIM = 384  # for all-MiniLM-L6-v2 model used by SentenceTransformer
+# FAISS index family: auto (by corpus size), flat, hnsw or ivfpq. Params tune build and search.
+INDEX_TYPE = os.getenv("INDEX_TYPE", "auto")
+INDEX_PARAMS = {
+    "hnsw_m": int(os.getenv("INDEX_HNSW_M", "32")),
+    "ef_construction": int(os.getenv("INDEX_EF_CONSTRUCTION", "80")),
+    "ef_search": int(os.getenv("INDEX_EF_SEARCH", "64")),
+    "nlist": int(os.getenv("INDEX_IVF_NLIST", "0")),  # 0 = ~4*sqrt(n)
+    "pq_m": int(os.getenv("INDEX_PQ_M", "0")),  # 0 = first of 64, 48, 32, 24, 16, 8, 4, 2, 1 that divides dim (64 for 384 dims)
+    "nprobe": int(os.getenv("INDEX_NPROBE", "16")),
+}
+
+# Process-wide index kept in memory; swapped atomically after builds/loads.
+RESIDENT_INDEX = ResidentIndex(INDEX_PATH, META_PATH, EMBEDDINGS_PATH, lexical_path=BM25_PATH,
+                               manifest_path=MANIFEST_PATH, legacy_meta_path=META_JSON_PATH)
+
+# Query embedding + hit caches; the hit level is dropped whenever the index swaps.
+SEARCH_CACHE = SearchCache(
+    max_size=int(os.getenv("SEARCH_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "3600")),
+)
+RESIDENT_INDEX.add_listener(SEARCH_CACHE.on_index_swap)
+
+# LLM answers reused for near-identical questions; shared by all workers through Mongo
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+ANSWER_CACHE = SemanticAnswerCache(
+    collection=db["answer_cache"],
+    threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95")),
+    max_size=int(os.getenv("ANSWER_CACHE_SIZE", "2000")),
+    ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400")),
+    refresh_seconds=float(os.getenv("ANSWER_CACHE_REFRESH_SECONDS", "30")),
+)
+RESIDENT_INDEX.add_listener(ANSWER_CACHE.on_index_swap)
+
+def _load_embedding_model():
+    try:
+        from sentence_transformers import SentenceTransformer
+    except Exception as e:
+        # Model not available on this host. Inform and re-raise as RuntimeError so callers can handle it.
+        print(f"sentence-transformers not available: {e}")
+        raise RuntimeError("sentence-transformers is not installed on this environment")
+    return SentenceTransformer(os.getenv("EMBED_MODEL","sentence-transformers/all-MiniLM-L6-v2"))
+
+
+# The embedding model, loaded once per process. EMBED_MODEL_PRELOAD:
+#   background - load and warm up in a background thread when the process starts serving (default)
+#   import     - load while app.py is imported, i.e. in the parent of `gunicorn --preload`, so every
+#                forked worker shares the weights; each worker still runs its own warmup encode
+#   off        - load on the first search
+EMBED_MODEL_PRELOAD = os.getenv("EMBED_MODEL_PRELOAD", "background").lower()
+EMBEDDING_MODELS = ModelRegistry(_load_embedding_model, warmup_texts=["How do I apply for a passport?"])
+
 
 def get_embedding_model():
-    """Initializes and returns the SentenceTransformer model for embeddings."""
-    global EMBED_MODEL
-    if EMBED_MODEL is None:
-        try:
-            from sentence_transformers import SentenceTransformer
-        except Exception as e:
-            # Model not available on this host. Inform and re-raise as RuntimeError so callers can handle it.
-            print(f"sentence-transformers not available: {e}")
-            raise RuntimeError("sentence-transformers is not installed on this environment")
-        EMBED_MODEL = SentenceTransformer(os.getenv("EMBED_MODEL","sentence-transformers/all-MiniLM-L6-v2"))
-    return EMBED_MODEL
+    """Returns the SentenceTransformer model for embeddings, loading it on first use."""
+    return EMBEDDING_MODELS.get()
+
+
+def start_model_preload():
+    """Load and warm up the embedding model in the background, once per process."""
+    if EMBED_MODEL_PRELOAD != "off":
+        EMBEDDING_MODELS.preload()
+
+
+if EMBED_MODEL_PRELOAD == "import":
+    # No background thread here: the load finishes before a pre-fork server forks
+    try:
+        EMBEDDING_MODELS.load(warmup=False)
+    except Exception as e:
+        print(f"Embedding model preload failed: {e}")
+
+
+# Query encoder shared by concurrent searches: texts are queued and flushed as one
+# model.encode() call when the batch fills or the wait window expires.
+QUERY_ENCODER = MicroBatchEncoder(
+    get_embedding_model,
+    max_batch_size=int(os.getenv("EMBED_BATCH_SIZE", "32")),
+    max_wait_ms=float(os.getenv("EMBED_BATCH_WAIT_MS", "5")),
+)
 
 
 # --- Helpers ---
@@ -257,25 +414,18 @@ def dashboard():
 # New: Ministry services details page
 @app.route("/ministry/<ministry_id>")
 def ministry_services(ministry_id):
-    # Find the ministry by ID from the DB
-    super_categories = list(services_col.find({}, {"_id":0}))
-    ministry = None
-    for sc in super_categories:
-        for min in sc.get("ministries", []):
-            if min.get("id") == ministry_id:
-                ministry = min
-                break
-        if ministry:
-            break
-    if not ministry:
+    # Look the ministry up by ID in the cached catalog's node index
+    catalog = CATALOG.get()
+    entry = catalog.node(ministry_id, "ministry")
+    if not entry:
         # If not found, show a friendly list of available ministries to help navigation
         ministries = []
-        for sc in super_categories:
-            for m in sc.get("ministries", []):
-                ministries.append({"id": m.get("id"), "name": getLocalizedName(m.get("name")), "super_category": getLocalizedName(sc.get("name"))})
+        for m in catalog.of_type("ministry"):
+            sc = (catalog.node(m["parent_id"]) or {}).get("node", {})
+            ministries.append({"id": m["id"], "name": getLocalizedName(m["node"].get("name")), "super_category": getLocalizedName(sc.get("name"))})
         return render_template("ministry_list.html", ministries=ministries, query_id=ministry_id)
 
-    return render_template("ministry_services.html", ministry=ministry)
+    return render_template("ministry_services.html", ministry=entry["node"])
 
 @app.route("/admin")
 def admin_page():
@@ -372,8 +522,7 @@ def get_services():
     Returns a JSON list of all original service documents (Super Categories),
     including their nested ministries, subservices and questions. Excludes MongoDB's internal _id.
     """
-    docs = list(services_col.find({}, {"_id":0}))
-    return jsonify(docs)
+    return catalog_response(CATALOG.get())
 
 @app.route("/api/categories")
 def get_categories():
@@ -383,7 +532,7 @@ def get_categories():
     """
     # Given our seed_data.py, services_col *directly stores* the Super Category documents.
     # The frontend is expecting these as its top-level "categories".
-    return jsonify(list(services_col.find({}, {"_id":0})))
+    return catalog_response(CATALOG.get())
 
 @app.route("/api/service/<service_id>")
 def get_service(service_id):
@@ -392,68 +541,50 @@ def get_service(service_id):
     excluding MongoDB's internal _id. This is primarily for fetching a full
     Super Category document.
     """
-    doc = services_col.find_one({"id": service_id}, {"_id":0})
-    return jsonify(doc or {})
+    entry = CATALOG.get().node(service_id, "super_category")
+    return jsonify(entry["node"] if entry else {})
+
+
+@app.route("/api/catalog/node/<node_id>")
+def get_catalog_node(node_id):
+    """
+    Returns any catalog node (super category, ministry, subservice or question) by its id,
+    with its type, parent id and breadcrumb path. Questions are addressed as
+    '<subservice_id>:q<position>'. Served from the in-memory node index.
+    """
+    catalog = CATALOG.get()
+    entry = catalog.node(node_id, request.args.get("type"))
+    if not entry:
+        return jsonify({"error": "not_found", "id": node_id}), 404
+    path = [{"id": e["id"], "type": e["type"], "name": e["node"].get("name")} for e in catalog.ancestors(node_id)]
+    return jsonify({"id": entry["id"], "type": entry["type"], "parent_id": entry["parent_id"], "path": path,
+                    "node": entry["node"], "catalog_version": catalog.version})
+
+
+@app.route("/api/catalog/children")
+@app.route("/api/catalog/children/<node_id>")
+def get_catalog_children(node_id=None):
+    """
+    Returns one level of the catalog: the super categories, or the direct children of a
+    super category, ministry or subservice, without their own subtrees (each item carries
+    a 'child_count' instead). '?fields=id,name' keeps only those keys of each item and
+    '?lang=si' reduces every localized text to that language. Each level has its own ETag.
+    """
+    return catalog_level_response(node_id)
 
 
 @app.route("/api/search/autosuggest")
 def autosuggest():
     """
     Provides quick search matches for typeahead functionality.
-    Searches across super category names, ministry names and subservice names
-    within the hierarchical services_col.
+    Matches ministry, subservice and question titles in every language against the
+    in-memory prefix index of the cached catalog, most popular first, then fills up
+    with typo-tolerant matches within the per-keystroke time budget.
     """
     q = request.args.get("q","").strip()
     if not q:
         return jsonify([])
-
-    # Escape the user query for safe regex usage to avoid ReDoS or unintended regex patterns
-    safe_q = re.escape(q)
-
-    # Use $regex in $match only, then filter in Python
-    docs = list(services_col.find({
-        "$or": [
-            {"name.en": {"$regex": safe_q, "$options": "i"}},
-            {"ministries.name.en": {"$regex": safe_q, "$options": "i"}},
-            {"ministries.subservices.name.en": {"$regex": safe_q, "$options": "i"}}
-        ]
-    }, {"_id":0}))
-
-    search_pattern = re.compile(re.escape(q), re.IGNORECASE)
-    final_results = []
-    seen_ids = set()
-    for sc in docs:
-        super_cat_id = sc.get("id")
-        super_cat_name = getLocalizedName(sc.get("name"))
-        for ministry in sc.get("ministries", []):
-            ministry_id = ministry.get("id")
-            ministry_name = getLocalizedName(ministry.get("name"))
-            # Ministry match
-            if ministry_name and search_pattern.search(ministry_name) and ministry_id not in seen_ids:
-                final_results.append({
-                    "id": ministry_id,
-                    "name": {"en": ministry_name},
-                    "super_category_id": super_cat_id,
-                    "super_category_name": {"en": super_cat_name},
-                    "type": "ministry"
-                })
-                seen_ids.add(ministry_id)
-            # Subservice match
-            for subservice in ministry.get("subservices", []):
-                sub_id = subservice.get("id")
-                sub_name = getLocalizedName(subservice.get("name"))
-                if sub_name and search_pattern.search(sub_name) and sub_id not in seen_ids:
-                    final_results.append({
-                        "id": sub_id,
-                        "name": subservice.get("name"),
-                        "super_category_id": super_cat_id,
-                        "super_category_name": {"en": super_cat_name},
-                        "ministry_id": ministry_id,
-                        "ministry_name": {"en": ministry_name},
-                        "type": "subservice"
-                    })
-                    seen_ids.add(sub_id)
-    return jsonify(final_results[:20])
+    return jsonify(AUTOSUGGEST.suggest(q, CATALOG.get(), limit=20))
 
 
 @app.route("/api/engagement", methods=["POST"])
@@ -1341,13 +1472,33 @@ def get_dashboard_analytics():
 
 
 # --- AI / vector index endpoints ---
-def build_vector_index():
+# One build at a time per process: the scheduler, the admin endpoint and async jobs all
+# assemble vectors in the same scratch file and swap the same on-disk pointers.
+INDEX_BUILD_LOCK = threading.Lock()
+
+
+def build_vector_index(full_rebuild=False, progress=None):
     """
     Build or rebuild a FAISS index from service content in services_col.
     Flattens service/subservice/question data into searchable documents.
     Saves index file + metadata JSON.
+    Each document carries a content hash; unless `full_rebuild` is set, vectors of
+    unchanged documents are reused from the current index and only new or changed
+    documents are re-encoded. Encoding runs in chunks (INDEX_BUILD_CHUNK_SIZE) on a
+    worker pool (INDEX_BUILD_WORKERS); `progress` is called after every chunk.
     This should be run via /api/admin/build_index by an admin after seeding/updating services.
+    Returns {"error": "build_already_running"} without doing anything if another build is in progress.
     """
+    if not INDEX_BUILD_LOCK.acquire(blocking=False):
+        print("Index build already running; skipping this request.")
+        return {"count": 0, "error": "build_already_running"}
+    try:
+        return _build_vector_index(full_rebuild=full_rebuild, progress=progress)
+    finally:
+        INDEX_BUILD_LOCK.release()
+
+
+def _build_vector_index(full_rebuild=False, progress=None):
     global FAISS_AVAILABLE # Corrected: Declare global here at the start
     
     os.makedirs("data", exist_ok=True)
@@ -1397,80 +1548,303 @@ def build_vector_index():
         print(f"NumPy not available: {e}. Cannot build vector index.")
         return {"count": 0, "error": "numpy_not_installed"}
 
-    try:
-        model = get_embedding_model()
-    except RuntimeError as e:
-        print(f"Embedding model unavailable: {e}")
-        return {"count": 0, "error": "sentence_transformers_not_installed"}
+    model_name = os.getenv("EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    for d in docs:
+        d["content_hash"] = content_hash(d["content"], model_name)
 
-    texts = [d["content"] for d in docs]
-    print(f"Encoding {len(texts)} documents...")
-    embeddings = model.encode(texts, show_progress_bar=True, convert_to_numpy=True)
+    # Work out which vectors can be carried over from the current index
+    prev_vectors = None
+    prev_meta = []
+    if not full_rebuild:
+        try:
+            prev = RESIDENT_INDEX.get(use_faiss=FAISS_AVAILABLE)
+            prev_vectors = snapshot_vectors(prev)
+            prev_meta = prev.meta
+            if prev_vectors is None or len(prev_vectors) != len(prev_meta):
+                prev_vectors, prev_meta = None, []
+        except Exception as e:
+            print(f"Warning: could not read current index for incremental build: {e}")
+            prev_vectors, prev_meta = None, []
+    reuse, to_encode, counts = plan_incremental_build(docs, prev_meta)
+
+    model = None
+    dim = prev_vectors.shape[1] if prev_vectors is not None else None
+    if to_encode:
+        try:
+            model = get_embedding_model()
+        except RuntimeError as e:
+            print(f"Embedding model unavailable: {e}")
+            return {"count": 0, "error": "sentence_transformers_not_installed"}
+        get_dim = getattr(model, "get_sentence_embedding_dimension", None)
+        model_dim = get_dim() if get_dim else None
+        if not model_dim:
+            model_dim = model.encode([docs[to_encode[0]]["content"]], convert_to_numpy=True).shape[1]
+        if dim and dim != model_dim:
+            # The model changed shape; none of the old vectors are comparable any more
+            print(f"Embedding dimension changed ({dim} -> {model_dim}); re-encoding all documents.")
+            reuse, to_encode, counts = plan_incremental_build(docs, [])
+            prev_vectors = None
+        dim = model_dim
+
+    # Vectors are assembled in a memory-mapped scratch file so encoded chunks go
+    # straight to disk instead of piling up in memory.
+    scratch_path = EMBEDDINGS_PATH.with_name("embeddings.build.npy")
+    embeddings = np.lib.format.open_memmap(scratch_path, mode="w+", dtype=np.float32, shape=(len(docs), dim))
+    if reuse:
+        new_rows = np.fromiter(reuse.keys(), dtype=np.int64)
+        old_rows = np.fromiter(reuse.values(), dtype=np.int64)
+        embeddings[new_rows] = prev_vectors[old_rows]
+    prev_vectors = None
+
+    if to_encode:
+        texts = [docs[i]["content"] for i in to_encode]
+        print(f"Encoding {len(texts)} of {len(docs)} documents ({counts['reused']} unchanged)...")
+        encode_in_chunks(
+            model, texts, embeddings,
+            out_rows=np.asarray(to_encode, dtype=np.int64),
+            chunk_size=int(os.getenv("INDEX_BUILD_CHUNK_SIZE", "256")),
+            workers=int(os.getenv("INDEX_BUILD_WORKERS", "1")),
+            progress=progress,
+        )
 
-    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
-    norms[norms==0] = 1.0
-    embeddings = embeddings / norms
+    # Normalise in place, one block of rows at a time
+    for start in range(0, len(docs), 8192):
+        block = embeddings[start:start + 8192]
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        norms[norms==0] = 1.0
+        block /= norms
+    embeddings.flush()
+
+    # The embedding store is written for every build: it is the NumPy search path, the
+    # source of reused rows for the next incremental build and the runtime fallback
+    # when an approximate FAISS index misbehaves. It and the metadata sidecar are
+    # memory-mapped by the serving snapshot, so each build writes them under new names.
+    version = now_utc().strftime("%Y%m%dT%H%M%S%f")
+    store_path = versioned_path(EMBEDDINGS_PATH, version)
+    meta_path = versioned_path(META_PATH, version)
+    store_saved = False
+    try:
+        save_embedding_store(store_path, embeddings, dtype=EMBED_STORE_DTYPE)
+        store_saved = True
+        print(f"Embeddings saved to {store_path} as {EMBED_STORE_DTYPE}.")
+    except Exception as e:
+        print(f"Warning: could not save embedding store: {e}")
 
+    built_index = None
+    index_info = {"index_type": "numpy", "params": {}}
     if FAISS_AVAILABLE:
         try:
-            dim = embeddings.shape[1]
-            index = faiss.IndexFlatIP(dim)
-            index.add(embeddings.astype(np.float32))
+            index_type = choose_index_type(len(docs), INDEX_TYPE)
+            index, index_info = build_faiss_index(embeddings, index_type, INDEX_PARAMS)
             faiss.write_index(index, str(INDEX_PATH))
-            print(f"FAISS index built and saved to {INDEX_PATH}")
-            # Persist FAISS index into MongoDB GridFS for portability
-            try:
-                fs = GridFS(db)
-                with open(INDEX_PATH, 'rb') as f:
-                    idx_bytes = f.read()
-                # remove any previous 'faiss.index' files (optional)
-                try:
-                    for old in db.fs.files.find({"filename": {"$regex": "^faiss-"}}):
-                        db.fs.delete(old['_id'])
-                except Exception:
-                    pass
-                grid_id = fs.put(idx_bytes, filename=f"faiss-{now_utc().isoformat()}.index")
-                # store metadata pointer
-                try:
-                    db['vector_meta'].replace_one({"name": "current"}, {"name": "current", "meta_count": len(docs), "gridfs_id": grid_id, "updated": now_utc()}, upsert=True)
-                except Exception:
-                    pass
-            except Exception as e:
-                print(f"Warning: could not persist FAISS index to GridFS: {e}")
+            built_index = index
+            print(f"FAISS {index_info['index_type']} index built and saved to {INDEX_PATH}")
         except Exception as e:
             print(f"Error during FAISS index creation: {e}. Falling back to NumPy for future searches.")
             FAISS_AVAILABLE = False
-    else:
-        # Save embeddings to disk as fallback
-        np.save("data/embeddings.npy", embeddings)
-        print(f"Embeddings saved to data/embeddings.npy (FAISS not available).")
-        # Also persist embeddings and metadata in MongoDB (GridFS for embeddings blob + collection for meta)
+            index_info = {"index_type": "numpy", "params": {}}
+
+    # Persist the artifacts into MongoDB GridFS for portability, streamed chunk by chunk
+    artifacts = {}
+    try:
+        bucket = GridFSBucket(db)
+        file_meta = {"index_version": version}
+        if built_index is not None:
+            artifacts["faiss"] = put_stream(
+                bucket, f"faiss-{version}.index",
+                lambda w: faiss.write_index(built_index, faiss.PyCallbackIOWriter(w.write)),
+                metadata=dict(file_meta, kind="faiss"))
+        if store_saved:
+            artifacts["embeddings"] = put_file(bucket, store_path, f"embeddings-{version}.npy",
+                                               metadata=dict(file_meta, kind="embeddings"))
+            scales_path = scales_path_for(store_path)
+            if EMBED_STORE_DTYPE == "int8" and scales_path.exists():
+                artifacts["embedding_scales"] = put_file(bucket, scales_path, f"embeddings-{version}_scales.npy",
+                                                         metadata=dict(file_meta, kind="embedding_scales"))
+        else:
+            artifacts["embeddings"] = put_stream(bucket, f"embeddings-{version}.npy",
+                                                 lambda w: np.save(w, embeddings),
+                                                 metadata=dict(file_meta, kind="embeddings"))
+    except Exception as e:
+        print(f"Warning: could not persist index artifacts to GridFS: {e}")
+
+    meta_saved = False
+    try:
+        save_meta_store(meta_path, docs, columns=FILTER_FIELDS)
+        meta_saved = True
+        print(f"Metadata saved to {meta_path}")
+    except Exception as e:
+        print(f"Warning: could not save metadata store: {e}")
+    if META_JSON_EXPORT:
         try:
-            fs = GridFS(db)
-            bio = BytesIO()
-            # Save numpy array to bytes via np.save
-            np.save(bio, embeddings)
-            bio.seek(0)
-            emb_grid_id = fs.put(bio.read(), filename=f"embeddings-{now_utc().isoformat()}.npy")
-            # Persist metadata document list
-            try:
-                db['vector_meta'].replace_one({"name": "current"}, {"name": "current", "meta_count": len(docs), "embeddings_gridfs_id": emb_grid_id, "updated": now_utc(), "docs": docs}, upsert=True)
-            except Exception:
-                pass
+            export_meta_json(META_JSON_PATH, docs)
         except Exception as e:
-            print(f"Warning: could not persist embeddings to GridFS: {e}")
+            print(f"Warning: could not export metadata JSON: {e}")
 
-    with open(META_PATH, "w", encoding="utf-8") as f:
-        json.dump(docs, f, ensure_ascii=False, indent=2)
-    print(f"Metadata saved to {META_PATH}")
+    # BM25 postings for the text fallback / lexical retrieval, over the same rows
+    lexical = BM25Index.build(docs)
+    lexical_path = versioned_path(BM25_PATH, version)
+    lexical_saved = False
+    try:
+        save_bm25_index(lexical_path, lexical)
+        lexical_saved = True
+    except Exception as e:
+        print(f"Warning: could not save BM25 index: {e}")
+
+    # The manifest is written last: it is the pointer that makes the new files current on disk
+    files = {}
+    if meta_saved:
+        files["meta"] = meta_path.name
+    if store_saved:
+        files["embeddings"] = store_path.name
+    if lexical_saved:
+        files["lexical"] = lexical_path.name
+    manifest = {
+        "version": version,
+        "index_type": index_info["index_type"],
+        "params": index_info["params"],
+        "count": len(docs),
+        "dim": int(embeddings.shape[1]),
+        "store_dtype": EMBED_STORE_DTYPE,
+        "built_at": now_utc().isoformat(),
+        "artifacts": {kind: {"sha256": ref["sha256"], "length": ref["length"]} for kind, ref in artifacts.items()},
+        "files": files,
+    }
+    try:
+        save_index_manifest(MANIFEST_PATH, manifest)
+    except Exception as e:
+        print(f"Warning: could not save index manifest: {e}")
 
-    # Ensure metadata is stored in MongoDB for quick retrieval
+    # Record the version with its metadata rows, then swap the "current" pointer to it.
+    # Versions beyond the retention window are only dropped once the pointer has moved.
     try:
-        db['vector_meta'].replace_one({"name": "current"}, {"name": "current", "meta_count": len(docs), "updated": now_utc(), "docs": docs}, upsert=True)
+        save_vector_docs(version, docs)
+        version_doc = {
+            "index_version": version, "meta_count": len(docs), "created": now_utc(),
+            "index_type": manifest["index_type"], "index_params": manifest["params"], "dim": manifest["dim"],
+            "store_dtype": EMBED_STORE_DTYPE, "artifacts": artifacts,
+        }
+        index_versions_col.replace_one({"index_version": version}, version_doc, upsert=True)
+        set_current_index_version(version_doc)
+        prune_index_versions(INDEX_RETENTION_VERSIONS)
+        # Cached LLM answers were grounded in the previous build's sources
+        ANSWER_CACHE.invalidate(keep_version=version)
     except Exception as e:
         print(f"Warning: could not persist metadata to MongoDB: {e}")
 
-    return {"count": len(docs), "faiss_available": FAISS_AVAILABLE}
+    # Swap the freshly built index in for searches; no need to re-read the files.
+    # The NumPy store is re-opened memory-mapped so forked workers share its pages.
+    store = None
+    if store_saved:
+        try:
+            store = load_embedding_store(store_path, mmap=True)
+        except Exception as e:
+            print(f"Warning: could not map embedding store: {e}")
+    if built_index is None and store is None:
+        store = embeddings
+    meta_rows = docs
+    if meta_saved:
+        try:
+            meta_rows = load_meta_store(meta_path)
+        except Exception as e:
+            print(f"Warning: could not map metadata store: {e}")
+    RESIDENT_INDEX.publish(meta_rows, faiss_index=built_index, embeddings=store, lexical=lexical, info=manifest)
+    prune_local_index_files(manifest)
+
+    # Unlinking is safe even if the scratch map was published: the mapping outlives the name.
+    try:
+        del embeddings
+        scratch_path.unlink()
+    except Exception:
+        pass
+
+    return {"count": len(docs), "faiss_available": FAISS_AVAILABLE, "index_type": manifest["index_type"],
+            "encoded": len(to_encode), **counts}
+
+
+def prune_local_index_files(manifest):
+    """Remove the versioned metadata/embedding/BM25 files of earlier builds; the manifest's stay."""
+    keep_store = index_file(EMBEDDINGS_PATH, manifest, "embeddings")
+    try:
+        prune_index_files(META_PATH, [p for p in [index_file(META_PATH, manifest, "meta")] if p])
+        prune_index_files(EMBEDDINGS_PATH, [keep_store, scales_path_for(keep_store)] if keep_store else [])
+        prune_index_files(BM25_PATH, [p for p in [index_file(BM25_PATH, manifest, "lexical")] if p])
+    except Exception as e:
+        print(f"Warning: could not prune old index files: {e}")
+
+
+def save_vector_docs(version, docs, batch_size=VECTOR_DOCS_BATCH):
+    """Insert one vector_docs record per metadata row, tagged with the index version."""
+    try:
+        vector_docs_col.create_index([("index_version", 1), ("row", 1)], unique=True)
+    except Exception as e:
+        print(f"Warning: could not create vector_docs index: {e}")
+    # Re-running a build with the same version must not trip the unique index
+    vector_docs_col.delete_many({"index_version": version})
+    for start in range(0, len(docs), batch_size):
+        batch = [dict(doc, index_version=version, row=row)
+                 for row, doc in enumerate(docs[start:start + batch_size], start=start)]
+        if batch:
+            vector_docs_col.insert_many(batch, ordered=False)
+
+
+def prune_vector_docs(keep_versions):
+    """Drop the metadata rows of every index version not in `keep_versions` (a version or a list)."""
+    if isinstance(keep_versions, str):
+        keep_versions = [keep_versions]
+    return vector_docs_col.delete_many({"index_version": {"$nin": list(keep_versions)}}).deleted_count
+
+
+def fetch_vector_docs(version, rows):
+    """Return the metadata records for `rows` of an index version, in the order asked for.
+
+    Rows that do not exist come back as None.
+    """
+    rows = [int(r) for r in rows]
+    found = {}
+    for rec in vector_docs_col.find({"index_version": version, "row": {"$in": rows}},
+                                    {"_id": 0, "index_version": 0}):
+        found[rec.pop("row")] = rec
+    return [found.get(r) for r in rows]
+
+
+def iter_vector_docs(version, batch_size=VECTOR_DOCS_BATCH):
+    """Yield the metadata records of an index version in row order, a batch at a time."""
+    cursor = vector_docs_col.find({"index_version": version}, {"_id": 0, "index_version": 0}) \
+        .sort("row", 1).batch_size(batch_size)
+    for rec in cursor:
+        rec.pop("row", None)
+        yield rec
+
+
+def set_current_index_version(version_doc):
+    """Atomically point vector_meta "current" at a stored index version."""
+    pointer = {k: v for k, v in version_doc.items() if k not in ("_id", "created")}
+    pointer.update({"name": "current", "updated": now_utc()})
+    db['vector_meta'].replace_one({"name": "current"}, pointer, upsert=True)
+    return pointer
+
+
+def prune_index_versions(keep):
+    """Keep the newest `keep` index versions (plus the current one); drop the rest and their files."""
+    current = (db['vector_meta'].find_one({"name": "current"}, {"index_version": 1}) or {}).get("index_version")
+    versions = list(index_versions_col.find({}, {"index_version": 1, "artifacts": 1}).sort("created", -1))
+    kept = [v["index_version"] for v in versions[:max(1, int(keep))]]
+    if current and current not in kept:
+        kept.append(current)
+    bucket = GridFSBucket(db)
+    dropped = [v for v in versions if v["index_version"] not in kept]
+    for v in dropped:
+        delete_files(bucket, [ref["file_id"] for ref in (v.get("artifacts") or {}).values()])
+        index_versions_col.delete_one({"_id": v["_id"]})
+    # Files uploaded before versions were tracked carry no index_version
+    try:
+        for old in db.fs.files.find({"filename": {"$regex": "^(faiss|embeddings)-"}, "metadata.index_version": {"$exists": False}}, {"_id": 1}):
+            delete_files(bucket, [old["_id"]])
+    except Exception:
+        pass
+    prune_vector_docs(kept)
+    return {"kept": kept, "dropped": [v["index_version"] for v in dropped]}
 
 
 # --- Background job management for long-running tasks (index build) ---
@@ -1491,13 +1865,34 @@ def _run_build_index_background(job_id):
         except Exception as e:
             print(f"Warning: could not persist job running status to DB: {e}")
 
-        res = build_vector_index()
+        def _report_progress(progress):
+            INDEX_JOB_STATUS[job_id] = {**INDEX_JOB_STATUS.get(job_id, {}), "progress": progress}
+            try:
+                index_jobs_col.update_one({"job_id": job_id}, {"$set": {"progress": progress, "updated_at": now_utc()}})
+            except Exception:
+                pass
+
+        res = build_vector_index(progress=_report_progress)
+
+        if res.get("error"):
+            # Nothing was built: "skipped" when another build held the lock, "error" otherwise
+            status = "skipped" if res["error"] == "build_already_running" else "error"
+            INDEX_JOB_STATUS[job_id] = {"status": status, "finished_at": now_utc().isoformat(), "error": res["error"], "result": res}
+            try:
+                index_jobs_col.update_one({"job_id": job_id}, {"$set": {"status": status, "finished_at": now_utc(), "error": res["error"], "result": res, "updated_at": now_utc()}}, upsert=True)
+                try:
+                    index_jobs_col.update_one({"job_id": job_id}, {"$push": {"logs": {"ts": now_utc(), "msg": f"job {status}: {res['error']}"}}})
+                except Exception:
+                    pass
+            except Exception as e:
+                print(f"Warning: could not persist job {status} status to DB: {e}")
+            return
 
         INDEX_JOB_STATUS[job_id] = {"status": "completed", "finished_at": now_utc().isoformat(), "result": res}
         try:
             index_jobs_col.update_one({"job_id": job_id}, {"$set": {"status": "completed", "finished_at": now_utc(), "result": res, "updated_at": now_utc()}}, upsert=True)
             try:
-                index_jobs_col.update_one({"job_id": job_id}, {"$push": {"logs": {"ts": now_utc(), "msg": f"job completed: {res.get('count', 0)} docs"}}})
+                index_jobs_col.update_one({"job_id": job_id}, {"$push": {"logs": {"ts": now_utc(), "msg": f"job completed: {res.get('count', 0)} docs ({res.get('added', 0)} added, {res.get('updated', 0)} updated, {res.get('removed', 0)} removed, {res.get('reused', 0)} reused)"}}})
             except Exception:
                 pass
         except Exception as e:
@@ -1598,16 +1993,15 @@ def admin_build_index_async():
 def admin_index_status():
     """Return current index / metadata status and any active/finished jobs."""
     faiss_ok = bool(FAISS_AVAILABLE)
-    meta_exists = META_PATH.exists()
+    meta_path = index_file(META_PATH, load_index_manifest(MANIFEST_PATH), "meta")
+    meta_exists = meta_path is not None and meta_path.exists()
     index_exists = INDEX_PATH.exists()
     jobs = INDEX_JOB_STATUS.copy()
-    # Also include basic stats when metadata exists
+    # Also include basic stats when metadata exists; the count is read from the sidecar header
     docs_count = 0
     try:
         if meta_exists:
-            with open(META_PATH, "r", encoding="utf-8") as f:
-                meta = json.load(f)
-                docs_count = len(meta)
+            docs_count = meta_store_count(meta_path)
     except Exception:
         docs_count = 0
     return jsonify({
@@ -1615,6 +2009,11 @@ def admin_index_status():
         "meta_exists": meta_exists,
         "index_exists": index_exists,
         "documents": docs_count,
+        "resident_index": RESIDENT_INDEX.status(),
+        "embedding_model": EMBEDDING_MODELS.status(),
+        "query_encoder": QUERY_ENCODER.stats(),
+        "search_cache": SEARCH_CACHE.stats(),
+        "bootstrap": INDEX_BOOTSTRAP_STATUS,
         "jobs": jobs
     })
 
@@ -1802,86 +2201,280 @@ def send_email_smtp(to_email, subject, body, html_body=None):
 def admin_build_index():
     """Admin endpoint to build/rebuild the vector search index."""
     print("Admin requested to build vector index...")
-    res = build_vector_index()
+    full = request.args.get('full', '').lower() in ('1', 'true')
+    res = build_vector_index(full_rebuild=full)
+    if res.get("error") == "build_already_running":
+        return jsonify(res), 409
     return jsonify(res)
 
 
-def search_vectors(query, top_k=5):
+SEARCH_MODES = ("vector", "lexical", "hybrid")
+DEFAULT_SEARCH_MODE = os.getenv("SEARCH_MODE", "vector")
+RRF_K = int(os.getenv("SEARCH_RRF_K", "60"))
+
+# Small pool used to run the lexical retriever alongside the vector retriever in hybrid mode
+RETRIEVER_POOL = ThreadPoolExecutor(max_workers=int(os.getenv("SEARCH_RETRIEVER_WORKERS", "4")), thread_name_prefix="retriever")
+
+
+def encode_queries(model, queries):
+    """Unit-normalised (n, dim) query embeddings, served from the embedding cache where possible."""
+    import numpy as np
+    norm_qs = [normalize_query(q) for q in queries]
+    cached_embs = [SEARCH_CACHE.embeddings.get(nq) for nq in norm_qs]
+    missing = [i for i, e in enumerate(cached_embs) if e is None]
+    if missing:
+        texts = [queries[i] for i in missing]
+        # A lone query joins the micro-batcher; a batch already is one encode call
+        if len(texts) == 1:
+            fresh = QUERY_ENCODER.encode(texts)
+        else:
+            fresh = model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+        fresh = np.asarray(fresh, dtype=np.float32)
+        fresh = fresh / (np.linalg.norm(fresh, axis=1, keepdims=True) + 1e-10)
+        for j, i in enumerate(missing):
+            cached_embs[i] = fresh[j:j + 1]
+            SEARCH_CACHE.embeddings.put(norm_qs[i], cached_embs[i])
+    return np.vstack(cached_embs) if cached_embs else None
+
+
+def query_embedding(query):
+    """Embedding of one query for the answer cache, or None when the model is unavailable."""
+    try:
+        return encode_queries(get_embedding_model(), [query])[0]
+    except Exception as e:
+        print(f"Query embedding unavailable: {e}")
+        return None
+
+
+def search_vectors(query, top_k=5, filters=None, mode=None, timings=None):
     """
     Performs a vector similarity search using the FAISS index or a NumPy fallback.
     Returns the top_k matching documents' metadata.
+    `filters` may scope the search to a super_category_id / ministry_id / subservice_id;
+    only that partition's vectors are scored.
+    `mode` is "vector" (BM25 only when vectors are unavailable), "lexical" (BM25 only) or
+    "hybrid" (both retrievers run concurrently, fused with reciprocal rank fusion).
+    If a `timings` dict is passed it is filled with per-stage latencies in ms.
+    """
+    return search_vectors_batch([query], top_k=top_k, filters=filters, mode=mode, timings=timings)[0]
+
+
+def search_vectors_batch(queries, top_k=5, filters=None, mode=None, timings=None):
+    """
+    search_vectors() for a list of queries sharing top_k, filters and mode.
+    Queries missing from the embedding cache are encoded in one model call and all of
+    them are scored in one matrix search. Returns one hit list per query, in order.
     """
     global FAISS_AVAILABLE # Corrected: Declare global here at the start
 
+    if mode not in SEARCH_MODES:
+        mode = DEFAULT_SEARCH_MODE if DEFAULT_SEARCH_MODE in SEARCH_MODES else "vector"
+    if timings is None:
+        timings = {}
+    started = time.perf_counter()
+    results = [[] for _ in queries]
+
     # Lazy import numpy and embedding model; return empty if unavailable
     try:
         import numpy as np
     except Exception as e:
         print(f"NumPy not available: {e}. Vector search disabled.")
-        return []
+        return results
 
     # Try to get the embedding model; if not available, we'll fall back to text matching below
     model = None
-    try:
-        model = get_embedding_model()
-    except RuntimeError as e:
-        print(f"Embedding model unavailable: {e}. Will use textual fallback for search.")
+    if mode != "lexical":
+        try:
+            model = get_embedding_model()
+        except RuntimeError as e:
+            print(f"Embedding model unavailable: {e}. Will use textual fallback for search.")
 
+    norm_qs = [normalize_query(q) for q in queries]
+    q_embs = None
     if model is not None:
-        q_emb = model.encode([query], convert_to_numpy=True)
-        q_emb = q_emb / (np.linalg.norm(q_emb, axis=1, keepdims=True) + 1e-10)
+        q_embs = encode_queries(model, queries)
+        timings["encode_ms"] = round((time.perf_counter() - started) * 1000.0, 3)
 
-    if not META_PATH.exists():
+    index = RESIDENT_INDEX.get(use_faiss=FAISS_AVAILABLE)
+    meta = index.meta
+    if not meta:
         print(f"Metadata file not found at {META_PATH}")
-        return []
-    with open(META_PATH, "r", encoding="utf-8") as f:
-        meta = json.load(f)
+        return results
+
+    filters = {k: v for k, v in (filters or {}).items() if k in FILTER_FIELDS and v}
+    scope = tuple(sorted(filters.items()))
+    keys = [(embedding_digest(q_embs[i:i + 1]) if model is not None else "text:" + nq, top_k, index.version, scope, mode)
+            for i, nq in enumerate(norm_qs)]
+    pending = []
+    for i, key in enumerate(keys):
+        cached = SEARCH_CACHE.hits.get(key)
+        if cached is not None:
+            results[i] = list(cached)
+        else:
+            pending.append(i)
+    if len(queries) > 1:
+        timings["cached_queries"] = len(queries) - len(pending)
+    if not pending:
+        timings["cached"] = True
+        return results
+
+    rows = index.filter_rows(filters)
+    if rows is not None and len(rows) == 0:
+        return results
+
+    def _lexical_hits(k, which):
+        t0 = time.perf_counter()
+        res = [[(sc, meta[row]) for sc, row in index.lexical.search(queries[i], k, rows=rows)] for i in which]
+        timings["lexical_ms"] = round((time.perf_counter() - t0) * 1000.0, 3)
+        return res
+
+    def _vector_hits(k):
+        global FAISS_AVAILABLE
+        t0 = time.perf_counter()
+        batch = q_embs[pending]
+        res = [[] for _ in pending]
+        if FAISS_AVAILABLE and index.faiss_index is not None:
+            try:
+                res = index.search_faiss(batch, k, rows=rows)
+            except Exception as e:
+                print(f"Error during FAISS search: {e}. Falling back to NumPy.")
+                FAISS_AVAILABLE = False # Modify global variable if FAISS search failed
+        # If FAISS is not available, use the NumPy store. Scores come straight off the
+        # (memory-mapped, possibly quantized) store; only the k winners are sorted.
+        if not FAISS_AVAILABLE:
+            if index.embeddings is None:
+                print("Embeddings file not found for NumPy fallback.")
+            else:
+                res = index.search_embeddings(batch, k, rows=rows)
+        timings["vector_ms"] = round((time.perf_counter() - t0) * 1000.0, 3)
+        return res
+
+    hits = [[] for _ in pending]
+    if mode == "hybrid" and model is not None:
+        # Over-fetch from both retrievers so fusion has candidates to re-rank
+        depth = max(top_k * 3, 10)
+        lexical_future = RETRIEVER_POOL.submit(_lexical_hits, depth, pending)
+        vector_ranked = _vector_hits(depth)
+        lexical_ranked = lexical_future.result()
+        t0 = time.perf_counter()
+        for j in range(len(pending)):
+            fused = reciprocal_rank_fusion(
+                [[(m.get("doc_id"), m) for _, m in vector_ranked[j]], [(m.get("doc_id"), m) for _, m in lexical_ranked[j]]],
+                k=RRF_K, top_k=top_k)
+            hits[j] = [dict(m, score=sc, ranks={"vector": r.get(0), "lexical": r.get(1)}) for sc, m, r in fused]
+        timings["fusion_ms"] = round((time.perf_counter() - t0) * 1000.0, 3)
+    elif mode != "lexical" and model is not None:
+        hits = [[dict(m, score=sc) for sc, m in ranked] for ranked in _vector_hits(top_k)]
+
+    # Lexical mode, or no vector hits because the model or embeddings are missing: BM25 over
+    # the inverted index built alongside the metadata
+    empty = [j for j, h in enumerate(hits) if not h]
+    if empty:
+        for j, ranked in zip(empty, _lexical_hits(top_k, [pending[j] for j in empty])):
+            hits[j] = [dict(m, score=sc) for sc, m in ranked]
+
+    for j, i in enumerate(pending):
+        SEARCH_CACHE.hits.put(keys[i], hits[j])
+        results[i] = list(hits[j])
+    timings["total_ms"] = round((time.perf_counter() - started) * 1000.0, 3)
+    return results
+
+
+def hit_to_source(h):
+    """Shape a search hit for client-side display."""
+    return {
+        "doc_id": h.get("doc_id") or h.get("title"),
+        "title": h.get("title"),
+        "content": h.get("content"),
+        "metadata": h.get("metadata", {}),
+        "score": h.get("score")
+    }
+
+
+SEARCH_BATCH_MAX = int(os.getenv("SEARCH_BATCH_MAX", "256"))
+SEARCH_TOP_K_MAX = int(os.getenv("SEARCH_TOP_K_MAX", "50"))
+
+
+def parse_search_params(payload):
+    """
+    top_k and filters from a search request body. top_k is clamped to 1..SEARCH_TOP_K_MAX;
+    raises ValueError when it is not an integer or a filter value is not a string.
+    """
+    top_k = payload.get("top_k", 5)
+    if isinstance(top_k, bool):
+        raise ValueError("top_k must be an integer")
+    try:
+        top_k = int(top_k)
+    except (TypeError, ValueError):
+        raise ValueError("top_k must be an integer")
+    top_k = min(max(top_k, 1), SEARCH_TOP_K_MAX)
+
+    filters = {}
+    for k in FILTER_FIELDS:
+        value = payload.get(k)
+        if value is None or value == "":
+            continue
+        if not isinstance(value, str):
+            raise ValueError(f"{k} must be a string")
+        filters[k] = value
+    return top_k, filters
+
+# OpenRouter answers for /api/ai/search. OPENROUTER_URL can point at a local stub in tests.
+LLM_CLIENT = LLMClient(
+    url=os.getenv("OPENROUTER_URL", OPENROUTER_URL),
+    api_key=lambda: os.getenv("OPENROUTER_API_KEY"),
+    model=os.getenv("OPENROUTER_MODEL", "deepseek/deepseek-prover-v2"),
+    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+    timeout=float(os.getenv("LLM_TIMEOUT_SECONDS", "15")),
+    queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "2")),
+    connect_timeout=float(os.getenv("LLM_CONNECT_TIMEOUT_SECONDS", "3")),
+    max_retries=int(os.getenv("LLM_MAX_RETRIES", "2")),
+    breaker=CircuitBreaker(
+        failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+        reset_timeout=float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30")),
+    ),
+    headers={"HTTP-Referer": "http://127.0.0.1:5000", "X-Title": "Citizen Portal"},
+)
+
+
+@app.route("/api/ai/search/batch", methods=["POST"])
+def ai_search_batch():
+    """
+    Retrieval for many queries in one request (offline jobs, search-quality evaluation).
+    Accepts {"queries": [...], "top_k": 5, "mode": ..., plus the optional filter fields}
+    and returns the sources for each query in the order given. No LLM answer is generated.
+    A failed search answers 500 with the error rather than empty results.
+    """
+    payload = request.json or {}
+    queries = payload.get("queries")
+    if not isinstance(queries, list) or not queries:
+        return jsonify({"error": "queries must be a non-empty list"}), 400
+    if len(queries) > SEARCH_BATCH_MAX:
+        return jsonify({"error": f"at most {SEARCH_BATCH_MAX} queries per batch"}), 400
+    queries = [str(q or "").strip() for q in queries]
+    try:
+        top_k, filters = parse_search_params(payload)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    mode = payload.get("mode") or DEFAULT_SEARCH_MODE
+    timings = {}
+
+    # Empty strings keep their slot in the response but are not searched
+    present = [i for i, q in enumerate(queries) if q]
+    hits = [[] for _ in queries]
+    try:
+        found = search_vectors_batch([queries[i] for i in present], top_k=top_k, filters=filters, mode=mode, timings=timings)
+        for i, h in zip(present, found):
+            hits[i] = h
+    except Exception as e:
+        # An empty result list would read as "no hits" to an evaluation job
+        print(f"Batch search failed: {e}")
+        return jsonify({"error": "search_failed", "detail": str(e), "count": len(queries), "mode": mode}), 500
+
+    results = [{"query": q, "sources": [hit_to_source(h) for h in hs], "hits_count": len(hs)}
+               for q, hs in zip(queries, hits)]
+    return jsonify({"results": results, "count": len(results), "mode": mode, "timings": timings})
 
-    hits = []
-    if FAISS_AVAILABLE and INDEX_PATH.exists() and model is not None:
-        try:
-            index = faiss.read_index(str(INDEX_PATH))
-            D, I = index.search(q_emb.astype(np.float32), top_k)
-            for idx in I[0]:
-                if idx < len(meta):
-                    hits.append(meta[idx])
-        except Exception as e:
-            print(f"Error during FAISS search: {e}. Falling back to NumPy.")
-            FAISS_AVAILABLE = False # Modify global variable if FAISS search failed
-    
-    # If FAISS is not available or model missing, try NumPy fallback if embeddings file exists
-    if not FAISS_AVAILABLE and model is not None:
-        if not (pathlib.Path("data/embeddings.npy").exists()):
-            print("Embeddings file not found for NumPy fallback.")
-            return []
-        db_emb = np.load("data/embeddings.npy")
-        sims = (db_emb @ q_emb[0]).tolist()
-        idxs = np.argsort(sims)[::-1][:top_k]
-        hits = [meta[int(i)] for i in idxs if int(i) < len(meta)]
-
-    # If we still have no hits and either model is missing or embeddings missing, fallback to naive text search
-    if not hits:
-        q_low = query.lower()
-        scored = []
-        for i, m in enumerate(meta):
-            # combine title+content
-            text = " ".join(filter(None, [m.get('title',''), m.get('content','')]))
-            if not text:
-                continue
-            t_low = text.lower()
-            score = 0
-            if q_low in t_low:
-                score += 10
-            # bonus for word overlap
-            for w in q_low.split():
-                if w and w in t_low:
-                    score += 1
-            if score > 0:
-                scored.append((score, m))
-        scored.sort(key=lambda x: x[0], reverse=True)
-        hits = [m for s, m in scored[:top_k]]
-
-    return hits
 
 @app.route("/api/ai/search", methods=["POST"])
 def ai_search():
@@ -1891,58 +2484,120 @@ def ai_search():
     """
     payload = request.json or {}
     query = payload.get("query","").strip()
-    top_k = int(payload.get("top_k", 5))
 
     if not query:
         return jsonify({"error":"empty query"}), 400
 
+    # Optional scope, e.g. the chatbot on a ministry page only searches that ministry
+    try:
+        top_k, filters = parse_search_params(payload)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    # Retrieval mode: vector (default), lexical or hybrid
+    mode = payload.get("mode") or DEFAULT_SEARCH_MODE
+    timings = {}
+
     # First, attempt a vector search to gather relevant sources (if embeddings exist)
     try:
-        hits = search_vectors(query, top_k=top_k)
+        hits = search_vectors(query, top_k=top_k, filters=filters, mode=mode, timings=timings)
     except Exception as e:
         hits = []
 
     # Prepare simple sources for client-side display
-    sources = []
-    for h in hits:
-        sources.append({
-            "doc_id": h.get("doc_id") or h.get("title"),
-            "title": h.get("title"),
-            "content": h.get("content"),
-            "metadata": h.get("metadata", {})
-        })
+    sources = [hit_to_source(h) for h in hits]
+
+    # A near-identical question answered against the same index build reuses that answer
+    cache_key = None
+    cached = None
+    if LLM_CLIENT.enabled and ANSWER_CACHE_ENABLED:
+        t0 = time.perf_counter()
+        q_emb = query_embedding(query)
+        if q_emb is not None:
+            version = RESIDENT_INDEX.get(use_faiss=FAISS_AVAILABLE).info.get("version") or "unversioned"
+            cache_key = (q_emb, answer_scope(filters, mode, top_k), version)
+            cached = ANSWER_CACHE.lookup(*cache_key)
+        timings["answer_cache"] = round((time.perf_counter() - t0) * 1000.0, 2)
+    if cached:
+        sources = cached["sources"]
+
+    # Streaming mode: sources go out at once as a server-sent event, then the LLM tokens
+    if payload.get("stream") or "text/event-stream" in request.headers.get("Accept", ""):
+        head = {"query": query, "sources": sources, "hits_count": len(sources), "mode": mode, "timings": timings}
+        if cached:
+            head["llm_status"] = "cached"
+            body = iter([sse_event("sources", head), sse_event("done", {"answer": cached["answer"]})])
+        else:
+            body = stream_with_context(_stream_ai_answer(query, head, cache_key))
+        return Response(body, mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    if cached:
+        return jsonify({"query": query, "answer": cached["answer"], "sources": sources, "hits_count": len(sources),
+                        "mode": mode, "timings": timings, "llm_status": "cached",
+                        "cache_similarity": round(cached["similarity"], 4)})
 
     # Keep the existing OpenRouter / LLM call as an optional augmentation if configured.
+    # It runs on the bounded LLM pool; when every slot is busy, the circuit breaker is open
+    # or the upstream fails, the answer is sources-only and `llm_status` says why.
     answer = None
-    OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-    if OPENROUTER_API_KEY:
+    llm_status = "disabled"
+    if LLM_CLIENT.enabled:
+        answer, llm_status = _llm_answer(query)
+        if llm_status == "ok" and answer and cache_key:
+            ANSWER_CACHE.store(*cache_key, answer, sources)
+
+    return jsonify({"query": query, "answer": answer or "", "sources": sources, "hits_count": len(sources),
+                    "mode": mode, "timings": timings, "llm_status": llm_status})
+
+
+def _llm_answer(query):
+    """(answer, status) from the LLM; the answer is empty unless status is "ok"."""
+    try:
+        return LLM_CLIENT.complete(query), "ok"
+    except LLMBusy:
+        return "", "busy"
+    except LLMUnavailable:
+        return "", "circuit_open"
+    except LLMTimeout:
+        return "", "timeout"
+    except Exception as e:
+        print(f"LLM answer failed: {e}")
+        return "", "error"
+
+
+def _stream_ai_answer(query, head, cache_key=None):
+    """SSE body for ai_search: `sources`, then `token` events, then `done` with the full answer.
+    A complete answer is stored in the answer cache under `cache_key`."""
+    yield sse_event("sources", head)
+    parts = []
+    complete = False
+    if LLM_CLIENT.enabled:
         try:
-            import requests
-            response = requests.post(
-                url="https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                    "Content-Type": "application/json",
-                    "HTTP-Referer": "http://127.0.0.1:5000",
-                    "X-Title": "Citizen Portal"
-                },
-                data=json.dumps({
-                    "model": os.getenv("OPENROUTER_MODEL", "deepseek/deepseek-prover-v2"),
-                    "messages": [
-                        {"role": "user", "content": query}
-                    ]
-                }),
-                timeout=15
-            )
-            if response.status_code == 200:
-                data = response.json()
-                answer = data.get("choices", [{}])[0].get("message", {}).get("content") or ""
-            else:
-                answer = f"Error: {response.status_code}"
+            for tok in LLM_CLIENT.stream(query):
+                parts.append(tok)
+                yield sse_event("token", {"text": tok})
+            complete = True
+        except LLMBusy:
+            yield sse_event("error", {"error": "llm_busy"})
+        except LLMUnavailable:
+            yield sse_event("error", {"error": "llm_circuit_open"})
+        except LLMTimeout:
+            yield sse_event("error", {"error": "llm_timeout"})
         except Exception as e:
-            answer = f"Error: {str(e)}"
+            print(f"LLM stream failed: {e}")
+            yield sse_event("error", {"error": "llm_error"})
+    answer = "".join(parts)
+    if complete and answer and cache_key:
+        ANSWER_CACHE.store(*cache_key, answer, head["sources"])
+    yield sse_event("done", {"answer": answer})
 
-    return jsonify({"query": query, "answer": answer or "", "sources": sources, "hits_count": len(sources)})
+
+@app.route('/api/admin/llm_status', methods=['GET'])
+@admin_required
+def admin_llm_status():
+    """OpenRouter client health: circuit breaker state, pool usage, retries, latency histogram and answer cache."""
+    return jsonify({"enabled": LLM_CLIENT.enabled, "url": LLM_CLIENT.url, "model": LLM_CLIENT.model,
+                    **LLM_CLIENT.stats(), "answer_cache": {"enabled": ANSWER_CACHE_ENABLED, **ANSWER_CACHE.stats()}})
 
 
 def load_vector_index_from_db():
@@ -1957,8 +2612,7 @@ def load_vector_index_from_db():
     if not meta:
         return {"found": False, "message": "no vector_meta found in DB"}
 
-    fs = GridFS(db)
-    loaded = {"found": True, "meta_count": meta.get('meta_count', 0)}
+    loaded = {"found": True, "meta_count": meta.get('meta_count', 0), "version": meta.get('index_version')}
 
     # Ensure data dir exists
     try:
@@ -1966,43 +2620,175 @@ def load_vector_index_from_db():
     except Exception:
         pass
 
-    # Load FAISS index if present
-    if meta.get('gridfs_id'):
-        try:
-            gfid = meta.get('gridfs_id')
-            blob = fs.get(gfid).read()
-            with open(INDEX_PATH, 'wb') as f:
-                f.write(blob)
-            loaded['faiss_index'] = True
-        except Exception as e:
-            loaded['faiss_index'] = False
-            loaded['faiss_error'] = str(e)
-
-    # Load embeddings numpy if present
-    if meta.get('embeddings_gridfs_id'):
-        try:
-            egfid = meta.get('embeddings_gridfs_id')
-            blob = fs.get(egfid).read()
-            # write to embeddings.npy
-            with open("data/embeddings.npy", 'wb') as f:
-                f.write(blob)
-            loaded['embeddings'] = True
-        except Exception as e:
-            loaded['embeddings'] = False
-            loaded['embeddings_error'] = str(e)
+    # Documents written before versioned artifacts only carry bare GridFS ids
+    artifacts = dict(meta.get('artifacts') or {})
+    if not artifacts:
+        if meta.get('gridfs_id'):
+            artifacts['faiss'] = {"file_id": meta['gridfs_id']}
+        if meta.get('embeddings_gridfs_id'):
+            artifacts['embeddings'] = {"file_id": meta['embeddings_gridfs_id']}
+
+    # Stream each artifact to disk chunk by chunk, verified against its checksum.
+    # A missing or failed artifact removes the local copy so it cannot be mixed with these rows.
+    # The memory-mapped files go under names of their own, never over the ones being served.
+    file_version = now_utc().strftime("%Y%m%dT%H%M%S%f")
+    store_path = versioned_path(EMBEDDINGS_PATH, file_version)
+    meta_path = versioned_path(META_PATH, file_version)
+    lexical_path = versioned_path(BM25_PATH, file_version)
+    bucket = GridFSBucket(db)
+    local = {}
+    targets = (("faiss", INDEX_PATH, "faiss_index"),
+               ("embeddings", store_path, "embeddings"),
+               ("embedding_scales", scales_path_for(store_path), "embedding_scales"))
+    for kind, path, key in targets:
+        ref = artifacts.get(kind)
+        if ref:
+            try:
+                local[kind] = get_to_file(bucket, ref['file_id'], path, sha256=ref.get('sha256'))
+                loaded[key] = True
+                continue
+            except Exception as e:
+                loaded[key] = False
+                loaded[f"{key}_error"] = str(e)
+        if path.exists():
+            try:
+                path.unlink()
+            except Exception:
+                pass
 
-    # Persist metadata JSON locally as well
+    # Persist metadata JSON locally as well, with its BM25 postings. Rows are read from
+    # vector_docs by version; documents written before the split still carry `docs`.
     try:
-        with open(META_PATH, 'w', encoding='utf-8') as f:
-            json.dump(meta.get('docs', []), f, ensure_ascii=False, indent=2)
+        if meta.get('index_version'):
+            docs = list(iter_vector_docs(meta['index_version']))
+        else:
+            docs = meta.get('docs', [])
+        save_meta_store(meta_path, docs, columns=FILTER_FIELDS)
+        if META_JSON_EXPORT:
+            export_meta_json(META_JSON_PATH, docs)
+        save_bm25_index(lexical_path, BM25Index.build(docs))
         loaded['meta_saved'] = True
     except Exception as e:
         loaded['meta_saved'] = False
         loaded['meta_error'] = str(e)
 
+    # Record which index family the downloaded files are, so they load with the right search params.
+    # The manifest is written last: it points the loader at the new files.
+    files = {}
+    if loaded.get('meta_saved'):
+        files["meta"] = meta_path.name
+        files["lexical"] = lexical_path.name
+    if 'embeddings' in local:
+        files["embeddings"] = store_path.name
+    try:
+        index_type = meta.get('index_type') or "flat"
+        if 'faiss' not in local:
+            index_type = "numpy"
+        save_index_manifest(MANIFEST_PATH, {
+            "version": meta.get('index_version'),
+            "index_type": index_type,
+            "params": meta.get('index_params') or {},
+            "count": meta.get('meta_count'),
+            "dim": meta.get('dim'),
+            "store_dtype": meta.get('store_dtype'),
+            "loaded_at": now_utc().isoformat(),
+            "artifacts": local,
+            "files": files,
+        })
+    except Exception as e:
+        loaded['manifest_error'] = str(e)
+
+    # Swap the downloaded files in as the resident index
+    try:
+        snap = RESIDENT_INDEX.reload(use_faiss=FAISS_AVAILABLE)
+        loaded['index_version'] = snap.version
+        prune_local_index_files(snap.info)
+    except Exception as e:
+        loaded['index_error'] = str(e)
+
     return loaded
 
 
+def local_index_matches(pointer):
+    """True when the local files are the build `pointer` refers to (same version and checksums)."""
+    if not pointer or not pointer.get('index_version'):
+        return False
+    manifest = load_index_manifest(MANIFEST_PATH)
+    meta_path = index_file(META_PATH, manifest, "meta")
+    if manifest.get('version') != pointer['index_version'] or meta_path is None or not meta_path.exists():
+        return False
+    store_path = index_file(EMBEDDINGS_PATH, manifest, "embeddings")
+    paths = {"faiss": INDEX_PATH, "embeddings": store_path,
+             "embedding_scales": scales_path_for(store_path) if store_path else None}
+    for kind, ref in (pointer.get('artifacts') or {}).items():
+        if kind not in paths or not ref.get('sha256'):
+            continue
+        path = paths[kind]
+        if path is None:
+            return False
+        if file_sha256(path) != ref['sha256']:
+            return False
+    return True
+
+
+def bootstrap_vector_index():
+    """Make this node serve the current index: download it from GridFS unless the local copy matches."""
+    try:
+        pointer = db['vector_meta'].find_one({"name": "current"}, {"docs": 0})
+    except Exception as e:
+        return {"state": "skipped", "reason": f"database unavailable: {e}"}
+    if not pointer:
+        return {"state": "skipped", "reason": "no vector_meta found in DB"}
+    if local_index_matches(pointer):
+        snap = RESIDENT_INDEX.reload(use_faiss=FAISS_AVAILABLE)
+        return {"state": "up_to_date", "version": pointer.get('index_version'), "index_version": snap.version}
+    res = load_vector_index_from_db()
+    return {"state": "downloaded", **res}
+
+
+INDEX_BOOTSTRAP_STATUS = {"state": "not_started"}
+_bootstrap_lock = threading.Lock()
+
+
+def _run_index_bootstrap():
+    started = now_utc()
+    try:
+        res = bootstrap_vector_index()
+        INDEX_BOOTSTRAP_STATUS.update(res)
+    except Exception as e:
+        INDEX_BOOTSTRAP_STATUS.update({"state": "error", "error": str(e)})
+    INDEX_BOOTSTRAP_STATUS.update({"started_at": started.isoformat(), "finished_at": now_utc().isoformat()})
+    print(f"Vector index bootstrap: {INDEX_BOOTSTRAP_STATUS.get('state')}")
+
+
+def start_index_bootstrap():
+    """Start the bootstrap in a background thread, once per process."""
+    if INDEX_BOOTSTRAP_STATUS.get("state") != "not_started" or not INDEX_BOOTSTRAP_ON_STARTUP:
+        return
+    with _bootstrap_lock:
+        if INDEX_BOOTSTRAP_STATUS.get("state") != "not_started":
+            return
+        INDEX_BOOTSTRAP_STATUS["state"] = "running"
+    t = threading.Thread(target=_run_index_bootstrap, name="index-bootstrap", daemon=True)
+    t.start()
+
+
+@app.before_request
+def _bootstrap_index_on_first_request():
+    # Each worker of a pre-fork server starts its own bootstrap and model warmup after forking
+    start_index_bootstrap()
+    start_model_preload()
+
+
+@app.route('/api/ready', methods=['GET'])
+def readiness():
+    """Readiness probe: 200 once the embedding model is loaded and warmed up in this worker."""
+    model = EMBEDDING_MODELS.status()
+    ready = model["ready"] or EMBED_MODEL_PRELOAD == "off"
+    return jsonify({"ready": ready, "embedding_model": model, "index": RESIDENT_INDEX.status(),
+                    "bootstrap": INDEX_BOOTSTRAP_STATUS}), (200 if ready else 503)
+
+
 @app.route('/api/admin/load_index_from_db', methods=['POST'])
 @admin_required
 def admin_load_index_from_db():
@@ -2011,18 +2797,74 @@ def admin_load_index_from_db():
     return jsonify(res)
 
 
+@app.route('/api/admin/index_versions', methods=['GET'])
+@admin_required
+def admin_index_versions():
+    """Retained index builds, newest first, with the one vector_meta currently points at."""
+    try:
+        current = (db['vector_meta'].find_one({"name": "current"}, {"index_version": 1}) or {}).get("index_version")
+        versions = []
+        for v in index_versions_col.find({}, {"_id": 0}).sort("created", -1):
+            if isinstance(v.get('created'), datetime):
+                v['created'] = v['created'].isoformat()
+            v['artifacts'] = {kind: {"sha256": ref.get("sha256"), "length": ref.get("length")}
+                              for kind, ref in (v.get('artifacts') or {}).items()}
+            v['current'] = v.get('index_version') == current
+            versions.append(v)
+        return jsonify({"current": current, "retention": INDEX_RETENTION_VERSIONS, "versions": versions})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/admin/index_versions/<version>/activate', methods=['POST'])
+@admin_required
+def admin_activate_index_version(version):
+    """Roll the current pointer forward or back to a retained build and load it here."""
+    try:
+        version_doc = index_versions_col.find_one({"index_version": version})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    if not version_doc:
+        return jsonify({'error': 'unknown_version', 'version': version}), 404
+    set_current_index_version(version_doc)
+    ANSWER_CACHE.invalidate(keep_version=version)
+    res = load_vector_index_from_db()
+    return jsonify(res)
+
+
 @app.route('/api/admin/vector_meta', methods=['GET'])
 @admin_required
 def admin_get_vector_meta():
+    """Summary of the current vector index; `?page=N&page_size=M` adds one page of metadata rows."""
     try:
-        m = db['vector_meta'].find_one({"name": "current"})
+        # Never ship the legacy embedded `docs` list
+        m = db['vector_meta'].find_one({"name": "current"}, {"docs": 0})
         if not m:
             return jsonify({'meta': None})
-        # serialize datetimes
+        # serialize datetimes and GridFS ids
         if 'updated' in m and isinstance(m['updated'], datetime):
             m['updated'] = m['updated'].isoformat()
-        m['_id'] = str(m.get('_id'))
-        return jsonify({'meta': m})
+        for key in ('_id', 'gridfs_id', 'embeddings_gridfs_id'):
+            if m.get(key) is not None:
+                m[key] = str(m[key])
+        # Artifact refs carry GridFS ObjectIds; show them as /api/admin/index_versions does
+        if 'artifacts' in m:
+            m['artifacts'] = {kind: {"sha256": ref.get("sha256"), "length": ref.get("length")}
+                              for kind, ref in (m.get('artifacts') or {}).items()}
+        out = {'meta': m}
+
+        if request.args.get('page') is not None and m.get('index_version'):
+            try:
+                page = max(1, int(request.args.get('page', 1)))
+                page_size = min(200, max(1, int(request.args.get('page_size', 50))))
+            except ValueError:
+                return jsonify({'error': 'page and page_size must be integers'}), 400
+            first = (page - 1) * page_size
+            rows = fetch_vector_docs(m['index_version'], range(first, first + page_size))
+            out['page'] = page
+            out['page_size'] = page_size
+            out['rows'] = [dict(r, row=first + i) for i, r in enumerate(rows) if r is not None]
+        return jsonify(out)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -2122,20 +2964,28 @@ def admin_services():
     POST: Creates/updates a Super Category document.
     """
     if request.method == "GET":
-        return jsonify(list(services_col.find({}, {"_id":0})))
+        return catalog_response(CATALOG.get())
     
     payload = request.json
     sid = payload.get("id")
     if not sid:
         return jsonify({"error":"id required"}), 400
     services_col.update_one({"id": sid}, {"$set": payload}, upsert=True)
+    CATALOG.bump()
     return jsonify({"status":"ok"})
 
+@app.route("/api/admin/catalog_status", methods=["GET"])
+@admin_required
+def admin_catalog_status():
+    """Version, size and reload counters of this worker's cached services catalog and autosuggest index."""
+    return jsonify({**CATALOG.status(), "autosuggest": AUTOSUGGEST.status()})
+
 @app.route("/api/admin/services/<service_id>", methods=["DELETE"])
 @admin_required
 def delete_service(service_id):
     """Deletes a specific Super Category document by its ID."""
     services_col.delete_one({"id": service_id})
+    CATALOG.bump()
     return jsonify({"status":"deleted"})
 
 
@@ -2522,6 +3372,10 @@ if __name__ == "__main__":
         print("Warning: MongoDB appears unreachable. Skipping initial admin user setup.")
     
     os.makedirs("data", exist_ok=True)
+    # Fetch the current vector index and load the embedding model in the background
+    # instead of waiting for the first request
+    start_index_bootstrap()
+    start_model_preload()
 
     # Optional: schedule periodic index rebuilds if APScheduler is available and ENABLE_INDEX_SCHEDULER is true
     ENABLE_SCHED = os.getenv("ENABLE_INDEX_SCHEDULER", "false").lower() in ("1","true","yes")
@@ -0,0 +1,404 @@
+"""In-memory prefix index behind /api/search/autosuggest.
+
+Every localized title (en / si / ta) of every ministry, subservice and
+question in the catalog is split into normalized tokens, and the tokens are kept in one
+sorted list next to the id of the entry they came from. A keystroke lookup
+bisects to the range of tokens that start with each query word, so a lookup
+never looks at names that cannot match. Results are ranked by how well the
+whole name matches, then by popularity: engagement counts per service, with
+a ministry scoring the sum of its subservices. Ministries come before
+subservices, and subservices before questions, at equal popularity. One- and two-character
+prefixes, which match most names, are ranked ahead of time.
+
+When the prefixes find fewer results than asked for, typos are tolerated:
+each query word of four or more characters is looked up in a character
+trigram index over the vocabulary of all titles (ministries, subservices and
+questions). Words sharing enough trigrams are verified with a bounded edit
+distance against the start of the word, so "pasport" finds "passport" and
+"licence" finds "license". The fuzzy step stops when the per-keystroke time
+budget runs out and returns what it has verified so far; such a cut-short
+answer is not memoized.
+
+The index belongs to one catalog snapshot. It is rebuilt when the catalog
+version changes, from the catalog reload listener so that lookups do not pay
+for it. Popularity counts are refreshed in the background every
+`popularity_seconds`. Answers to repeated prefixes are memoized until the
+next rebuild.
+"""
+import bisect
+import threading
+import time
+import unicodedata
+
+from catalog_cache import question_id
+from search_cache import LRUCache
+
+# Zero-width joiners inside Sinhala/Tamil conjuncts; users rarely type them
+_INVISIBLE = dict.fromkeys(map(ord, "\u200b\u200c\u200d\ufeff"))
+
+
+def normalize_text(text):
+    return unicodedata.normalize("NFKC", str(text or "")).translate(_INVISIBLE).casefold()
+
+
+def tokenize(text):
+    """Split on whitespace, punctuation and symbols. Combining vowel signs stay inside their word."""
+    tokens, current = [], []
+    for ch in normalize_text(text):
+        if unicodedata.category(ch)[0] in "ZPSC":
+            if current:
+                tokens.append("".join(current))
+                current = []
+        else:
+            current.append(ch)
+    if current:
+        tokens.append("".join(current))
+    return tokens
+
+
+def localized_names(name):
+    """(lang, text) pairs of a catalog name, which is either a {lang: text} dict or a plain string."""
+    if isinstance(name, dict):
+        return [(lang, text) for lang, text in name.items() if text]
+    return [("en", name)] if name else []
+
+
+def max_edits(word):
+    """Typos tolerated in a query word: none below 4 characters, 1 up to 7, then 2."""
+    if len(word) < 4:
+        return 0
+    return 1 if len(word) < 8 else 2
+
+
+def trigrams(word):
+    """Character trigrams of `word` with a start marker, so leading characters count too."""
+    padded = "^" + word
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def prefix_edit_distance(word, token, limit):
+    """Smallest edit distance between `word` and any prefix of `token`, or None if above `limit`."""
+    previous = list(range(len(token) + 1))
+    for i, ch in enumerate(word, 1):
+        current = [i]
+        for j, tch in enumerate(token, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ch != tch)))
+        if min(current) > limit:
+            return None
+        previous = current
+    best = min(previous)
+    return best if best <= limit else None
+
+
+# Single-word queries up to this many characters match most of the catalog;
+# their ranked results are computed once per build instead of per keystroke
+HOT_PREFIX_CHARS = 2
+HOT_RESULTS = 50
+
+
+class _Built:
+    """Token arrays and entries for one catalog snapshot.
+
+    Entries are stored best first (popularity, then ministries, then shorter
+    names), so a candidate's position is its rank among equally good matches.
+    """
+
+    def __init__(self, snapshot, entries, postings):
+        self.snapshot = snapshot
+        self.entries = entries
+        postings.sort()
+        self.tokens = [t for t, _, _ in postings]
+        self.refs = [(e, lang) for _, e, lang in postings]
+        names = sorted((n, e) for e, entry in enumerate(entries) for n in entry["normalized"])
+        self.name_keys = [n for n, _ in names]
+        self.name_refs = [e for _, e in names]
+        self.hot = self._hot_prefixes(postings)
+        # Fuzzy side: distinct tokens and the trigram postings over them
+        self.vocab = sorted(set(self.tokens))
+        self.gram_postings = {}
+        for v, token in enumerate(self.vocab):
+            for gram in trigrams(token):
+                self.gram_postings.setdefault(gram, []).append(v)
+        self.built_at = time.monotonic()
+
+    def rank(self, candidates, phrase, limit, accept=None):
+        """Best `limit` of {entry: lang} passing `accept`: whole-name prefix matches first, then by entry order."""
+        lo = bisect.bisect_left(self.name_keys, phrase)
+        hi = bisect.bisect_left(self.name_keys, phrase + "\U0010ffff", lo)
+        first = []
+        for e in sorted(set(self.name_refs[lo:hi])):
+            if e in candidates and (accept is None or accept(e)):
+                first.append(e)
+                if len(first) >= limit:
+                    break
+        seen = set(first)
+        rest = []
+        if len(first) < limit:
+            for e in sorted(candidates):
+                if e in seen or (accept is not None and not accept(e)):
+                    continue
+                rest.append(e)
+                if len(first) + len(rest) >= limit:
+                    break
+        return [(e, candidates[e]) for e in first + rest]
+
+    def prefix_range(self, prefix):
+        lo = bisect.bisect_left(self.tokens, prefix)
+        return lo, bisect.bisect_left(self.tokens, prefix + "\U0010ffff", lo)
+
+    def token_refs(self, token):
+        """(entry, lang) refs of one exact token."""
+        lo = bisect.bisect_left(self.tokens, token)
+        return self.refs[lo:bisect.bisect_right(self.tokens, token, lo)]
+
+    def fuzzy_tokens(self, word, limit, deadline):
+        """{token: edits} of vocabulary tokens starting within `limit` edits of `word`.
+
+        Returns (matches, complete); `complete` is False when `deadline` cut the verification short.
+        """
+        grams = trigrams(word)
+        shared = {}
+        for gram in grams:
+            for v in self.gram_postings.get(gram, ()):
+                shared[v] = shared.get(v, 0) + 1
+        # One edit breaks at most three trigrams
+        need = max(1, len(grams) - 3 * limit)
+        candidates = sorted((v for v, n in shared.items() if n >= need), key=lambda v: -shared[v])
+        matches = {}
+        for i, v in enumerate(candidates):
+            if i % 32 == 0 and time.perf_counter() > deadline:
+                return matches, False
+            edits = prefix_edit_distance(word, self.vocab[v], limit)
+            if edits is not None:
+                matches[self.vocab[v]] = edits
+        return matches, True
+
+    def _hot_prefixes(self, postings):
+        candidates = {}
+        for token, e, lang in postings:
+            for n in range(1, HOT_PREFIX_CHARS + 1):
+                candidates.setdefault(token[:n], {}).setdefault(e, lang)
+        return {p: self.rank(c, p, HOT_RESULTS) for p, c in candidates.items()}
+
+
+class AutosuggestIndex:
+    def __init__(self, popularity_fn=None, popularity_seconds=600.0, cache_size=2048, fuzzy=True, budget_ms=5.0):
+        """`popularity_fn()` returns {title: engagement count}; it is called on every rebuild.
+        `budget_ms` bounds the fuzzy step of one lookup."""
+        self.popularity_fn = popularity_fn
+        self.popularity_seconds = float(popularity_seconds)
+        self.fuzzy = fuzzy
+        self.budget_ms = float(budget_ms)
+        self.fuzzy_lookups = 0
+        self.budget_exhausted = 0
+        self.cache = LRUCache(max_size=cache_size)
+        self._built = None
+        self._lock = threading.Lock()
+        self._build_lock = threading.RLock()
+        self._refreshing = False
+        self.rebuilds = 0
+
+    def suggest(self, query, snapshot, limit=20):
+        """Up to `limit` catalog entries whose titles contain words starting with every query word,
+        topped up with typo-tolerant matches (marked `"fuzzy": true`)."""
+        built = self._current(snapshot)
+        # The budget covers this lookup only, not a build the call may have waited for
+        started = time.perf_counter()
+        words = tokenize(query)
+        if not words or not built.entries:
+            return []
+        key = (" ".join(words), limit)
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] is built:
+            return cached[1]
+
+        if len(words) == 1 and len(words[0]) <= HOT_PREFIX_CHARS and limit <= HOT_RESULTS:
+            top = built.hot.get(words[0], [])[:limit]
+        else:
+            # Candidates come from the narrowest word's token range; the other words are checked per entry
+            ranges = sorted(((built.prefix_range(w), w) for w in words), key=lambda r: r[0][1] - r[0][0])
+            (lo, hi), _ = ranges[0]
+            words = [w for _, w in ranges]
+            candidates = dict(built.refs[lo:hi])
+            accept = None
+            if len(words) > 1:
+                def accept(e):
+                    tokens = built.entries[e]["tokens"]
+                    return all(any(t.startswith(w) for t in tokens) for w in words[1:])
+            top = built.rank(candidates, normalize_text(query).strip(), limit, accept)
+        results = [dict(built.entries[e]["result"], matched_lang=lang) for e, lang in top]
+        complete = True
+        if len(results) < limit and self.fuzzy and any(max_edits(w) for w in words):
+            exclude = {e for e, _ in top}
+            deadline = started + self.budget_ms / 1000.0
+            fuzzy, complete = self._fuzzy(built, words, limit - len(results), exclude, deadline)
+            results += fuzzy
+        if complete:
+            # A lookup the budget cut short is retried next time instead of being served from the cache
+            self.cache.put(key, (built, results))
+        return results
+
+    def _fuzzy(self, built, words, limit, exclude, deadline):
+        """Entries matching every word, words of 4+ characters within their edit limit; fewest edits first.
+
+        Returns (results, complete); `complete` is False when the deadline cut the search short.
+        """
+        self.fuzzy_lookups += 1
+        found = None  # entry -> (edits, lang)
+        complete = True
+        ordered = sorted(words, key=len, reverse=True)
+        for i, w in enumerate(ordered):
+            per_entry = {}
+            if max_edits(w):
+                tokens, done = built.fuzzy_tokens(w, max_edits(w), deadline)
+                if not done:
+                    self.budget_exhausted += 1
+                    complete = False
+                refs = [(ref, edits) for token, edits in tokens.items() for ref in built.token_refs(token)]
+            else:
+                lo, hi = built.prefix_range(w)
+                refs = [(ref, 0) for ref in built.refs[lo:hi]]
+            for (e, lang), edits in refs:
+                if found is not None and e not in found:
+                    continue
+                if e not in per_entry or edits < per_entry[e][0]:
+                    per_entry[e] = (edits, lang)
+            if found is None:
+                found = per_entry
+            else:
+                found = {e: (found[e][0] + edits, found[e][1]) for e, (edits, _) in per_entry.items()}
+            if not found:
+                break
+            if i + 1 < len(ordered) and time.perf_counter() > deadline:
+                complete = False
+                break
+        ranked = sorted((edits, e, lang) for e, (edits, lang) in (found or {}).items() if e not in exclude)
+        results = [dict(built.entries[e]["result"], matched_lang=lang, fuzzy=True) for _, e, lang in ranked[:limit]]
+        return results, complete
+
+    def rebuild(self, snapshot):
+        """Build the index for `snapshot` and make it current; usable as a catalog reload listener."""
+        with self._build_lock:
+            built = self._build(snapshot)
+            with self._lock:
+                self._built = built
+                self.rebuilds += 1
+            self.cache.clear()
+        return built
+
+    def status(self):
+        built = self._built
+        out = {"built": built is not None, "rebuilds": self.rebuilds, "cache": self.cache.stats(),
+               "fuzzy": self.fuzzy, "budget_ms": self.budget_ms, "fuzzy_lookups": self.fuzzy_lookups,
+               "budget_exhausted": self.budget_exhausted}
+        if built is not None:
+            out.update({"catalog_version": built.snapshot.version, "entries": len(built.entries),
+                        "tokens": len(built.tokens), "vocabulary": len(built.vocab),
+                        "trigrams": len(built.gram_postings),
+                        "age_seconds": round(time.monotonic() - built.built_at, 1)})
+        return out
+
+    def _current(self, snapshot):
+        built = self._built
+        if built is None or built.snapshot is not snapshot:
+            # One thread builds for a new catalog version; the others wait for its result
+            with self._build_lock:
+                built = self._built
+                if built is None or built.snapshot is not snapshot:
+                    built = self.rebuild(snapshot)
+        elif self.popularity_fn and time.monotonic() - built.built_at > self.popularity_seconds:
+            self._refresh_in_background(snapshot)
+        return built
+
+    def _refresh_in_background(self, snapshot):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.rebuild(snapshot)
+            except Exception as e:
+                print(f"Warning: autosuggest popularity refresh failed: {e}")
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, name="autosuggest-refresh", daemon=True).start()
+
+    def _build(self, snapshot):
+        counts = {}
+        if self.popularity_fn is not None:
+            try:
+                counts = self.popularity_fn() or {}
+            except Exception as e:
+                print(f"Warning: could not load autosuggest popularity: {e}")
+        by_name = {}
+        for name, n in counts.items():
+            if name:
+                key = normalize_text(name)
+                by_name[key] = by_name.get(key, 0) + n
+        counts = by_name
+
+        def popularity(name):
+            return sum(counts.get(normalize_text(text), 0) for _, text in localized_names(name))
+
+        entries = []
+        for sc in snapshot.docs:
+            for ministry in sc.get("ministries") or []:
+                ministry_entry = self._entry(ministry.get("name"), "ministry", popularity(ministry.get("name")), {
+                    "id": ministry.get("id"),
+                    "name": ministry.get("name"),
+                    "super_category_id": sc.get("id"),
+                    "super_category_name": sc.get("name"),
+                    "type": "ministry",
+                })
+                entries.append(ministry_entry)
+                for sub in ministry.get("subservices") or []:
+                    sub_entry = self._entry(sub.get("name"), "subservice", popularity(sub.get("name")), {
+                        "id": sub.get("id"),
+                        "name": sub.get("name"),
+                        "super_category_id": sc.get("id"),
+                        "super_category_name": sc.get("name"),
+                        "ministry_id": ministry.get("id"),
+                        "ministry_name": ministry.get("name"),
+                        "subservice_id": sub.get("id"),
+                        "type": "subservice",
+                    })
+                    entries.append(sub_entry)
+                    ministry_entry["popularity"] += sub_entry["popularity"]
+                    for i, question in enumerate(sub.get("questions") or []):
+                        entries.append(self._entry(question.get("q"), "question", popularity(question.get("q")), {
+                            "id": question.get("id") or question_id(sub.get("id"), i),
+                            "name": question.get("q"),
+                            "question": {"q": question.get("q")},
+                            "super_category_id": sc.get("id"),
+                            "super_category_name": sc.get("name"),
+                            "ministry_id": ministry.get("id"),
+                            "ministry_name": ministry.get("name"),
+                            "subservice_id": sub.get("id"),
+                            "subservice_name": sub.get("name"),
+                            "type": "question",
+                        }))
+
+        type_order = {"ministry": 0, "subservice": 1, "question": 2}
+        entries.sort(key=lambda entry: (-entry["popularity"], type_order[entry["type"]], entry["length"]))
+        postings = []
+        for e, entry in enumerate(entries):
+            for lang, token in entry.pop("lang_tokens"):
+                postings.append((token, e, lang))
+        return _Built(snapshot, entries, postings)
+
+    @staticmethod
+    def _entry(name, node_type, popularity, result):
+        names = localized_names(name)
+        lang_tokens = {(lang, t) for lang, text in names for t in tokenize(text)}
+        return {
+            "type": node_type,
+            "result": result,
+            "popularity": popularity,
+            "normalized": [normalize_text(text) for _, text in names],
+            "tokens": {t for _, t in lang_tokens},
+            "length": min((len(text) for _, text in names), default=0),
+            "lang_tokens": sorted(lang_tokens),
+        }
@@ -0,0 +1,264 @@
+"""In-process cache of the services catalog.
+
+The catalog (super category -> ministry -> subservice -> questions) is read
+on the portal's busiest pages but changes only when an admin edits it. Each
+process keeps the decoded tree, plus the JSON bytes the public endpoints
+send, as one immutable `CatalogSnapshot`.
+
+Coherence across workers comes from a version counter in a small Mongo
+collection. Every catalog write bumps it (`bump_version()`), and `get()`
+re-reads that one document at most every `check_seconds`. The tree is fetched
+again only when the counter moved, or after `max_age_seconds` as a safety
+net for writes that bypassed the admin API. While one thread reloads, other
+requests keep serving the previous snapshot.
+
+Every snapshot also carries a flattened id -> node index (`nodes`) over super
+categories, ministries, subservices and questions, with parent pointers, so a
+single node and its breadcrumb path are found without walking the tree.
+
+`level()` serves the tree one level at a time: the direct children of a node,
+without their own subtrees, optionally projected to some fields and reduced to
+one language. Its JSON bytes are memoized per snapshot, so they are dropped
+together with the snapshot when the catalog changes.
+"""
+import hashlib
+import json
+import threading
+import time
+
+from search_cache import LRUCache
+
+
+def bump_version(versions_col, name="services"):
+    """Increment the shared catalog version after a write. Returns the new version."""
+    doc = versions_col.find_one_and_update({"name": name}, {"$inc": {"version": 1}}, upsert=True,
+                                           projection={"_id": 0, "version": 1}, return_document=True)
+    return (doc or {}).get("version", 0)
+
+
+def serialize_catalog(docs):
+    """JSON bytes identical to what Flask's jsonify produces for `docs`."""
+    body = json.dumps(docs, ensure_ascii=True, sort_keys=True, separators=(",", ":"), default=str)
+    return body.encode("utf-8") + b"\n"
+
+
+# Tree levels, top down, and the key holding each level's children
+NODE_TYPES = ("super_category", "ministry", "subservice", "question")
+CHILD_KEYS = {"super_category": "ministries", "ministry": "subservices", "subservice": "questions"}
+
+
+# Languages of the {lang: text} dicts used for names, questions and answers
+LANGS = ("en", "si", "ta")
+
+
+def localize(value, lang):
+    """Reduce every {lang: text} dict in `value` to `lang`, falling back to English when it is missing."""
+    if isinstance(value, dict):
+        if value and set(value) <= set(LANGS):
+            if value.get(lang):
+                return {lang: value[lang]}
+            return {"en": value["en"]} if "en" in value else {}
+        return {k: localize(v, lang) for k, v in value.items()}
+    if isinstance(value, list):
+        return [localize(v, lang) for v in value]
+    return value
+
+
+def level_item(node, node_type, fields=None, lang=None):
+    """One node of a level: its own fields, with its children replaced by `child_count`."""
+    child_key = CHILD_KEYS.get(node_type)
+    item = {k: v for k, v in node.items() if k != child_key}
+    if child_key:
+        item["child_count"] = len(node.get(child_key) or [])
+    if fields:
+        item = {k: v for k, v in item.items() if k == "id" or k in fields}
+    return localize(item, lang) if lang else item
+
+
+def question_id(subservice_id, position):
+    """Questions carry no id of their own; they are addressed by subservice and position."""
+    return f"{subservice_id}:q{position}"
+
+
+def build_node_index(docs):
+    """Flatten the tree into {id: {"id", "type", "parent_id", "node"}}.
+
+    `node` is the document itself, not a copy. When two nodes share an id the
+    one met first (top down, in document order) wins.
+    """
+    nodes = {}
+
+    def add(node, node_type, node_id, parent_id):
+        if node_id is None or node_id in nodes:
+            return
+        nodes[node_id] = {"id": node_id, "type": node_type, "parent_id": parent_id, "node": node}
+
+    for sc in docs:
+        add(sc, "super_category", sc.get("id"), None)
+        for ministry in sc.get("ministries") or []:
+            add(ministry, "ministry", ministry.get("id"), sc.get("id"))
+            for sub in ministry.get("subservices") or []:
+                add(sub, "subservice", sub.get("id"), ministry.get("id"))
+                for i, question in enumerate(sub.get("questions") or []):
+                    qid = question.get("id") or (question_id(sub["id"], i) if sub.get("id") else None)
+                    add(question, "question", qid, sub.get("id"))
+    return nodes
+
+
+class CatalogSnapshot:
+    """Immutable view of one catalog version. `docs` must not be mutated by readers."""
+
+    def __init__(self, version, docs):
+        self.version = version
+        self.docs = docs
+        self.body = serialize_catalog(docs)
+        self.etag = hashlib.sha1(self.body).hexdigest()[:20]
+        self.nodes = build_node_index(docs)
+        self.loaded_at = time.monotonic()
+        self._levels = LRUCache(max_size=512)
+
+    def __len__(self):
+        return len(self.docs)
+
+    def node(self, node_id, node_type=None):
+        """Index entry for `node_id` (optionally only of `node_type`), or None."""
+        entry = self.nodes.get(node_id)
+        if entry is None or (node_type and entry["type"] != node_type):
+            return None
+        return entry
+
+    def ancestors(self, node_id):
+        """Index entries from the super category down to the parent of `node_id`."""
+        path = []
+        entry = self.nodes.get(node_id)
+        while entry is not None and entry["parent_id"] is not None:
+            entry = self.nodes.get(entry["parent_id"])
+            if entry is not None:
+                path.append(entry)
+        return path[::-1]
+
+    def of_type(self, node_type):
+        return [e for e in self.nodes.values() if e["type"] == node_type]
+
+    def level(self, node_id=None, fields=None, lang=None):
+        """(JSON bytes, etag) for the children of `node_id`, the super categories when None.
+
+        `fields` is a tuple of item keys to keep ("id" is always kept), `lang` one of
+        LANGS. Returns None when `node_id` is unknown or has no child level.
+        """
+        key = (node_id, fields, lang)
+        cached = self._levels.get(key)
+        if cached is not None:
+            return cached
+        if node_id is None:
+            child_type, children = NODE_TYPES[0], self.docs
+        else:
+            entry = self.nodes.get(node_id)
+            if entry is None or entry["type"] not in CHILD_KEYS:
+                return None
+            child_type = NODE_TYPES[NODE_TYPES.index(entry["type"]) + 1]
+            children = entry["node"].get(CHILD_KEYS[entry["type"]]) or []
+        items = []
+        for i, child in enumerate(children):
+            if child_type == "question" and not child.get("id"):
+                child = dict(child, id=question_id(node_id, i))
+            items.append(level_item(child, child_type, fields, lang))
+        body = serialize_catalog({"parent_id": node_id, "type": child_type, "items": items,
+                                  "catalog_version": self.version})
+        out = (body, hashlib.sha1(body).hexdigest()[:20])
+        self._levels.put(key, out)
+        return out
+
+
+class CatalogCache:
+    def __init__(self, collection, versions_col, name="services", check_seconds=1.0, max_age_seconds=300.0):
+        self.collection = collection
+        self.versions_col = versions_col
+        self.name = name
+        self.check_seconds = float(check_seconds)
+        self.max_age_seconds = float(max_age_seconds)
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._stale = False
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.reloads = 0
+        self.version_checks = 0
+
+    def add_listener(self, fn):
+        """Call `fn(snapshot)` after every reload (derived indexes are rebuilt there)."""
+        self._listeners.append(fn)
+
+    def get(self):
+        """Return the current snapshot, reloading it first if the shared version moved."""
+        snap = self._snapshot
+        if snap is not None and not self._stale and time.monotonic() - self._checked_at < self.check_seconds:
+            return snap
+        # Only one thread refreshes; the others keep serving the snapshot they have
+        if not self._lock.acquire(blocking=snap is None):
+            return snap
+        try:
+            return self._refresh_locked()
+        finally:
+            self._lock.release()
+
+    def bump(self):
+        """Record a catalog write: bump the shared version and reload here on the next read."""
+        self._stale = True
+        try:
+            return bump_version(self.versions_col, self.name)
+        except Exception as e:
+            print(f"Warning: could not bump catalog version: {e}")
+            return None
+
+    def status(self):
+        snap = self._snapshot
+        out = {"loaded": snap is not None, "check_seconds": self.check_seconds,
+               "max_age_seconds": self.max_age_seconds, "reloads": self.reloads,
+               "version_checks": self.version_checks}
+        if snap is not None:
+            out.update({"version": snap.version, "documents": len(snap), "nodes": len(snap.nodes),
+                        "bytes": len(snap.body), "etag": snap.etag,
+                        "age_seconds": round(time.monotonic() - snap.loaded_at, 1)})
+        return out
+
+    def _refresh_locked(self):
+        snap = self._snapshot
+        if snap is not None and not self._stale and time.monotonic() - self._checked_at < self.check_seconds:
+            return snap
+        stale = self._stale
+        self._stale = False
+        try:
+            # The version is read before the tree: a write in between only triggers one more reload
+            doc = self.versions_col.find_one({"name": self.name}, {"_id": 0, "version": 1})
+            version = (doc or {}).get("version", 0)
+            self.version_checks += 1
+        except Exception as e:
+            if snap is not None:
+                print(f"Warning: could not check catalog version, serving cached catalog: {e}")
+                self._checked_at = time.monotonic()
+                self._stale = stale
+                return snap
+            version = None
+        self._checked_at = time.monotonic()
+        if (snap is not None and not stale and version == snap.version
+                and time.monotonic() - snap.loaded_at < self.max_age_seconds):
+            return snap
+
+        try:
+            docs = list(self.collection.find({}, {"_id": 0}))
+        except Exception as e:
+            if snap is None:
+                raise
+            print(f"Warning: could not reload catalog, serving cached catalog: {e}")
+            self._stale = stale
+            return snap
+        snap = CatalogSnapshot(version, docs)
+        self._snapshot = snap
+        self.reloads += 1
+        for fn in list(self._listeners):
+            try:
+                fn(snap)
+            except Exception as e:
+                print(f"Warning: catalog reload listener failed: {e}")
+        return snap
@@ -0,0 +1,262 @@
+"""Micro-batching front-end for the sentence embedding model.
+
+Concurrent search requests each want a single query embedding. Running one
+forward pass per request wastes most of the CPU on per-call overhead, so this
+encoder queues incoming texts and flushes them as one ``model.encode(batch)``
+call once the batch is full or ``max_wait_ms`` has passed since the first
+queued text. Every caller gets its own row back.
+
+`ModelRegistry` owns the model itself: it is loaded exactly once per
+process (concurrent first callers wait for the same load), can be preloaded
+in a background thread or before a pre-fork server forks, and is warmed up
+with one throwaway encode so the first real query does not pay for lazy
+initialisation.
+
+Index builds use `encode_in_chunks()` instead: the corpus is split into
+fixed-size chunks, encoded on a small worker pool and each chunk is written to
+the output array (usually a memory-mapped file) as soon as it finishes.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+
+class MicroBatchEncoder:
+    def __init__(self, model_getter, max_batch_size=32, max_wait_ms=5.0):
+        """`model_getter` is called on each flush and must return an object with `.encode()`."""
+        self.model_getter = model_getter
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_ms = max(0.0, float(max_wait_ms))
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._texts = 0
+        self._max_batch = 0
+        self._encode_ms_total = 0.0
+        self._size_histogram = {}
+
+    def encode(self, texts, timeout=30):
+        """Encode a list of texts and return an (n, dim) array, one row per text."""
+        if isinstance(texts, str):
+            texts = [texts]
+        futures = []
+        for text in texts:
+            fut = Future()
+            self._queue.put((text, fut))
+            futures.append(fut)
+        self._ensure_worker()
+        rows = [fut.result(timeout=timeout) for fut in futures]
+        return np.vstack(rows) if rows else np.zeros((0, 0), dtype=np.float32)
+
+    def stats(self):
+        with self._stats_lock:
+            avg = (self._texts / self._batches) if self._batches else 0.0
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "batches": self._batches,
+                "texts": self._texts,
+                "avg_batch_size": round(avg, 2),
+                "max_observed_batch": self._max_batch,
+                "avg_encode_ms": round(self._encode_ms_total / self._batches, 2) if self._batches else 0.0,
+                "batch_size_histogram": dict(sorted(self._size_histogram.items())),
+                "queued": self._queue.qsize(),
+            }
+
+    def _ensure_worker(self):
+        # Started lazily so a pre-fork server does not fork with a live thread.
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        wait_s = self.max_wait_ms / 1000.0
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + wait_s
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining <= 0:
+                        # Window closed: still take whatever is already queued.
+                        batch.append(self._queue.get_nowait())
+                    else:
+                        batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def _flush(self, batch):
+        texts = [text for text, _ in batch]
+        started = time.perf_counter()
+        try:
+            model = self.model_getter()
+            embeddings = model.encode(texts, convert_to_numpy=True)
+        except Exception as e:
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        for i, (_, fut) in enumerate(batch):
+            fut.set_result(embeddings[i])
+
+        size = len(batch)
+        with self._stats_lock:
+            self._batches += 1
+            self._texts += size
+            self._max_batch = max(self._max_batch, size)
+            self._encode_ms_total += elapsed_ms
+            self._size_histogram[size] = self._size_histogram.get(size, 0) + 1
+
+
+class ModelRegistry:
+    """Thread-safe, load-once holder for the embedding model.
+
+    `loader()` builds the model. `get()` returns it, loading it on first use
+    (other callers block until that load finishes instead of loading a second
+    copy). `preload()` does the load and a warmup encode ahead of time.
+    """
+
+    def __init__(self, loader, warmup_texts=("warmup",)):
+        self.loader = loader
+        self.warmup_texts = list(warmup_texts)
+        self._model = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._state = "not_loaded"
+        self._error = None
+        self._load_ms = None
+        self._loaded_pid = None
+        self._warmup_ms = None
+        self._warmed_pid = None
+
+    @property
+    def ready(self):
+        """Loaded and warmed up in this process."""
+        return self._model is not None and self._warmed_pid == os.getpid()
+
+    def get(self):
+        if self._model is not None:
+            return self._model
+        with self._lock:
+            if self._model is None:
+                self._load_locked()
+        return self._model
+
+    def load(self, warmup=True):
+        """Load (and optionally warm up) in the calling thread. Returns the model."""
+        model = self.get()
+        if warmup:
+            self.warmup()
+        return model
+
+    def preload(self):
+        """Load and warm up in a background thread; returns at once. Safe to call repeatedly."""
+        # A failed load is not retried in the background; get() still tries again on demand
+        if self.ready or self._state == "error" or (self._thread is not None and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._preload, name="embedding-preload", daemon=True)
+            self._thread.start()
+
+    def warmup(self):
+        """Run one throwaway encode in this process (thread pools, lazy kernels, allocator)."""
+        if self._warmed_pid == os.getpid():
+            return
+        model = self.get()
+        started = time.perf_counter()
+        model.encode(self.warmup_texts, convert_to_numpy=True, show_progress_bar=False)
+        self._warmup_ms = round((time.perf_counter() - started) * 1000.0, 1)
+        self._warmed_pid = os.getpid()
+
+    def status(self):
+        state = self._state
+        if self._model is not None:
+            state = "ready" if self.ready else "loaded"
+        out = {
+            "state": state,
+            "ready": self.ready,
+            "load_ms": self._load_ms,
+            "warmup_ms": self._warmup_ms if self._warmed_pid == os.getpid() else None,
+            "pid": os.getpid(),
+        }
+        if self._model is not None:
+            # Loaded by the parent of a pre-fork server: the weights are shared copy-on-write
+            out["loaded_before_fork"] = self._loaded_pid != os.getpid()
+        if self._error:
+            out["error"] = self._error
+        return out
+
+    def _load_locked(self):
+        self._state = "loading"
+        started = time.perf_counter()
+        try:
+            model = self.loader()
+        except Exception as e:
+            self._state = "error"
+            self._error = str(e)
+            raise
+        self._load_ms = round((time.perf_counter() - started) * 1000.0, 1)
+        self._loaded_pid = os.getpid()
+        self._error = None
+        self._state = "loaded"
+        self._model = model
+
+    def _preload(self):
+        try:
+            self.load(warmup=True)
+        except Exception as e:
+            print(f"Embedding model preload failed: {e}")
+
+
+def encode_in_chunks(model, texts, out, out_rows=None, chunk_size=256, workers=1, progress=None):
+    """Encode `texts` chunk by chunk into `out`.
+
+    Row i of the result is written to ``out[out_rows[i]]`` (or ``out[i]``).
+    `progress`, if given, is called from the calling thread after every chunk
+    with counts, docs/sec and an ETA. Returns the final progress dict.
+    """
+    total = len(texts)
+    chunk_size = max(1, int(chunk_size))
+    spans = [(start, min(start + chunk_size, total)) for start in range(0, total, chunk_size)]
+    started = time.perf_counter()
+
+    def run(span):
+        start, stop = span
+        emb = model.encode(texts[start:stop], convert_to_numpy=True, show_progress_bar=False)
+        rows = out_rows[start:stop] if out_rows is not None else slice(start, stop)
+        out[rows] = emb
+        return stop - start
+
+    state = {"done": 0, "total": total, "chunks_done": 0, "chunks_total": len(spans),
+             "docs_per_sec": 0.0, "eta_seconds": None, "elapsed_seconds": 0.0}
+    with ThreadPoolExecutor(max_workers=max(1, int(workers))) as pool:
+        futures = [pool.submit(run, span) for span in spans]
+        for fut in as_completed(futures):
+            state["done"] += fut.result()
+            state["chunks_done"] += 1
+            elapsed = time.perf_counter() - started
+            rate = state["done"] / elapsed if elapsed > 0 else 0.0
+            state["elapsed_seconds"] = round(elapsed, 2)
+            state["docs_per_sec"] = round(rate, 2)
+            state["eta_seconds"] = round((total - state["done"]) / rate, 1) if rate > 0 else None
+            if progress is not None:
+                try:
+                    progress(dict(state))
+                except Exception as e:
+                    print(f"Warning: progress callback failed: {e}")
+    return state
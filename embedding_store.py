@@ -0,0 +1,150 @@
+"""On-disk embedding store for the NumPy (no FAISS) search path.
+
+The matrix is written as a plain ``.npy`` file so it can be opened with
+``mmap_mode='r'``: loading costs no copy and the pages are shared between
+forked workers through the OS page cache. Vectors may optionally be stored as
+float16, or as int8 with one float32 scale per row kept in a sidecar
+``<name>_scales.npy`` file. Similarity is computed directly on the mapped
+buffer, a block of rows at a time, so even quantized stores never materialise
+a full float32 copy.
+"""
+import os
+import pathlib
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+STORE_DTYPES = ("float32", "float16", "int8")
+
+# Rows converted to float32 per block when scoring float16/int8 stores.
+SCORE_BLOCK_ROWS = 8192
+
+
+def scales_path_for(path):
+    path = pathlib.Path(path)
+    return path.with_name(f"{path.stem}_scales.npy")
+
+
+def quantize_int8(embeddings):
+    """Symmetric per-row int8 quantization. Returns (int8 matrix, float32 row scales)."""
+    emb = np.asarray(embeddings, dtype=np.float32)
+    scales = np.abs(emb).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    q = np.clip(np.rint(emb / scales[:, None]), -127, 127).astype(np.int8)
+    return q, scales.astype(np.float32)
+
+
+class EmbeddingStore:
+    """Read-only embedding matrix, possibly memory-mapped and/or quantized."""
+
+    def __init__(self, matrix, scales=None, path=None):
+        self.matrix = matrix
+        self.scales = scales
+        self.path = path
+
+    @classmethod
+    def from_array(cls, embeddings):
+        return cls(np.asarray(embeddings, dtype=np.float32))
+
+    @property
+    def dtype(self):
+        return str(self.matrix.dtype)
+
+    @property
+    def shape(self):
+        return self.matrix.shape
+
+    @property
+    def nbytes(self):
+        total = int(self.matrix.nbytes)
+        if self.scales is not None:
+            total += int(self.scales.nbytes)
+        return total
+
+    @property
+    def memory_mapped(self):
+        return isinstance(self.matrix, np.memmap)
+
+    def __len__(self):
+        return int(self.matrix.shape[0])
+
+    def dot(self, q, rows=None):
+        """Return float32 similarities of every stored row against `q`.
+
+        `q` may be a single vector (dim,) or a matrix of queries (dim, n).
+        If `rows` is given only those rows are gathered and scored.
+        """
+        if rows is not None:
+            scales = self.scales[rows] if self.scales is not None else None
+            return EmbeddingStore(self.matrix[rows], scales=scales).dot(q)
+        q = np.asarray(q, dtype=np.float32)
+        if self.matrix.dtype == np.float32 and self.scales is None:
+            return self.matrix @ q
+        out = np.empty((len(self),) + q.shape[1:], dtype=np.float32)
+        for start in range(0, len(self), SCORE_BLOCK_ROWS):
+            stop = min(start + SCORE_BLOCK_ROWS, len(self))
+            block = self.matrix[start:stop].astype(np.float32) @ q
+            if self.scales is not None:
+                block *= self.scales[start:stop].reshape((-1,) + (1,) * (q.ndim - 1))
+            out[start:stop] = block
+        return out
+
+    def to_float32(self):
+        """Dequantized float32 copy (for benchmarks and debugging; search uses `dot`)."""
+        emb = np.asarray(self.matrix, dtype=np.float32)
+        if self.scales is not None:
+            emb = emb * self.scales[:, None]
+        return emb
+
+    def status(self):
+        return {
+            "dtype": self.dtype,
+            "rows": len(self),
+            "dim": int(self.matrix.shape[1]) if self.matrix.ndim == 2 else 0,
+            "bytes": self.nbytes,
+            "memory_mapped": self.memory_mapped,
+        }
+
+
+def _atomic_save(path, array):
+    # Write next to the target and rename over it: workers that still map the old
+    # file keep a valid inode instead of seeing it truncated underneath them.
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+def save_embedding_store(path, embeddings, dtype="float32"):
+    """Write `embeddings` to `path` in the requested dtype (float32, float16 or int8)."""
+    if dtype not in STORE_DTYPES:
+        raise ValueError(f"unsupported embedding store dtype: {dtype}")
+    path = pathlib.Path(path)
+    emb = np.asarray(embeddings, dtype=np.float32)
+    scales_path = scales_path_for(path)
+    if dtype == "int8":
+        q, scales = quantize_int8(emb)
+        _atomic_save(scales_path, scales)
+        _atomic_save(path, q)
+    else:
+        _atomic_save(path, emb.astype(dtype, copy=False))
+        if scales_path.exists():
+            scales_path.unlink()
+    return path
+
+
+def load_embedding_store(path, mmap=True):
+    """Open the store at `path`. Returns None if the file does not exist."""
+    path = pathlib.Path(path)
+    if not path.exists():
+        return None
+    matrix = np.load(path, mmap_mode="r" if mmap else None)
+    scales = None
+    if matrix.dtype == np.int8:
+        scales_path = scales_path_for(path)
+        if not scales_path.exists():
+            raise ValueError(f"int8 embedding store {path} is missing its scales file {scales_path}")
+        scales = np.load(scales_path)
+    return EmbeddingStore(matrix, scales=scales, path=path)
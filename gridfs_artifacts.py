@@ -0,0 +1,120 @@
+"""Chunked, checksummed GridFS transfer of vector index artifacts.
+
+Index files are written to GridFS through an upload stream: the producer
+(``faiss.write_index`` through a callback writer, ``np.save``, or a local file
+read in blocks) writes straight into GridFS chunks while a SHA-256 of the
+bytes is computed on the way. Downloads go the other way, one chunk at a
+time, into a temporary file that is verified against the recorded checksum
+and only then renamed over the local copy. No artifact is ever held in memory
+as a whole.
+"""
+import hashlib
+import os
+import pathlib
+
+# GridFS chunk size, and the block size used when copying files in and out
+ARTIFACT_CHUNK_BYTES = 1024 * 1024
+
+
+class _HashingWriter:
+    """File-like wrapper that hashes and counts everything written through it."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.length = 0
+        self._sha = hashlib.sha256()
+
+    def write(self, data):
+        if not isinstance(data, (bytes, bytearray)):
+            data = bytes(data)
+        self._sha.update(data)
+        self.stream.write(data)
+        self.length += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    @property
+    def sha256(self):
+        return self._sha.hexdigest()
+
+
+def put_stream(bucket, filename, write_fn, metadata=None):
+    """Upload whatever `write_fn(writer)` writes as one GridFS file.
+
+    Returns a reference dict {file_id, filename, sha256, length} to store next
+    to the index version. A failing producer aborts the upload, leaving no
+    partial file behind.
+    """
+    stream = bucket.open_upload_stream(filename, chunk_size_bytes=ARTIFACT_CHUNK_BYTES, metadata=metadata or {})
+    writer = _HashingWriter(stream)
+    try:
+        write_fn(writer)
+    except Exception:
+        stream.abort()
+        raise
+    stream.close()
+    return {"file_id": stream._id, "filename": filename, "sha256": writer.sha256, "length": writer.length}
+
+
+def put_file(bucket, path, filename=None, metadata=None):
+    """Upload a local file block by block."""
+    path = pathlib.Path(path)
+
+    def copy(writer):
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(ARTIFACT_CHUNK_BYTES), b""):
+                writer.write(block)
+
+    return put_stream(bucket, filename or path.name, copy, metadata=metadata)
+
+
+def get_to_file(bucket, file_id, path, sha256=None):
+    """Download a GridFS file into `path`, verifying `sha256` when given.
+
+    The bytes land in a temporary file that replaces `path` only after the
+    checksum matched, so readers (and memory maps) of the old file are never
+    exposed to a partial or corrupt download. Raises ValueError on mismatch.
+    """
+    path = pathlib.Path(path)
+    tmp = path.with_name(path.name + ".download")
+    digest = hashlib.sha256()
+    length = 0
+    try:
+        with bucket.open_download_stream(file_id) as src, open(tmp, "wb") as dst:
+            for block in iter(lambda: src.read(ARTIFACT_CHUNK_BYTES), b""):
+                digest.update(block)
+                dst.write(block)
+                length += len(block)
+        if sha256 and digest.hexdigest() != sha256:
+            raise ValueError(f"checksum mismatch for {path.name}: expected {sha256}, got {digest.hexdigest()}")
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return {"sha256": digest.hexdigest(), "length": length}
+
+
+def file_sha256(path):
+    """SHA-256 of a local file (None if it does not exist), read block by block."""
+    path = pathlib.Path(path)
+    if not path.exists():
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(ARTIFACT_CHUNK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def delete_files(bucket, file_ids):
+    """Delete GridFS files, ignoring ones that are already gone. Returns how many were removed."""
+    removed = 0
+    for file_id in file_ids:
+        try:
+            bucket.delete(file_id)
+            removed += 1
+        except Exception:
+            pass
+    return removed
@@ -0,0 +1,124 @@
+"""BM25 inverted index over the vector metadata documents.
+
+Built at index-build time from the same `docs` list that goes into the
+metadata sidecar (data/vector_meta.bin) and persisted next to it, so the text fallback in
+`search_vectors()` (used when the embedding model is unavailable) and the
+lexical half of hybrid search answer from postings lists instead of scanning
+every document.
+"""
+import json
+import math
+import os
+import pathlib
+import re
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Very common English words that carry no ranking signal in FAQ text.
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from how i in is it my of on or the to
+what when where which who why with you your
+""".split())
+
+
+def tokenize(text):
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+def document_text(doc):
+    return " ".join(filter(None, [doc.get("title", ""), doc.get("content", "")]))
+
+
+class BM25Index:
+    """Okapi BM25 over tokenised title+content. Rows match the metadata rows."""
+
+    def __init__(self, postings, doc_lengths, k1=1.2, b=0.75):
+        # postings: term -> (row ids, term frequencies), both ascending by row
+        self.postings = postings
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+        self.n_docs = len(doc_lengths)
+        self.avg_len = (sum(doc_lengths) / self.n_docs) if self.n_docs else 0.0
+        self._idf = {term: self._compute_idf(len(rows)) for term, (rows, _) in postings.items()}
+        self._norm = None
+
+    @classmethod
+    def build(cls, docs, k1=1.2, b=0.75):
+        postings = {}
+        lengths = []
+        for row, doc in enumerate(docs):
+            tokens = tokenize(document_text(doc))
+            lengths.append(len(tokens))
+            counts = {}
+            for tok in tokens:
+                counts[tok] = counts.get(tok, 0) + 1
+            for tok, tf in counts.items():
+                entry = postings.setdefault(tok, ([], []))
+                entry[0].append(row)
+                entry[1].append(tf)
+        return cls(postings, lengths, k1=k1, b=b)
+
+    def _compute_idf(self, df):
+        return math.log(1.0 + (self.n_docs - df + 0.5) / (df + 0.5))
+
+    def _length_norm(self):
+        if self._norm is None:
+            lengths = np.asarray(self.doc_lengths, dtype=np.float32)
+            avg = self.avg_len or 1.0
+            self._norm = self.k1 * (1.0 - self.b + self.b * lengths / avg)
+        return self._norm
+
+    def search(self, query, top_k=5, rows=None):
+        """Return [(score, row), ...] best first. `rows` optionally restricts the candidates."""
+        terms = tokenize(query)
+        if not terms or not self.n_docs:
+            return []
+        norm = self._length_norm()
+        scores = {}
+        allowed = set(rows.tolist()) if rows is not None else None
+        for term in set(terms):
+            entry = self.postings.get(term)
+            if entry is None:
+                continue
+            idf = self._idf[term]
+            for row, tf in zip(*entry):
+                if allowed is not None and row not in allowed:
+                    continue
+                scores[row] = scores.get(row, 0.0) + idf * tf * (self.k1 + 1.0) / (tf + norm[row])
+        ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:top_k]
+        return [(float(score), row) for row, score in ranked]
+
+    def to_dict(self):
+        return {
+            "k1": self.k1,
+            "b": self.b,
+            "doc_lengths": self.doc_lengths,
+            "postings": {term: [rows, tfs] for term, (rows, tfs) in self.postings.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        postings = {term: (rows, tfs) for term, (rows, tfs) in data.get("postings", {}).items()}
+        return cls(postings, data.get("doc_lengths", []), k1=data.get("k1", 1.2), b=data.get("b", 0.75))
+
+
+def save_bm25_index(path, index):
+    path = pathlib.Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def load_bm25_index(path):
+    path = pathlib.Path(path)
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return BM25Index.from_dict(json.load(f))
@@ -0,0 +1,385 @@
+"""OpenRouter chat-completions client used to augment AI search answers.
+
+Every upstream call runs on a small, bounded thread pool. A caller first has
+to take one of `max_concurrency` slots (waiting at most `queue_timeout`
+seconds), so slow LLM responses can never pile up and tie down every web
+worker; when no slot frees up in time `LLMBusy` is raised and the caller
+answers with sources only.
+
+`complete()` returns the whole answer. `stream()` yields the answer tokens as
+OpenRouter sends them (``"stream": true`` server-sent events), so the search
+endpoint can forward them to the browser while they are generated.
+
+Requests share one keep-alive ``requests.Session`` per process (pooled
+connections, no DNS/TCP/TLS setup per answer). Connection errors, 429 and 5xx
+responses are retried with jittered exponential backoff, all attempts of one
+call sharing a single `timeout` deadline, and a circuit
+breaker stops calling OpenRouter for `reset_timeout` seconds after repeated
+failures so searches fail fast to sources-only answers instead of waiting out
+the timeout. Upstream latencies are kept in a histogram for the admin API.
+"""
+import json
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+
+# Upper bounds (ms) of the upstream latency histogram buckets
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2500, 5000, 10000, 15000, 30000)
+
+
+class LLMError(Exception):
+    """The upstream LLM call failed."""
+
+
+class LLMBusy(LLMError):
+    """No LLM slot became free within the queue timeout."""
+
+
+class LLMUnavailable(LLMError):
+    """The circuit breaker is open; OpenRouter is not being called."""
+
+
+class LLMTimeout(LLMError):
+    """No answer within the call's `timeout`, retries included."""
+
+
+class _RetryableError(LLMError):
+    """Failure worth another attempt (connection problem, 429, 5xx)."""
+
+
+class CircuitBreaker:
+    """closed -> open after `failure_threshold` consecutive failures; after
+    `reset_timeout` seconds one trial call is let through (half-open) and its
+    outcome closes or re-opens the breaker."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._opened_count = 0
+        self._rejected = 0
+
+    def allow(self):
+        with self._lock:
+            if self._state == "closed":
+                return True
+            if self._state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = "half_open"
+                self._trial_in_flight = False
+            if self._state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self._rejected += 1
+            return False
+
+    def release_trial(self):
+        """The half-open trial call never reached the upstream (e.g. no free slot)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._state = "closed"
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == "half_open" or self._failures >= self.failure_threshold:
+                if self._state != "open":
+                    self._opened_count += 1
+                self._state = "open"
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def status(self):
+        with self._lock:
+            out = {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout_seconds": self.reset_timeout,
+                "times_opened": self._opened_count,
+                "rejected_calls": self._rejected,
+            }
+            if self._state == "open":
+                out["retry_in_seconds"] = round(max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)), 1)
+            return out
+
+
+class LatencyHistogram:
+    def __init__(self, buckets_ms=LATENCY_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.buckets_ms) + 1)
+        self._count = 0
+        self._sum_ms = 0.0
+        self._max_ms = 0.0
+
+    def observe(self, ms):
+        i = 0
+        while i < len(self.buckets_ms) and ms > self.buckets_ms[i]:
+            i += 1
+        with self._lock:
+            self._counts[i] += 1
+            self._count += 1
+            self._sum_ms += ms
+            self._max_ms = max(self._max_ms, ms)
+
+    def snapshot(self):
+        with self._lock:
+            labels = [f"<={b}" for b in self.buckets_ms] + [f">{self.buckets_ms[-1]}"]
+            return {
+                "count": self._count,
+                "avg_ms": round(self._sum_ms / self._count, 1) if self._count else 0.0,
+                "max_ms": round(self._max_ms, 1),
+                "buckets_ms": dict(zip(labels, self._counts)),
+            }
+
+
+class LLMClient:
+    def __init__(self, url=OPENROUTER_URL, api_key=None, model="deepseek/deepseek-prover-v2",
+                 max_concurrency=4, timeout=15.0, queue_timeout=2.0, headers=None,
+                 connect_timeout=3.0, max_retries=2, backoff_base=0.25, breaker=None):
+        """`api_key` may be a string or a callable returning one (read on every call)."""
+        self.url = url
+        self._api_key = api_key
+        self.model = model
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.timeout = float(timeout)
+        self.connect_timeout = float(connect_timeout)
+        self.queue_timeout = float(queue_timeout)
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = float(backoff_base)
+        self.headers = dict(headers or {})
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyHistogram()
+        self._session = None
+        self._session_pid = None
+        self._session_lock = threading.Lock()
+        self._retries = 0
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        # Threads are only started on first use, after a pre-fork server has forked
+        self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="llm")
+        self._stats_lock = threading.Lock()
+        self._busy_rejections = 0
+        self._in_flight = 0
+
+    @property
+    def api_key(self):
+        return self._api_key() if callable(self._api_key) else self._api_key
+
+    @property
+    def enabled(self):
+        return bool(self.api_key)
+
+    def complete(self, prompt):
+        """Return the full answer text for `prompt`, or raise LLMTimeout after `timeout` seconds."""
+        self._admit()
+        deadline = time.monotonic() + self.timeout
+        fut = self._pool.submit(self._run_released, self._complete, prompt, deadline)
+        try:
+            # The worker stops retrying at the deadline; its last attempt may still be connecting
+            return fut.result(timeout=self.timeout + self.connect_timeout)
+        except FutureTimeout:
+            raise LLMTimeout(f"no answer from LLM within {self.timeout:.0f}s")
+
+    def stream(self, prompt):
+        """Yield answer tokens as they arrive.
+
+        The upstream request runs on the pool and hands tokens over through a
+        queue. Closing the generator early (the browser went away) tells the
+        worker to stop reading and frees its slot.
+        """
+        self._admit()
+        tokens = queue.Queue()
+        cancelled = threading.Event()
+        deadline = time.monotonic() + self.timeout
+
+        def run():
+            try:
+                for tok in self._stream_tokens(prompt, deadline):
+                    if cancelled.is_set():
+                        break
+                    tokens.put(("token", tok))
+                tokens.put(("done", None))
+            except Exception as e:
+                tokens.put(("error", e))
+
+        self._pool.submit(self._run_released, run)
+        try:
+            while True:
+                try:
+                    kind, value = tokens.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise LLMTimeout(f"no data from LLM for {self.timeout:.0f}s")
+                if kind == "token":
+                    yield value
+                elif kind == "error":
+                    raise value if isinstance(value, LLMError) else LLMError(str(value))
+                else:
+                    return
+        finally:
+            cancelled.set()
+
+    def stats(self):
+        with self._stats_lock:
+            out = {
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self._in_flight,
+                "busy_rejections": self._busy_rejections,
+                "retries": self._retries,
+            }
+        out["breaker"] = self.breaker.status()
+        out["latency"] = self.latency.snapshot()
+        return out
+
+    def _admit(self):
+        """Fail fast while the breaker is open, then take a pool slot."""
+        if not self.breaker.allow():
+            raise LLMUnavailable("LLM circuit breaker is open")
+        try:
+            self._acquire()
+        except LLMBusy:
+            self.breaker.release_trial()
+            raise
+
+    def _get_session(self):
+        # One pooled keep-alive session per process; a forked worker builds its own
+        if self._session is None or self._session_pid != os.getpid():
+            with self._session_lock:
+                if self._session is None or self._session_pid != os.getpid():
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._session = session
+                    self._session_pid = os.getpid()
+        return self._session
+
+    def _post(self, prompt, stream, deadline=None):
+        """POST with retries and return the 200 response. Every attempt's latency is recorded.
+
+        All attempts share one `deadline` (time.monotonic(), default `timeout` from now): each
+        attempt only gets the time left, and no retry starts once it has passed.
+        """
+        import requests
+        if deadline is None:
+            deadline = time.monotonic() + self.timeout
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise LLMTimeout(f"no answer from LLM within {self.timeout:.0f}s")
+            started = time.perf_counter()
+            try:
+                try:
+                    response = self._get_session().post(
+                        self.url, headers=self._request_headers(), data=self._body(prompt, stream),
+                        timeout=(min(self.connect_timeout, remaining), remaining), stream=stream)
+                except requests.RequestException as e:
+                    raise _RetryableError(str(e))
+                finally:
+                    self.latency.observe((time.perf_counter() - started) * 1000.0)
+                if response.status_code == 429 or response.status_code >= 500:
+                    response.close()
+                    raise _RetryableError(f"{response.status_code}")
+                if response.status_code != 200:
+                    response.close()
+                    raise LLMError(f"{response.status_code}")
+                return response
+            except _RetryableError as e:
+                if attempt >= self.max_retries:
+                    raise LLMError(str(e))
+                attempt += 1
+                with self._stats_lock:
+                    self._retries += 1
+                # Full jitter: spread retries from many workers instead of stampeding
+                pause = random.uniform(0, self.backoff_base * (2 ** attempt))
+                if time.monotonic() + pause >= deadline:
+                    raise LLMTimeout(f"no answer from LLM within {self.timeout:.0f}s ({e})")
+                time.sleep(pause)
+
+    def _acquire(self):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._stats_lock:
+                self._busy_rejections += 1
+            raise LLMBusy(f"all {self.max_concurrency} LLM slots busy")
+        with self._stats_lock:
+            self._in_flight += 1
+
+    def _run_released(self, fn, *args):
+        try:
+            return fn(*args)
+        finally:
+            with self._stats_lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+    def _request_headers(self):
+        headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+        headers.update(self.headers)
+        return headers
+
+    def _body(self, prompt, stream):
+        return json.dumps({
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": stream,
+        })
+
+    def _complete(self, prompt, deadline=None):
+        try:
+            response = self._post(prompt, False, deadline)
+            data = response.json()
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return data.get("choices", [{}])[0].get("message", {}).get("content") or ""
+
+    def _stream_tokens(self, prompt, deadline=None):
+        try:
+            response = self._post(prompt, True, deadline)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        # The upstream answered; a reader that stops early says nothing about its health
+        self.breaker.record_success()
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                # SSE: "data: {...}" lines, ": keep-alive" comments, "data: [DONE]" at the end
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    chunk = json.loads(data)
+                except ValueError:
+                    continue
+                delta = (chunk.get("choices") or [{}])[0].get("delta") or {}
+                if delta.get("content"):
+                    yield delta["content"]
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        finally:
+            response.close()
+
+
+def sse_event(event, data):
+    """Format one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
@@ -0,0 +1,169 @@
+"""Compact binary sidecar for the vector index metadata rows.
+
+Layout (little-endian)::
+
+    magic   8 bytes   b"CPMETA02"
+    count   uint64    number of rows
+    columns uint64    file offset of the columns section (0 if none)
+    offsets uint64 x (count + 1)   byte offset of each record in the blob
+    blob    UTF-8 compact JSON records, back to back
+    columns uint64 length + JSON {"fields": {field: [distinct values]}},
+            then one int32 array of value codes per field (-1 = no value)
+
+The file is memory-mapped, so the row count is read from the header and row
+i is decoded from ``blob[offsets[i]:offsets[i + 1]]`` without parsing any
+other record. Only the rows a search actually returns are ever decoded.
+The columns section holds the filter fields (super category, ministry,
+subservice) of every row, so filtered searches can partition the rows
+without decoding them. Files written as ``CPMETA01`` (no columns) still load.
+The old pretty-printed ``faiss_meta.json`` is now only written as a
+debugging export.
+"""
+import json
+import mmap
+import os
+import pathlib
+import struct
+
+MAGIC = b"CPMETA02"
+_MAGIC_V1 = b"CPMETA01"
+_HEADER = struct.Struct("<8sQ")
+_OFFSET = struct.Struct("<Q")
+_CODE = struct.Struct("<i")
+
+
+class MetaStore:
+    """Read-only, memory-mapped sequence of metadata dicts."""
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                raise ValueError(f"{self.path} is not a metadata store (truncated header)")
+            self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = _HEADER.unpack_from(self._buf, 0)
+        if magic not in (MAGIC, _MAGIC_V1):
+            raise ValueError(f"{self.path} is not a metadata store (bad magic)")
+        self._count = count
+        self._offsets_at = _HEADER.size
+        self._columns_at = 0
+        if magic == MAGIC:
+            self._columns_at = _OFFSET.unpack_from(self._buf, _HEADER.size)[0]
+            self._offsets_at += _OFFSET.size
+        self._blob_at = self._offsets_at + (count + 1) * _OFFSET.size
+        self._columns = None
+
+    def __len__(self):
+        return self._count
+
+    def _span(self, row):
+        at = self._offsets_at + row * _OFFSET.size
+        start = _OFFSET.unpack_from(self._buf, at)[0]
+        stop = _OFFSET.unpack_from(self._buf, at + _OFFSET.size)[0]
+        return self._blob_at + start, self._blob_at + stop
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(self._count))]
+        row = int(row)
+        if row < 0:
+            row += self._count
+        if not 0 <= row < self._count:
+            raise IndexError("metadata row out of range")
+        start, stop = self._span(row)
+        return json.loads(self._buf[start:stop].decode("utf-8"))
+
+    def __iter__(self):
+        for row in range(self._count):
+            yield self[row]
+
+    def column(self, field):
+        """(distinct values, little-endian int32 codes per row as a memoryview), or None.
+
+        A row's code indexes `values`; -1 means the row has no value. None when the
+        file stores no column for `field` (written without it, or before columns existed).
+        """
+        columns = self._columns
+        if columns is None:
+            columns = {}
+            if self._columns_at:
+                at = self._columns_at
+                size = _OFFSET.unpack_from(self._buf, at)[0]
+                at += _OFFSET.size
+                fields = json.loads(self._buf[at:at + size].decode("utf-8"))["fields"]
+                at += size
+                view = memoryview(self._buf)
+                for name, values in fields.items():
+                    stop = at + self._count * _CODE.size
+                    columns[name] = (values, view[at:stop])
+                    at = stop
+            self._columns = columns
+        return columns.get(field)
+
+    def status(self):
+        return {"rows": self._count, "bytes": len(self._buf), "path": str(self.path)}
+
+
+def save_meta_store(path, docs, columns=()):
+    """Write `docs` as a metadata store (tmp file + rename, safe for mapped readers).
+
+    `columns` names the fields whose per-row values are also stored as a column.
+    """
+    path = pathlib.Path(path)
+    docs = list(docs)
+    records = [json.dumps(doc, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+               for doc in docs]
+    values = {}
+    codes = {}
+    for field in columns:
+        index = {}
+        codes[field] = [-1 if doc.get(field) is None else index.setdefault(doc[field], len(index))
+                        for doc in docs]
+        values[field] = list(index)
+    table = json.dumps({"fields": values}, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+    offsets_size = (len(records) + 1) * _OFFSET.size
+    columns_at = _HEADER.size + _OFFSET.size + offsets_size + sum(len(rec) for rec in records)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(records)))
+        f.write(_OFFSET.pack(columns_at))
+        offset = 0
+        f.write(_OFFSET.pack(offset))
+        for rec in records:
+            offset += len(rec)
+            f.write(_OFFSET.pack(offset))
+        for rec in records:
+            f.write(rec)
+        f.write(_OFFSET.pack(len(table)))
+        f.write(table)
+        for field in values:
+            f.write(struct.pack(f"<{len(docs)}i", *codes[field]))
+    os.replace(tmp, path)
+
+
+def load_meta_store(path):
+    path = pathlib.Path(path)
+    if not path.exists():
+        return None
+    return MetaStore(path)
+
+
+def meta_store_count(path):
+    """Number of rows in a metadata store, read from the header alone (0 if missing)."""
+    path = pathlib.Path(path)
+    if not path.exists():
+        return 0
+    with open(path, "rb") as f:
+        head = f.read(_HEADER.size)
+    if len(head) < _HEADER.size:
+        return 0
+    magic, count = _HEADER.unpack(head)
+    return count if magic in (MAGIC, _MAGIC_V1) else 0
+
+
+def export_meta_json(path, docs):
+    """Pretty-printed JSON copy of the metadata, for debugging only."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(list(docs), f, ensure_ascii=False, indent=2, default=str)
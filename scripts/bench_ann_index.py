@@ -0,0 +1,88 @@
+"""
+Recall/latency benchmark for the FAISS index families used by build_vector_index.
+Run from project root:
+
+python scripts/bench_ann_index.py [--rows 100000] [--queries 500] [--top-k 5] [--types flat,hnsw,ivfpq]
+
+Uses data/embeddings.npy (the vectors behind the metadata rows) as the seed
+corpus and scales it up synthetically, like scripts/bench_embedding_store.py.
+Every index type is built with the same params the app reads from the
+INDEX_* env vars and compared against exact Flat search: build time, index
+size, recall@k and p50/p99 single-query latency. Use it to pick INDEX_TYPE
+and the AUTO_* thresholds for a corpus size.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from vector_index import INDEX_TYPES, build_faiss_index, choose_index_type
+from bench_embedding_store import synthetic_corpus
+
+
+def index_params_from_env():
+    return {
+        "hnsw_m": int(os.getenv("INDEX_HNSW_M", "32")),
+        "ef_construction": int(os.getenv("INDEX_EF_CONSTRUCTION", "80")),
+        "ef_search": int(os.getenv("INDEX_EF_SEARCH", "64")),
+        "nlist": int(os.getenv("INDEX_IVF_NLIST", "0")),
+        "pq_m": int(os.getenv("INDEX_PQ_M", "0")),
+        "nprobe": int(os.getenv("INDEX_NPROBE", "16")),
+    }
+
+
+def main():
+    import faiss
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", default="data/embeddings.npy")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--types", default=",".join(INDEX_TYPES))
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    corpus = synthetic_corpus(args.seed, args.rows, rng)
+    queries = corpus[rng.integers(0, len(corpus), size=args.queries)]
+    queries = queries + rng.normal(scale=0.02, size=queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    params = index_params_from_env()
+
+    exact, _ = build_faiss_index(corpus, "flat")
+    _, truth = exact.search(queries, args.top_k)
+    truth = [set(row.tolist()) for row in truth]
+
+    print(f"corpus: {corpus.shape[0]} x {corpus.shape[1]}, queries: {len(queries)}, k={args.top_k}, "
+          f"auto picks: {choose_index_type(len(corpus))}")
+    print(f"{'type':<7} {'built':<7} {'build_s':>8} {'bytes':>12} {'recall@k':>9} {'p50_ms':>8} {'p99_ms':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for index_type in [t.strip() for t in args.types.split(",") if t.strip()]:
+            started = time.perf_counter()
+            index, info = build_faiss_index(corpus, index_type, params)
+            build_s = time.perf_counter() - started
+            path = os.path.join(tmp, f"{index_type}.index")
+            faiss.write_index(index, path)
+            size = os.path.getsize(path)
+
+            # One query per call, like a search request
+            latencies = []
+            recall = 0.0
+            for q, expected in zip(queries, truth):
+                t0 = time.perf_counter()
+                _, ids = index.search(q.reshape(1, -1), args.top_k)
+                latencies.append((time.perf_counter() - t0) * 1000.0)
+                recall += len(expected & set(ids[0].tolist())) / len(expected)
+            p50, p99 = np.percentile(latencies, [50, 99])
+            print(f"{index_type:<7} {info['index_type']:<7} {build_s:>8.2f} {size:>12} "
+                  f"{recall / len(queries):>9.4f} {p50:>8.3f} {p99:>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Accuracy-vs-size benchmark for the NumPy embedding store formats.
+Run from project root:
+
+python scripts/bench_embedding_store.py [--rows 50000] [--queries 200] [--top-k 5]
+
+Uses data/embeddings.npy as the seed corpus and scales it up synthetically
+(seed rows plus gaussian noise, re-normalised) so results are meaningful for
+corpora larger than today's FAQ set. For each store dtype it reports on-disk
+size, recall@k against the float32 baseline, the worst score error and the
+mean query latency when scoring straight off the memory-mapped file.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from embedding_store import STORE_DTYPES, save_embedding_store, load_embedding_store, scales_path_for
+
+
+def synthetic_corpus(seed_path, rows, rng):
+    seed = np.load(seed_path).astype(np.float32)
+    if rows <= len(seed):
+        return seed[:rows]
+    picks = rng.integers(0, len(seed), size=rows)
+    emb = seed[picks] + rng.normal(scale=0.05, size=(rows, seed.shape[1])).astype(np.float32)
+    emb /= np.linalg.norm(emb, axis=1, keepdims=True)
+    return emb
+
+
+def top_k(scores, k):
+    k = min(k, len(scores))
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx])]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", default="data/embeddings.npy")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    corpus = synthetic_corpus(args.seed, args.rows, rng)
+    queries = corpus[rng.integers(0, len(corpus), size=args.queries)]
+    queries = queries + rng.normal(scale=0.02, size=queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    baseline = [corpus @ q for q in queries]
+    baseline_top = [set(top_k(s, args.top_k).tolist()) for s in baseline]
+
+    print(f"corpus: {corpus.shape[0]} x {corpus.shape[1]}, queries: {len(queries)}, k={args.top_k}")
+    print(f"{'dtype':<8} {'bytes':>12} {'ratio':>6} {'recall@k':>9} {'max_err':>9} {'ms/query':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for dtype in STORE_DTYPES:
+            path = os.path.join(tmp, f"emb_{dtype}.npy")
+            save_embedding_store(path, corpus, dtype=dtype)
+            size = os.path.getsize(path)
+            if os.path.exists(scales_path_for(path)):
+                size += os.path.getsize(scales_path_for(path))
+            store = load_embedding_store(path, mmap=True)
+
+            recall = 0.0
+            max_err = 0.0
+            started = time.perf_counter()
+            for q, exact, exact_top in zip(queries, baseline, baseline_top):
+                scores = store.dot(q)
+                recall += len(exact_top & set(top_k(scores, args.top_k).tolist())) / len(exact_top)
+                max_err = max(max_err, float(np.abs(scores - exact).max()))
+            elapsed_ms = (time.perf_counter() - started) * 1000.0 / len(queries)
+            print(f"{dtype:<8} {size:>12} {size / (corpus.nbytes or 1):>6.2f} "
+                  f"{recall / len(queries):>9.4f} {max_err:>9.5f} {elapsed_ms:>9.3f}")
+            del store
+
+
+if __name__ == '__main__':
+    main()
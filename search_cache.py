@@ -0,0 +1,310 @@
+"""Bounded in-process caches for the AI search path.
+
+Chatbot traffic is highly repetitive, so `search_vectors()` keeps two levels of
+cache in front of the encoder and the index:
+
+* normalised query text -> query embedding
+* (embedding digest, top_k, index version) -> hits
+
+The hit level is keyed by the resident index version and is also cleared when
+a new index is swapped in, so stale results are never served after a rebuild.
+
+`SemanticAnswerCache` sits in front of the LLM in `ai_search()`: a question
+whose embedding is within a cosine threshold of an already answered one gets
+that answer and its sources back. Entries live in a Mongo collection, so all
+workers share them, and each worker keeps a small matrix mirror for the
+similarity lookup.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+
+def normalize_query(text):
+    """Lowercase and collapse whitespace so trivially different queries share a key."""
+    return " ".join((text or "").lower().split())
+
+
+def embedding_digest(vec):
+    """Stable, compact cache key for a query embedding."""
+    return hashlib.sha1(vec.tobytes()).hexdigest()
+
+
+class LRUCache:
+    """Thread-safe LRU cache with optional per-entry TTL and hit/miss/eviction counters."""
+
+    def __init__(self, max_size=1024, ttl_seconds=None):
+        self.max_size = max(1, int(max_size))
+        self.ttl_seconds = ttl_seconds if ttl_seconds and ttl_seconds > 0 else None
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            value, expires = item
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        expires = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            self._data[key] = (value, expires)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class SearchCache:
+    """The two cache levels used by `search_vectors()`."""
+
+    def __init__(self, max_size=1024, ttl_seconds=None):
+        self.embeddings = LRUCache(max_size, ttl_seconds)
+        self.hits = LRUCache(max_size, ttl_seconds)
+        self.invalidations = 0
+
+    def on_index_swap(self, snapshot):
+        """ResidentIndex listener: results computed against an older index are dropped."""
+        self.hits.clear()
+        self.invalidations += 1
+
+    def stats(self):
+        return {
+            "embeddings": self.embeddings.stats(),
+            "hits": self.hits.stats(),
+            "invalidations": self.invalidations,
+        }
+
+
+def answer_scope(filters, mode, top_k):
+    """Answers are only reused between queries searched the same way."""
+    return json.dumps([sorted((filters or {}).items()), mode, int(top_k)], default=str)
+
+
+class SemanticAnswerCache:
+    """Cosine-threshold cache of LLM answers, keyed by query embedding.
+
+    Entries are tagged with the index build version; lookups only consider
+    entries of the caller's version and scope, so a rebuild invalidates
+    everything at once. `collection` (a pymongo collection) is optional; with
+    it, stores are written through to Mongo and every worker pulls entries
+    written by the others at most every `refresh_seconds`.
+    """
+
+    def __init__(self, collection=None, threshold=0.95, max_size=2000, ttl_seconds=86400, refresh_seconds=30):
+        self.collection = collection
+        self.threshold = float(threshold)
+        self.max_size = max(1, int(max_size))
+        self.ttl_seconds = float(ttl_seconds)
+        self.refresh_seconds = float(refresh_seconds)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> entry dict (with "embedding"), oldest first
+        self._matrix = None
+        self._keys = []
+        self._version = None
+        self._synced_at = 0.0
+        self._last_created = None
+        self._indexes_ready = False
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.invalidations = 0
+
+    def lookup(self, q_emb, scope, version):
+        """Return {"answer", "sources", "similarity"} of the closest cached answer, or None."""
+        self._sync(version)
+        q = np.asarray(q_emb, dtype=np.float32).reshape(-1)
+        now = time.time()
+        with self._lock:
+            best = None
+            if self._matrix is not None and len(self._keys):
+                sims = self._matrix @ q
+                for i in np.argsort(-sims):
+                    if sims[i] < self.threshold:
+                        break
+                    entry = self._entries.get(self._keys[i])
+                    if entry and entry["scope"] == scope and entry["expires"] > now:
+                        best = {"answer": entry["answer"], "sources": entry["sources"], "similarity": float(sims[i])}
+                        break
+            if best is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return best
+
+    def store(self, q_emb, scope, version, answer, sources):
+        q = np.asarray(q_emb, dtype=np.float32).reshape(-1)
+        key = hashlib.sha1(q.tobytes() + scope.encode("utf-8") + str(version).encode("utf-8")).hexdigest()
+        created = datetime.now(timezone.utc)
+        entry = {"scope": scope, "answer": answer, "sources": sources, "embedding": q,
+                 "expires": time.time() + self.ttl_seconds}
+        self._sync(version)
+        with self._lock:
+            self._add_locked(key, entry)
+            self.stores += 1
+        if self.collection is None:
+            return
+        try:
+            self._ensure_indexes()
+            self.collection.replace_one({"_id": key}, {
+                "_id": key, "index_version": version, "scope": scope, "answer": answer, "sources": sources,
+                "embedding": q.tobytes(), "created": created,
+                "expires_at": created + timedelta(seconds=self.ttl_seconds),
+            }, upsert=True)
+            # Size cap across all workers: drop the oldest entries beyond max_size
+            if self.stores % 50 == 0:
+                extra = self.collection.count_documents({}) - self.max_size
+                if extra > 0:
+                    old = [d["_id"] for d in self.collection.find({}, {"_id": 1}).sort("created", 1).limit(extra)]
+                    self.collection.delete_many({"_id": {"$in": old}})
+        except Exception as e:
+            print(f"Warning: could not persist answer cache entry: {e}")
+
+    def invalidate(self, keep_version=None):
+        """Drop every entry (or every entry not of `keep_version`), locally and in Mongo."""
+        self.clear_local()
+        if self.collection is None:
+            return
+        try:
+            query = {"index_version": {"$ne": keep_version}} if keep_version else {}
+            self.collection.delete_many(query)
+        except Exception as e:
+            print(f"Warning: could not invalidate answer cache: {e}")
+
+    def clear_local(self):
+        with self._lock:
+            self._reset_locked(None)
+            self.invalidations += 1
+
+    def on_index_swap(self, snapshot):
+        """ResidentIndex listener: answers for the previous index are no longer served."""
+        self.clear_local()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "threshold": self.threshold,
+                "ttl_seconds": self.ttl_seconds,
+                "shared": self.collection is not None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _reset_locked(self, version):
+        self._entries.clear()
+        self._matrix = None
+        self._keys = []
+        self._version = version
+        self._last_created = None
+        self._synced_at = 0.0
+
+    def _add_locked(self, key, entry):
+        self._entries.pop(key, None)
+        self._entries[key] = entry
+        self._rebuild_locked()
+
+    def _rebuild_locked(self):
+        """Drop expired and surplus (oldest) entries and rebuild the embedding matrix."""
+        now = time.time()
+        for k in [k for k, e in self._entries.items() if e["expires"] <= now]:
+            del self._entries[k]
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        self._keys = list(self._entries)
+        self._matrix = np.vstack([self._entries[k]["embedding"] for k in self._keys]) if self._keys else None
+
+    def _ensure_indexes(self):
+        if self._indexes_ready:
+            return
+        try:
+            # Mongo removes expired entries by itself
+            self.collection.create_index("expires_at", expireAfterSeconds=0)
+            self.collection.create_index([("index_version", 1), ("created", 1)])
+        except Exception as e:
+            print(f"Warning: could not create answer cache indexes: {e}")
+        self._indexes_ready = True
+
+    def _sync(self, version):
+        """Switch the mirror to `version` and pull entries other workers stored since the last pull."""
+        with self._lock:
+            if self._version != version:
+                self._reset_locked(version)
+        if self.collection is None or time.monotonic() - self._synced_at < self.refresh_seconds:
+            return
+        self._synced_at = time.monotonic()
+        query = {"index_version": version, "expires_at": {"$gt": datetime.now(timezone.utc)}}
+        if self._last_created is not None:
+            query["created"] = {"$gt": self._last_created}
+        try:
+            docs = list(self.collection.find(query).sort("created", -1).limit(self.max_size))
+        except Exception as e:
+            print(f"Warning: could not refresh answer cache: {e}")
+            return
+        if not docs:
+            return
+        with self._lock:
+            if self._version != version:
+                return
+            for d in reversed(docs):
+                if d["_id"] in self._entries:
+                    continue
+                expires_at = d["expires_at"]
+                if expires_at.tzinfo is None:
+                    expires_at = expires_at.replace(tzinfo=timezone.utc)
+                self._entries[d["_id"]] = {
+                    "scope": d["scope"], "answer": d["answer"], "sources": d.get("sources", []),
+                    "embedding": np.frombuffer(d["embedding"], dtype=np.float32),
+                    "expires": expires_at.timestamp(),
+                }
+            self._last_created = docs[0]["created"]
+            self._rebuild_locked()
@@ -4,6 +4,7 @@ import json
 import bcrypt
 from dotenv import load_dotenv
 from datetime import datetime
+from catalog_cache import bump_version
 
 load_dotenv()
 
@@ -399,6 +400,8 @@ super_categories_docs = [
     }
 ]
 services_col.insert_many(super_categories_docs)
+# Running app workers reload their cached catalog when this version moves
+bump_version(db["catalog_versions"])
 print(f"Seeded {len(super_categories_docs)} super category documents with nested ministries.")
 
 # --- 5. Seed Products (Public Store) ---
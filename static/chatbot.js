@@ -39,17 +39,63 @@ document.addEventListener('DOMContentLoaded', function() {
         if (!text) return;
         appendChatbotMessage('user', text, new Date());
         input.value = '';
+        const fallback = "I'm sorry, I couldn't find an answer to that. Please try rephrasing your question.";
+        let bubble = null;
         try {
+            // Ask for a streamed answer: sources arrive first, then the answer token by token
+            const body = {query: text, top_k: 5, stream: true};
+            // On a ministry page the widget only searches that ministry's services
+            if (chatbotModal && chatbotModal.dataset.ministryId) {
+                body.ministry_id = chatbotModal.dataset.ministryId;
+            }
             const res = await fetch("/api/ai/search", {
                 method: "POST",
-                headers: {"Content-Type": "application/json"},
-                body: JSON.stringify({query: text, top_k: 5})
+                headers: {"Content-Type": "application/json", "Accept": "text/event-stream"},
+                body: JSON.stringify(body)
+            });
+            bubble = appendChatbotMessage('bot', '…', new Date());
+            let answer = '';
+            await readServerEvents(res, function(event, data) {
+                if (event === 'token') {
+                    answer += data.text;
+                    bubble.innerText = answer;
+                    messagesDiv.scrollTop = messagesDiv.scrollHeight;
+                } else if (event === 'done') {
+                    answer = data.answer || answer;
+                }
             });
-            const data = await res.json();
-            let reply = data.answer || "I'm sorry, I couldn't find an answer to that. Please try rephrasing your question.";
-            appendChatbotMessage('bot', reply, new Date());
+            bubble.innerText = answer || fallback;
         } catch (error) {
-            appendChatbotMessage('bot', "Oops! Something went wrong with the AI assistant. Please try again later.", new Date());
+            const msg = "Oops! Something went wrong with the AI assistant. Please try again later.";
+            if (bubble) {
+                bubble.innerText = msg;
+            } else {
+                appendChatbotMessage('bot', msg, new Date());
+            }
+        }
+    }
+
+    // Minimal server-sent events reader for a fetch() response body
+    async function readServerEvents(res, onEvent) {
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+            const {value, done} = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, {stream: true});
+            let sep;
+            while ((sep = buffer.indexOf('\n\n')) !== -1) {
+                const block = buffer.slice(0, sep);
+                buffer = buffer.slice(sep + 2);
+                let event = 'message';
+                let data = '';
+                block.split('\n').forEach(function(line) {
+                    if (line.startsWith('event:')) event = line.slice(6).trim();
+                    else if (line.startsWith('data:')) data += line.slice(5).trim();
+                });
+                if (data) onEvent(event, JSON.parse(data));
+            }
         }
     }
 
@@ -83,6 +129,7 @@ document.addEventListener('DOMContentLoaded', function() {
         msgDiv.appendChild(tsDiv);
         messagesDiv.appendChild(msgDiv);
         messagesDiv.scrollTop = messagesDiv.scrollHeight;
+        return bubbleDiv;
     }
 
     function formatTimestamp(date) {
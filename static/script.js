@@ -45,12 +45,23 @@ function renderSuperCategories() {
         superCategoryListUl.appendChild(li);
     });
 }
+// --- Catalog levels are fetched on demand and kept on their parent object ---
+async function fetchCatalogLevel(node, key, fields = null) {
+    if (node[key]) return node[key];
+    const params = fields ? `?fields=${encodeURIComponent(fields)}` : '';
+    const res = await fetch(`/api/catalog/children/${encodeURIComponent(node.id)}${params}`);
+    if (!res.ok) throw new Error(`Failed to fetch ${key}`);
+    node[key] = (await res.json()).items || [];
+    return node[key];
+}
+
 // --- Initial Data Load ---
 async function loadInitialData() {
     try {
-        const res = await fetch('/api/services');
+        // Only the super category names are needed for the first paint
+        const res = await fetch('/api/catalog/children?fields=id,name');
         if (!res.ok) throw new Error('Failed to fetch services');
-        allSuperCategoriesData = await res.json();
+        allSuperCategoriesData = (await res.json()).items || [];
         renderSuperCategories();
     } catch (error) {
         console.error('Error loading initial data:', error);
@@ -58,7 +69,7 @@ async function loadInitialData() {
     }
 }
 let lang = "en";
-let allSuperCategoriesData = []; // Stores all hierarchical data (Super Categories -> Ministries -> Subservices)
+let allSuperCategoriesData = []; // Super Categories; their ministries, subservices and questions are filled in as they are opened
 let currentSelectedSuperCategory = null; // Stores the currently selected Super Category object
 let currentSelectedMinistry = null;    // Stores the currently selected Ministry object
 let currentSelectedSubservice = null;  // Stores the currently selected Subservice object
@@ -130,7 +141,7 @@ function setLang(newLang) {
     try { loadAds(); } catch (e) {}
 }
 
-function loadMinistriesForSuperCategory(superCategory, ministryToActivate = null) {
+async function loadMinistriesForSuperCategory(superCategory, ministryToActivate = null, subserviceToActivate = null) {
     currentSelectedSuperCategory = superCategory;
     currentSelectedMinistry = null;
     currentSelectedSubservice = null;
@@ -142,6 +153,15 @@ function loadMinistriesForSuperCategory(superCategory, ministryToActivate = null
         <p class="text-muted">Explore the departments under ${getLocalizedName(superCategory.name)}.</p>
     `);
 
+    try {
+        await fetchCatalogLevel(superCategory, 'ministries', 'id,name');
+    } catch (error) {
+        console.error('Error loading ministries:', error);
+        ministryListUl.innerHTML = '<li class="text-muted">Failed to load ministries.</li>';
+        return;
+    }
+    if (currentSelectedSuperCategory !== superCategory) return; // another category was opened meanwhile
+
     (superCategory.ministries || []).forEach(ministry => {
         let li = document.createElement("li");
         li.textContent = getLocalizedName(ministry.name);
@@ -175,12 +195,12 @@ function showProfileModalForMinistry(ministry) {
         const activeMinistryLi = ministryListUl.querySelector(`[data-ministry-id="${ministryToActivate.id}"]`);
         if (activeMinistryLi) {
             setActiveClass(activeMinistryLi, 'ministry-list');
-            loadSubservicesForMinistry(ministryToActivate, subserviceToActivate); // Pass subserviceToActivate
+            await loadSubservicesForMinistry(ministryToActivate, subserviceToActivate); // Pass subserviceToActivate
         }
     }
 }
 
-function loadSubservicesForMinistry(ministry, subserviceToActivate = null) {
+async function loadSubservicesForMinistry(ministry, subserviceToActivate = null) {
     currentSelectedMinistry = ministry;
     currentSelectedSubservice = null;
     currentQuestionData = null;
@@ -191,6 +211,15 @@ function loadSubservicesForMinistry(ministry, subserviceToActivate = null) {
         <p class="text-muted">Find specific services and answers from ${getLocalizedName(ministry.name)}.</p>
     `;
 
+    try {
+        await fetchCatalogLevel(ministry, 'subservices', 'id,name');
+    } catch (error) {
+        console.error('Error loading services:', error);
+        subserviceListUl.innerHTML = '<li class="text-muted">Failed to load services.</li>';
+        return;
+    }
+    if (currentSelectedMinistry !== ministry) return; // another ministry was opened meanwhile
+
     (ministry.subservices || []).forEach(subservice => {
         let li = document.createElement("li");
         li.innerHTML = `<b>${getLocalizedName(subservice.name)}</b> <i class="fas fa-chevron-down" style="float:right;"></i>`;
@@ -244,7 +273,14 @@ function showProfileModalForSubservice(subservice) {
     };
 }
 
-function showQuestionsForSubservice(subservice) {
+async function showQuestionsForSubservice(subservice) {
+    try {
+        await fetchCatalogLevel(subservice, 'questions');
+    } catch (error) {
+        console.error('Error loading questions:', error);
+        answerBoxDiv.innerHTML = '<p class="text-muted">Failed to load questions.</p>';
+        return;
+    }
     // Render the questions for the selected subservice
     resetPanel(subserviceListUl, servicesQuestionsPanelTitle, `${getLocalizedName(subservice.name)}: Questions`);
     answerBoxDiv.innerHTML = `<h3>Select a question to view the answer.</h3>`;
@@ -609,55 +645,48 @@ function renderSearchResults(matchedItems) {
     }
 }
 
-function handleSearchResultClick(match) {
+async function handleSearchResultClick(match) {
     setActiveClass(null, 'super-category-list');
     setActiveClass(null, 'ministry-list');
-    
-    if (match.type === 'ministry') {
-        const superCategory = allSuperCategoriesData.find(sc => sc.id === match.super_category_id);
-        if (superCategory) {
-            loadMinistriesForSuperCategory(superCategory, match.ministry);
-            const superCatLi = superCategoryListUl.querySelector(`[data-super-category-id="${superCategory.id}"]`);
-            if (superCatLi) setActiveClass(superCatLi, 'super-category-list');
-        }
-    } else if (match.type === 'subservice') {
-        const superCategory = allSuperCategoriesData.find(sc => sc.id === match.super_category_id);
-        const ministry = superCategory?.ministries.find(min => min.id === match.ministry_id);
-        if (superCategory && ministry) {
-            loadMinistriesForSuperCategory(superCategory, ministry);
-            const superCatLi = superCategoryListUl.querySelector(`[data-super-category-id="${superCategory.id}"]`);
-            if (superCatLi) setActiveClass(superCatLi, 'super-category-list');
-            setTimeout(() => {
-                loadSubservicesForMinistry(ministry, match.subservice);
-                const ministryLi = ministryListUl.querySelector(`[data-ministry-id="${ministry.id}"]`);
-                if (ministryLi) setActiveClass(ministryLi, 'ministry-list');
-            }, 50);
+    globalSearchInput.value = '';
+    searchResultsUl.classList.remove('active');
+
+    const superCategory = allSuperCategoriesData.find(sc => sc.id === match.super_category_id);
+    if (!superCategory) return;
+    const superCatLi = superCategoryListUl.querySelector(`[data-super-category-id="${superCategory.id}"]`);
+    if (superCatLi) setActiveClass(superCatLi, 'super-category-list');
+
+    try {
+        // Fetch only the levels on the path to the match
+        const ministries = await fetchCatalogLevel(superCategory, 'ministries', 'id,name');
+        const ministry = ministries.find(min => min.id === (match.ministry_id || match.id));
+        if (match.type === 'ministry' || !ministry) {
+            await loadMinistriesForSuperCategory(superCategory, ministry || null);
+            return;
         }
-    } else if (match.type === 'question') {
-        const superCategory = allSuperCategoriesData.find(sc => sc.id === match.super_category_id);
-        const ministry = superCategory?.ministries.find(min => min.id === match.ministry_id);
-        const subservice = ministry?.subservices.find(sub => sub.id === match.subservice_id);
-        const question = subservice?.questions.find(q => getLocalizedName(q.q) === getLocalizedName(match.question.q)); // Match by text or ID if available
-        
-        if (superCategory && ministry && subservice && question) {
-            loadMinistriesForSuperCategory(superCategory, ministry);
-            const superCatLi = superCategoryListUl.querySelector(`[data-super-category-id="${superCategory.id}"]`);
-            if (superCatLi) setActiveClass(superCatLi, 'super-category-list');
-            setTimeout(() => {
-                loadSubservicesForMinistry(ministry, subservice);
-                const ministryLi = ministryListUl.querySelector(`[data-ministry-id="${ministry.id}"]`);
-                if (ministryLi) setActiveClass(ministryLi, 'ministry-list');
-                setTimeout(() => {
-                    currentSelectedSubservice = subservice;
-                    currentQuestionData = question;
-                    currentSubserviceName = getLocalizedName(subservice.name);
-                    showProfileModal(); // Trigger profile modal for question
-                }, 100);
-            }, 50);
+        const subservices = await fetchCatalogLevel(ministry, 'subservices', 'id,name');
+        const subserviceId = match.type === 'subservice' ? match.id : match.subservice_id;
+        const subservice = subservices.find(sub => sub.id === subserviceId);
+        if (!subservice) return;
+
+        if (match.type === 'subservice') {
+            await loadMinistriesForSuperCategory(superCategory, ministry, subservice);
+        } else if (match.type === 'question') {
+            const questions = await fetchCatalogLevel(subservice, 'questions');
+            const question = questions.find(q => q.id === match.id) ||
+                questions.find(q => getLocalizedName(q.q) === getLocalizedName(match.question.q)); // Match by ID, or by text
+            if (!question) return;
+            await loadMinistriesForSuperCategory(superCategory, ministry);
+            const ministryLi = ministryListUl.querySelector(`[data-ministry-id="${ministry.id}"]`);
+            if (ministryLi) setActiveClass(ministryLi, 'ministry-list');
+            currentSelectedSubservice = subservice;
+            currentQuestionData = question;
+            currentSubserviceName = getLocalizedName(subservice.name);
+            showProfileModal(); // Trigger profile modal for question
         }
+    } catch (error) {
+        console.error('Error opening search result:', error);
     }
-    globalSearchInput.value = '';
-    searchResultsUl.classList.remove('active');
 }
 
 
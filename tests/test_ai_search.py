@@ -0,0 +1,71 @@
+import pytest
+import werkzeug
+import os, sys, pathlib
+# Ensure project root is on sys.path so 'app' can be imported when pytest runs from tests folder
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+if not hasattr(werkzeug, "__version__"):
+    werkzeug.__version__ = "3.0.0"
+
+from app import app, search_vectors
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as c:
+        yield c
+
+
+def test_batch_search_matches_single_searches_in_order(client):
+    queries = ["passport", "", "driving licence"]
+    resp = client.post('/api/ai/search/batch', json={"queries": queries, "top_k": 3, "mode": "lexical"})
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert [r["query"] for r in data["results"]] == queries
+    assert data["results"][1]["sources"] == []
+    for r in data["results"]:
+        if r["query"]:
+            single = [h.get("doc_id") or h.get("title") for h in search_vectors(r["query"], top_k=3, mode="lexical")]
+            assert [s["doc_id"] for s in r["sources"]] == single
+
+    assert client.post('/api/ai/search/batch', json={"queries": []}).status_code == 400
+
+
+def test_batch_search_failure_is_an_error_not_empty_results(client, monkeypatch):
+    import app as app_module
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("index unreadable")
+
+    monkeypatch.setattr(app_module, "search_vectors_batch", broken)
+    resp = client.post('/api/ai/search/batch', json={"queries": ["passport"]})
+    assert resp.status_code == 500
+    assert resp.get_json()["error"] == "search_failed"
+    assert "results" not in resp.get_json()
+
+
+def test_search_rejects_bad_top_k_and_filters_and_clamps_top_k(client, monkeypatch):
+    import app as app_module
+
+    seen = []
+
+    def fake_batch(queries, top_k=5, filters=None, **kwargs):
+        seen.append((top_k, filters))
+        return [[] for _ in queries]
+
+    monkeypatch.setattr(app_module, "search_vectors_batch", fake_batch)
+    for endpoint, body in (('/api/ai/search/batch', {"queries": ["passport"]}),
+                           ('/api/ai/search', {"query": "passport"})):
+        assert client.post(endpoint, json=dict(body, top_k="five")).status_code == 400
+        assert client.post(endpoint, json=dict(body, top_k=[3])).status_code == 400
+        assert client.post(endpoint, json=dict(body, ministry_id={"$ne": ""})).status_code == 400
+        assert client.post(endpoint, json=dict(body, ministry_id=7)).status_code == 400
+
+    resp = client.post('/api/ai/search/batch', json={"queries": ["passport"], "top_k": 10 ** 9, "ministry_id": "m1"})
+    assert resp.status_code == 200
+    assert seen == [(app_module.SEARCH_TOP_K_MAX, {"ministry_id": "m1"})]
+    client.post('/api/ai/search/batch', json={"queries": ["passport"], "top_k": -3})
+    assert seen[-1][0] == 1
@@ -0,0 +1,137 @@
+import time
+import os, sys, pathlib
+# Ensure project root is on sys.path so the helper modules can be imported when pytest runs from tests folder
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from autosuggest_index import AutosuggestIndex, prefix_edit_distance, tokenize
+from catalog_cache import CatalogSnapshot
+
+CATALOG = [
+    {"id": "immigration", "name": {"en": "Immigration"}, "ministries": [
+        {"id": "min_defence", "name": {"en": "Ministry of Defence", "si": "ආරක්ෂක අමාත්‍යාංශය", "ta": "பாதுகாப்பு அமைச்சு"},
+         "subservices": [
+             {"id": "passport", "name": {"en": "Passport Services", "si": "ගමන් බලපත්‍ර සේවා", "ta": "கடவுச்சீட்டு சேவைகள்"}},
+             {"id": "pension", "name": {"en": "Pension Office", "si": "විශ්‍රාම වැටුප් කාර්යාලය", "ta": "ஓய்வூதிய அலுவலகம்"}},
+         ]},
+    ]},
+    {"id": "transport", "name": {"en": "Transport"}, "ministries": [
+        {"id": "min_transport", "name": {"en": "Ministry of Transport"}, "subservices": [
+            {"id": "licence", "name": {"en": "Driving Licence"}, "questions": [
+                {"q": {"en": "How do I renew my driving license?"}, "answer": {"en": "At the DMT office."}},
+            ]},
+            {"id": "permits", "name": {"en": "Route Permits"}},
+        ]},
+    ]},
+]
+
+
+def ids(results):
+    return [r["id"] for r in results]
+
+
+def test_prefix_matches_every_language_and_word():
+    index = AutosuggestIndex()
+    snap = CatalogSnapshot(1, CATALOG)
+    assert ids(index.suggest("pass", snap)) == ["passport"]
+    assert ids(index.suggest("ගමන්", snap)) == ["passport"]
+    hits = index.suggest("கடவு", snap)
+    assert ids(hits) == ["passport"] and hits[0]["matched_lang"] == "ta"
+    assert hits[0]["ministry_id"] == "min_defence"
+    # Every query word must start some word of the name
+    assert ids(index.suggest("ministry tra", snap)) == ["min_transport"]
+    assert index.suggest("xyz", snap) == []
+
+
+def test_results_carry_the_ids_of_their_path():
+    index = AutosuggestIndex()
+    snap = CatalogSnapshot(1, CATALOG)
+    sub = index.suggest("passport", snap)[0]
+    assert (sub["type"], sub["super_category_id"], sub["ministry_id"], sub["subservice_id"]) == \
+        ("subservice", "immigration", "min_defence", "passport")
+    question = index.suggest("renew", snap)[0]
+    assert (question["type"], question["id"], question["subservice_id"]) == ("question", "licence:q0", "licence")
+    assert question["question"]["q"]["en"].startswith("How do I renew")
+    ministry = index.suggest("ministry of t", snap)[0]
+    assert (ministry["type"], ministry["id"], ministry["super_category_id"]) == ("ministry", "min_transport", "transport")
+
+
+def test_sinhala_tokens_keep_vowel_signs_and_drop_joiners():
+    assert tokenize("ගමන් බලපත්‍ර") == ["ගමන්", "බලපත්ර"]
+    assert tokenize("Driving-Licence (new)") == ["driving", "licence", "new"]
+
+
+def test_ranking_uses_popularity_and_rebuilds_on_new_snapshot():
+    counts = {"Pension Office": 1, "Passport Services": 7}
+    index = AutosuggestIndex(popularity_fn=lambda: counts)
+    snap = CatalogSnapshot(1, CATALOG)
+    assert ids(index.suggest("p", snap)) == ["passport", "pension", "permits"]
+
+    counts = {"Route Permits": 50, "විශ්‍රාම වැටුප් කාර්යාලය": 9}
+    index.popularity_fn = lambda: counts
+    snap2 = CatalogSnapshot(2, CATALOG)
+    # Names starting with the query come first; popularity orders each group
+    assert ids(index.suggest("p", snap2)) == ["pension", "passport", "permits"]
+    assert ids(index.suggest("tra", snap2)) == ["min_transport"]
+    assert index.status()["catalog_version"] == 2
+
+
+def test_repeated_prefixes_are_memoized():
+    index = AutosuggestIndex()
+    snap = CatalogSnapshot(1, CATALOG)
+    first = index.suggest("lic", snap)
+    assert index.suggest("LIC ", snap) is first
+    started = time.perf_counter()
+    for _ in range(1000):
+        index.suggest("lic", snap)
+    assert (time.perf_counter() - started) / 1000 < 0.001
+
+
+def test_prefix_edit_distance_is_bounded():
+    assert prefix_edit_distance("pasport", "passport", 1) == 1
+    assert prefix_edit_distance("paspo", "passport", 1) == 1
+    assert prefix_edit_distance("licence", "license", 1) == 1
+    assert prefix_edit_distance("pension", "passport", 2) is None
+
+
+def test_typos_are_matched_through_trigrams():
+    index = AutosuggestIndex()
+    snap = CatalogSnapshot(1, CATALOG)
+    hits = index.suggest("pasport", snap)
+    assert ids(hits) == ["passport"] and hits[0]["fuzzy"]
+
+    # Exact prefix matches come first, typo matches fill the rest
+    hits = index.suggest("licence", snap)
+    assert ids(hits) == ["licence", "licence:q0"]
+    assert "fuzzy" not in hits[0] and hits[1]["fuzzy"] and hits[1]["type"] == "question"
+    assert ids(index.suggest("renew drivng", snap)) == ["licence:q0"]
+    assert index.suggest("qwerty", snap) == []
+
+
+def test_fuzzy_step_respects_the_time_budget():
+    index = AutosuggestIndex(budget_ms=0)
+    snap = CatalogSnapshot(1, CATALOG)
+    assert index.suggest("pasport", snap) == []
+    assert index.status()["budget_exhausted"] == 1
+    assert not AutosuggestIndex(fuzzy=False).suggest("pasport", snap)
+    # A lookup cut short by the budget is not memoized
+    index.budget_ms = 50
+    assert ids(index.suggest("pasport", snap)) == ["passport"]
+
+
+def test_slow_build_does_not_use_up_the_fuzzy_budget():
+    def slow_popularity():
+        time.sleep(0.05)
+        return {}
+
+    index = AutosuggestIndex(popularity_fn=slow_popularity, budget_ms=20)
+    snap = CatalogSnapshot(1, CATALOG)
+    assert ids(index.suggest("pasport", snap)) == ["passport"]
+    assert index.status()["budget_exhausted"] == 0
+
+    # Built from the reload listener, the first lookup finds the index ready
+    index.rebuild(CatalogSnapshot(2, CATALOG))
+    rebuilds = index.rebuilds
+    assert ids(index.suggest("pasport", index._built.snapshot)) == ["passport"]
+    assert index.rebuilds == rebuilds
@@ -0,0 +1,123 @@
+import json
+import time
+import os, sys, pathlib
+# Ensure project root is on sys.path so the helper modules can be imported when pytest runs from tests folder
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from catalog_cache import CatalogCache, CatalogSnapshot, bump_version, serialize_catalog
+
+
+class FakeServices:
+    """services_col stand-in that counts full-tree reads."""
+    def __init__(self, docs):
+        self.docs = docs
+        self.finds = 0
+
+    def find(self, query, projection=None):
+        self.finds += 1
+        return [json.loads(json.dumps(d)) for d in self.docs]
+
+
+class FakeVersions:
+    def __init__(self):
+        self.docs = {}
+
+    def find_one(self, query, projection=None):
+        doc = self.docs.get(query["name"])
+        return dict(doc) if doc else None
+
+    def find_one_and_update(self, query, update, upsert=False, projection=None, return_document=False):
+        doc = self.docs.setdefault(query["name"], {"name": query["name"], "version": 0})
+        doc["version"] += update["$inc"]["version"]
+        return dict(doc)
+
+
+def make_cache(**kw):
+    services = FakeServices([{"id": "sc1", "name": {"en": "Education"}, "ministries": []}])
+    versions = FakeVersions()
+    return CatalogCache(services, versions, **kw), services, versions
+
+
+def test_catalog_is_served_from_memory_until_the_version_moves():
+    cache, services, versions = make_cache(check_seconds=0)
+    first = cache.get()
+    assert first.docs[0]["id"] == "sc1"
+    assert first.body == serialize_catalog(services.docs)
+    assert cache.get() is first
+    assert services.finds == 1
+
+    # Another worker wrote to the catalog and bumped the shared version
+    services.docs.append({"id": "sc2", "name": {"en": "Health"}, "ministries": []})
+    bump_version(versions)
+    second = cache.get()
+    assert [d["id"] for d in second.docs] == ["sc1", "sc2"]
+    assert second.etag != first.etag
+    assert services.finds == 2
+
+
+def test_local_bump_reloads_on_next_read_and_notifies_listeners():
+    cache, services, versions = make_cache(check_seconds=60)
+    seen = []
+    cache.add_listener(lambda snap: seen.append(len(snap)))
+    cache.get()
+    services.docs = []
+    assert len(cache.get()) == 1            # within check_seconds: no version read
+    assert cache.bump() == 1
+    assert len(cache.get()) == 0
+    assert seen == [1, 0]
+    assert cache.status()["reloads"] == 2
+
+
+def test_max_age_forces_a_reload():
+    cache, services, _ = make_cache(check_seconds=0, max_age_seconds=0.05)
+    cache.get()
+    time.sleep(0.06)
+    cache.get()
+    assert services.finds == 2
+
+
+def test_node_index_finds_any_level_with_parent_pointers():
+    docs = [{"id": "sc1", "name": {"en": "Education"}, "ministries": [
+        {"id": "m1", "name": {"en": "Ministry of Education"}, "subservices": [
+            {"id": "s1", "name": {"en": "Exam certificates"}, "questions": [
+                {"q": {"en": "How do I get my O/L certificate?"}, "answer": {"en": "Apply online."}},
+                {"q": {"en": "What does it cost?"}, "answer": {"en": "Rs. 500"}},
+            ]},
+        ]},
+    ]}]
+    snap = CatalogSnapshot(1, docs)
+    assert snap.node("m1")["node"] is docs[0]["ministries"][0]
+    assert snap.node("m1", "subservice") is None
+    assert snap.node("missing") is None
+
+    question = snap.node("s1:q1")
+    assert question["type"] == "question" and question["parent_id"] == "s1"
+    assert question["node"]["answer"]["en"] == "Rs. 500"
+    assert [e["id"] for e in snap.ancestors("s1:q1")] == ["sc1", "m1", "s1"]
+    assert [e["id"] for e in snap.of_type("ministry")] == ["m1"]
+
+
+def test_levels_are_served_one_at_a_time_with_projection_and_language():
+    docs = [{"id": "sc1", "name": {"en": "Education", "si": "අධ්‍යාපනය"}, "ministries": [
+        {"id": "m1", "name": {"en": "Ministry of Education"}, "profile": {"phone": "011"}, "subservices": [
+            {"id": "s1", "name": {"en": "Exam certificates"}, "questions": [
+                {"q": {"en": "How do I get my O/L certificate?", "ta": "சான்றிதழ்?"}, "answer": {"en": "Apply online."}},
+            ]},
+        ]},
+    ]}]
+    snap = CatalogSnapshot(3, docs)
+    body, etag = snap.level()
+    root = json.loads(body)
+    assert root["type"] == "super_category" and root["catalog_version"] == 3
+    assert root["items"] == [{"id": "sc1", "name": {"en": "Education", "si": "අධ්‍යාපනය"}, "child_count": 1}]
+    assert len(body) < len(snap.body)
+    assert snap.level() == (body, etag)
+
+    ministries = json.loads(snap.level("sc1", ("name",))[0])["items"]
+    assert ministries == [{"id": "m1", "name": {"en": "Ministry of Education"}}]
+    questions = json.loads(snap.level("s1", None, "ta")[0])["items"]
+    assert questions == [{"id": "s1:q0", "q": {"ta": "சான்றிதழ்?"}, "answer": {"en": "Apply online."}}]
+    assert snap.level("s1")[1] != snap.level("s1", None, "ta")[1]
+    assert snap.level("s1:q0") is None and snap.level("missing") is None
@@ -0,0 +1,136 @@
+import threading
+import time
+import os, sys, pathlib
+# Ensure project root is on sys.path so the helper modules can be imported when pytest runs from tests folder
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import numpy as np
+
+from embedding_service import MicroBatchEncoder, ModelRegistry
+
+
+class FakeModel:
+    """Stand-in for SentenceTransformer: row i encodes len(text) so callers can check their row."""
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, convert_to_numpy=True, **kw):
+        self.calls.append(list(texts))
+        return np.array([[float(len(t)), 1.0] for t in texts], dtype=np.float32)
+
+
+def test_concurrent_queries_are_batched_and_rows_returned_to_callers():
+    model = FakeModel()
+    encoder = MicroBatchEncoder(lambda: model, max_batch_size=8, max_wait_ms=50)
+    results = {}
+    barrier = threading.Barrier(8)
+
+    def worker(i):
+        text = "q" * (i + 1)
+        barrier.wait()
+        results[i] = encoder.encode([text])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for i in range(8):
+        assert results[i].shape == (1, 2)
+        assert results[i][0, 0] == i + 1
+    assert len(model.calls) < 8
+    stats = encoder.stats()
+    assert stats["texts"] == 8
+    assert stats["max_observed_batch"] > 1
+
+
+def test_model_errors_propagate_to_callers():
+    def broken():
+        raise RuntimeError("sentence-transformers is not installed on this environment")
+    encoder = MicroBatchEncoder(broken, max_batch_size=4, max_wait_ms=1)
+    try:
+        encoder.encode(["hello"])
+    except RuntimeError as e:
+        assert "not installed" in str(e)
+    else:
+        assert False, "expected RuntimeError"
+
+
+def test_encode_in_chunks_writes_rows_and_reports_progress():
+    from embedding_service import encode_in_chunks
+
+    model = FakeModel()
+    texts = ["a" * (i + 1) for i in range(10)]
+    out = np.zeros((12, 2), dtype=np.float32)
+    rows = np.arange(2, 12)
+    progress = []
+    final = encode_in_chunks(model, texts, out, out_rows=rows, chunk_size=3, workers=2, progress=progress.append)
+
+    assert len(model.calls) == 4
+    assert out[:2].sum() == 0
+    assert out[2:, 0].tolist() == [float(i + 1) for i in range(10)]
+    assert [p["done"] for p in progress][-1] == 10
+    assert final["chunks_done"] == final["chunks_total"] == 4
+
+
+def test_model_registry_loads_once_under_concurrent_first_calls():
+    loads = []
+
+    def loader():
+        loads.append(1)
+        time.sleep(0.1)
+        return FakeModel()
+
+    registry = ModelRegistry(loader)
+    barrier = threading.Barrier(6)
+    models = []
+
+    def worker():
+        barrier.wait()
+        models.append(registry.get())
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(loads) == 1
+    assert all(m is models[0] for m in models)
+    assert registry.status()["state"] == "loaded"
+    assert not registry.ready
+
+
+def test_model_registry_preload_warms_up_and_reports_ready():
+    model = FakeModel()
+    registry = ModelRegistry(lambda: model, warmup_texts=["warm"])
+    assert registry.status()["state"] == "not_loaded"
+    registry.preload()
+    deadline = time.monotonic() + 5
+    while not registry.ready and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    status = registry.status()
+    assert status["ready"] and status["state"] == "ready"
+    assert status["warmup_ms"] is not None
+    assert model.calls == [["warm"]]
+    # Already warm: a second preload does nothing
+    registry.preload()
+    assert model.calls == [["warm"]]
+
+
+def test_model_registry_reports_load_errors():
+    def loader():
+        raise RuntimeError("sentence-transformers is not installed")
+
+    registry = ModelRegistry(loader)
+    try:
+        registry.get()
+    except RuntimeError:
+        pass
+    status = registry.status()
+    assert status["state"] == "error" and not status["ready"]
+    assert "not installed" in status["error"]
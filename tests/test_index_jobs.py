@@ -0,0 +1,40 @@
+import werkzeug
+import os, sys, pathlib
+# Ensure project root is on sys.path so 'app' can be imported when pytest runs from tests folder
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+if not hasattr(werkzeug, "__version__"):
+    werkzeug.__version__ = "3.0.0"
+
+import app as app_module
+
+
+class FakeJobsCol:
+    def __init__(self):
+        self.docs = {}
+
+    def update_one(self, query, update, upsert=False):
+        doc = self.docs.setdefault(query["job_id"], {"logs": []})
+        doc.update(update.get("$set", {}))
+        if "$push" in update:
+            doc["logs"].append(update["$push"]["logs"])
+
+
+def test_job_that_hits_a_running_build_is_skipped_not_completed(monkeypatch):
+    col = FakeJobsCol()
+    monkeypatch.setattr(app_module, "index_jobs_col", col)
+    monkeypatch.setattr(app_module, "build_vector_index",
+                        lambda **kw: {"count": 0, "error": "build_already_running"})
+
+    app_module._run_build_index_background("job-skip")
+    status = app_module.INDEX_JOB_STATUS.pop("job-skip")
+    assert status["status"] == "skipped"
+    assert status["error"] == "build_already_running"
+    assert col.docs["job-skip"]["status"] == "skipped"
+    assert col.docs["job-skip"]["logs"][-1]["msg"] == "job skipped: build_already_running"
+
+    monkeypatch.setattr(app_module, "build_vector_index", lambda **kw: {"count": 0, "error": "numpy_not_installed"})
+    app_module._run_build_index_background("job-fail")
+    assert app_module.INDEX_JOB_STATUS.pop("job-fail")["status"] == "error"
@@ -0,0 +1,45 @@
+import os, sys, pathlib
+# Ensure project root is on sys.path so the helper modules can be imported when pytest runs from tests folder
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import numpy as np
+
+from lexical_index import BM25Index, save_bm25_index, load_bm25_index
+
+DOCS = [
+    {"title": "How to apply for passport?", "content": "Immigration | Passport Services | Fill form K35 at the passport office."},
+    {"title": "Tourist visa", "content": "Immigration | Visa Services | Apply online via ETA."},
+    {"title": "Renew driving licence", "content": "Transport | Driving licence | Visit the DMT with your old licence."},
+]
+
+
+def test_bm25_ranks_by_term_weight_and_roundtrips(tmp_path):
+    index = BM25Index.build(DOCS)
+    hits = index.search("passport form", top_k=5)
+    assert hits[0][1] == 0
+    assert all(row != 2 for _, row in hits)
+    # Stopwords alone match nothing
+    assert index.search("how to the") == []
+    # Row restriction (partition filter)
+    assert [row for _, row in index.search("immigration", rows=np.array([1]))] == [1]
+
+    path = tmp_path / "bm25_index.json"
+    save_bm25_index(path, index)
+    loaded = load_bm25_index(path)
+    assert loaded.n_docs == 3
+    assert loaded.search("licence dmt") == index.search("licence dmt")
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    from vector_index import reciprocal_rank_fusion
+
+    vector = [("a", "A"), ("b", "B"), ("c", "C")]
+    lexical = [("c", "C"), ("d", "D")]
+    fused = reciprocal_rank_fusion([vector, lexical], k=60)
+    # "c" appears in both rankings and overtakes the vector-only winner
+    assert fused[0][1] == "C"
+    assert fused[0][2] == {0: 3, 1: 1}
+    assert [item for _, item, _ in fused] == ["C", "A", "B", "D"]
+    assert len(reciprocal_rank_fusion([vector, lexical], top_k=2)) == 2
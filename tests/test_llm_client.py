@@ -0,0 +1,120 @@
+import json
+import threading
+import time
+import os, sys, pathlib
+# Ensure project root is on sys.path so the helper modules can be imported when pytest runs from tests folder
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from llm_client import LLMClient, LLMBusy, LLMError, LLMTimeout, LLMUnavailable, CircuitBreaker
+
+TOKENS = ["Apply ", "at the ", "passport office."]
+
+
+class StubOpenRouter(BaseHTTPRequestHandler):
+    """Minimal stand-in for the OpenRouter chat completions API."""
+    delay = 0.0
+    hits = 0
+
+    def do_POST(self):
+        StubOpenRouter.hits += 1
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(self.delay)
+        if body["messages"][0]["content"] == "fail":
+            self.send_response(503)
+            self.end_headers()
+            return
+        self.send_response(200)
+        if body.get("stream"):
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            self.wfile.write(b": keep-alive\n\n")
+            for tok in TOKENS:
+                chunk = {"choices": [{"delta": {"content": tok}}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+        else:
+            data = json.dumps({"choices": [{"message": {"content": "".join(TOKENS)}}]}).encode()
+            try:
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            except BrokenPipeError:
+                pass  # the client timed out and hung up
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOpenRouter)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/api/v1/chat/completions"
+    server.shutdown()
+    StubOpenRouter.delay = 0.0
+    StubOpenRouter.hits = 0
+
+
+def test_stream_yields_tokens_and_complete_returns_answer(stub_url):
+    client = LLMClient(url=stub_url, api_key="test", timeout=5, backoff_base=0)
+    assert list(client.stream("how do I get a passport?")) == TOKENS
+    assert client.complete("how do I get a passport?") == "".join(TOKENS)
+    with pytest.raises(LLMError):
+        list(client.stream("fail"))
+    assert client.stats()["in_flight"] == 0
+
+
+def test_calls_beyond_the_pool_fail_fast(stub_url):
+    StubOpenRouter.delay = 0.5
+    client = LLMClient(url=stub_url, api_key="test", max_concurrency=1, timeout=5, queue_timeout=0.05)
+    slow = threading.Thread(target=client.complete, args=("first",))
+    slow.start()
+    time.sleep(0.1)
+    with pytest.raises(LLMBusy):
+        client.complete("second")
+    slow.join()
+    assert client.stats()["busy_rejections"] == 1
+
+
+def test_breaker_opens_after_failures_and_fails_fast(stub_url):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.3)
+    client = LLMClient(url=stub_url, api_key="test", timeout=5, max_retries=1, backoff_base=0, breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(LLMError):
+            client.complete("fail")
+    # One retry per call against the stub, then the breaker opens
+    assert StubOpenRouter.hits == 4
+    stats = client.stats()
+    assert stats["breaker"]["state"] == "open"
+    assert stats["retries"] == 2
+    assert stats["latency"]["count"] == 4
+
+    with pytest.raises(LLMUnavailable):
+        client.complete("how do I get a passport?")
+    assert StubOpenRouter.hits == 4
+
+    # After the reset timeout a trial call goes through and closes the breaker again
+    time.sleep(0.35)
+    assert client.complete("how do I get a passport?") == "".join(TOKENS)
+    assert client.stats()["breaker"]["state"] == "closed"
+
+
+def test_retries_share_one_deadline(stub_url):
+    StubOpenRouter.delay = 0.5
+    client = LLMClient(url=stub_url, api_key="test", timeout=0.3, connect_timeout=0.2, max_retries=3, backoff_base=0)
+    started = time.monotonic()
+    with pytest.raises(LLMTimeout):
+        client.complete("how do I get a passport?")
+    assert time.monotonic() - started < 0.6
+    # The slow attempt used up the deadline, so no retry was started and the slot is free again
+    time.sleep(0.1)
+    assert StubOpenRouter.hits == 1
+    assert client.stats()["in_flight"] == 0
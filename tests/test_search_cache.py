@@ -0,0 +1,81 @@
+import os, sys, pathlib
+# Ensure project root is on sys.path so the helper modules can be imported when pytest runs from tests folder
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import time
+
+import numpy as np
+
+from search_cache import LRUCache, SearchCache, SemanticAnswerCache, answer_scope, normalize_query
+from vector_index import ResidentIndex
+
+
+def test_lru_eviction_and_counters():
+    cache = LRUCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1      # "a" is now most recent
+    cache.put("c", 3)               # evicts "b"
+    assert cache.get("b") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+
+
+def test_hits_are_invalidated_on_index_swap(tmp_path):
+    assert normalize_query("  How to  apply for PASSPORT ") == "how to apply for passport"
+    cache = SearchCache(max_size=10)
+    resident = ResidentIndex(tmp_path / "faiss.index", tmp_path / "meta.json", tmp_path / "emb.npy")
+    resident.add_listener(cache.on_index_swap)
+
+    cache.embeddings.put("visa services", "EMB")
+    cache.hits.put(("digest", 5, 1), ["hit"])
+    resident.publish([{"doc_id": "x"}])
+
+    assert len(cache.hits) == 0
+    assert cache.embeddings.get("visa services") == "EMB"
+    assert cache.stats()["invalidations"] == 1
+
+
+def _unit(v):
+    v = np.asarray(v, dtype=np.float32)
+    return v / np.linalg.norm(v)
+
+
+def test_answer_cache_matches_near_duplicates_within_scope_and_version():
+    cache = SemanticAnswerCache(threshold=0.95, ttl_seconds=60)
+    scope = answer_scope({"ministry_id": "m1"}, "vector", 5)
+    q = _unit([1.0, 0.0, 0.0, 0.0])
+    cache.store(q, scope, "v1", "Apply at the passport office.", [{"id": "s1"}])
+
+    hit = cache.lookup(_unit([1.0, 0.05, 0.0, 0.0]), scope, "v1")
+    assert hit["answer"] == "Apply at the passport office."
+    assert hit["sources"] == [{"id": "s1"}]
+    assert hit["similarity"] >= 0.95
+
+    # A different question, another ministry scope or a newer index build all miss
+    assert cache.lookup(_unit([0.6, 0.8, 0.0, 0.0]), scope, "v1") is None
+    assert cache.lookup(q, answer_scope({"ministry_id": "m2"}, "vector", 5), "v1") is None
+    assert cache.lookup(q, scope, "v2") is None
+    assert cache.lookup(q, scope, "v1") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 4
+
+
+def test_answer_cache_expiry_and_invalidation():
+    cache = SemanticAnswerCache(ttl_seconds=0.05)
+    scope = answer_scope({}, "hybrid", 5)
+    q = _unit([0.0, 1.0, 0.0, 0.0])
+    cache.store(q, scope, "v1", "answer", [])
+    time.sleep(0.1)
+    assert cache.lookup(q, scope, "v1") is None
+
+    cache = SemanticAnswerCache(ttl_seconds=60)
+    cache.store(q, scope, "v1", "answer", [])
+    cache.invalidate()
+    assert cache.lookup(q, scope, "v1") is None
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,238 @@
+import json
+import os, sys, pathlib
+# Ensure project root is on sys.path so the helper modules can be imported when pytest runs from tests folder
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import numpy as np
+
+from vector_index import ResidentIndex
+from meta_store import save_meta_store
+
+
+def _write_index_files(tmp_path, docs, emb):
+    meta_path = tmp_path / "vector_meta.bin"
+    emb_path = tmp_path / "embeddings.npy"
+    save_meta_store(meta_path, docs)
+    np.save(emb_path, emb)
+    return ResidentIndex(tmp_path / "faiss.index", meta_path, emb_path)
+
+
+def test_resident_index_loads_once_and_swaps(tmp_path):
+    docs = [{"doc_id": "a", "title": "A"}, {"doc_id": "b", "title": "B"}]
+    emb = np.eye(2, dtype=np.float32)
+    resident = _write_index_files(tmp_path, docs, emb)
+
+    snap = resident.get(use_faiss=False)
+    assert snap.backend == "numpy"
+    assert len(snap) == 2
+    # Second call must return the same object without touching disk
+    os.remove(tmp_path / "embeddings.npy")
+    assert resident.get(use_faiss=False) is snap
+
+    # Publishing a new index leaves the old snapshot intact for in-flight readers
+    new_snap = resident.publish([{"doc_id": "c"}], embeddings=np.ones((1, 2), dtype=np.float32))
+    assert resident.get() is new_snap
+    assert new_snap.version > snap.version
+    assert snap.meta[0]["doc_id"] == "a"
+    assert resident.status()["documents"] == 1
+
+
+def test_quantized_store_is_memory_mapped_and_close_to_float32(tmp_path):
+    from embedding_store import save_embedding_store, load_embedding_store
+
+    rng = np.random.default_rng(1)
+    emb = rng.normal(size=(50, 16)).astype(np.float32)
+    emb /= np.linalg.norm(emb, axis=1, keepdims=True)
+    q = emb[3]
+    exact = emb @ q
+
+    for dtype in ("float32", "float16", "int8"):
+        path = tmp_path / f"emb_{dtype}.npy"
+        save_embedding_store(path, emb, dtype=dtype)
+        store = load_embedding_store(path, mmap=True)
+        assert store.memory_mapped
+        assert store.dtype == dtype
+        scores = store.dot(q)
+        assert np.abs(scores - exact).max() < 0.02
+        assert int(np.argmax(scores)) == 3
+
+
+def test_top_k_rows_matches_full_sort_for_query_batches():
+    from vector_index import top_k_rows, IndexSnapshot
+
+    rng = np.random.default_rng(2)
+    scores = rng.normal(size=(3, 200)).astype(np.float32)
+    top_scores, top_rows = top_k_rows(scores, 5)
+    assert top_rows.shape == (3, 5)
+    for qi in range(3):
+        expected = np.argsort(-scores[qi])[:5]
+        assert top_rows[qi].tolist() == expected.tolist()
+        assert np.allclose(top_scores[qi], scores[qi][expected])
+    # k larger than the corpus returns every row, best first
+    assert top_k_rows(scores[:, :4], 10)[1].shape == (3, 4)
+
+    emb = np.eye(4, dtype=np.float32)
+    snap = IndexSnapshot(1, [{"doc_id": str(i)} for i in range(4)], embeddings=emb)
+    results = snap.search_embeddings(emb[[2, 0]], 2)
+    assert [m["doc_id"] for _, m in results[0]][0] == "2"
+    assert [m["doc_id"] for _, m in results[1]][0] == "0"
+    assert results[0][0][0] == 1.0
+
+
+def test_incremental_build_plan_reuses_unchanged_docs():
+    from vector_index import content_hash, plan_incremental_build
+
+    prev = [
+        {"doc_id": "a", "content_hash": content_hash("alpha", "m")},
+        {"doc_id": "b", "content_hash": content_hash("beta", "m")},
+        {"doc_id": "gone", "content_hash": content_hash("old", "m")},
+    ]
+    docs = [
+        {"doc_id": "b", "content_hash": content_hash("beta", "m")},
+        {"doc_id": "a", "content_hash": content_hash("alpha v2", "m")},
+        {"doc_id": "new", "content_hash": content_hash("fresh", "m")},
+    ]
+    reuse, to_encode, counts = plan_incremental_build(docs, prev)
+    assert reuse == {0: 1}
+    assert to_encode == [1, 2]
+    assert counts == {"added": 1, "updated": 1, "reused": 1, "removed": 1}
+    # A different model invalidates every hash
+    assert content_hash("alpha", "m") != content_hash("alpha", "other")
+
+
+def test_filtered_search_only_scores_the_partition():
+    from vector_index import IndexSnapshot
+
+    meta = [
+        {"doc_id": "0", "super_category_id": "sc1", "ministry_id": "m1"},
+        {"doc_id": "1", "super_category_id": "sc1", "ministry_id": "m2"},
+        {"doc_id": "2", "super_category_id": "sc2", "ministry_id": "m3"},
+        {"doc_id": "3", "super_category_id": "sc1", "ministry_id": "m2"},
+    ]
+    emb = np.eye(4, dtype=np.float32)
+    snap = IndexSnapshot(1, meta, embeddings=emb)
+
+    assert snap.filter_rows({}) is None
+    assert snap.filter_rows({"ministry_id": "m2"}).tolist() == [1, 3]
+    assert snap.filter_rows({"super_category_id": "sc1", "ministry_id": "m3"}).tolist() == []
+    assert snap.filter_rows({"ministry_id": "missing"}).tolist() == []
+
+    # Query closest to row 0, but scoped to ministry m2: only rows 1 and 3 may come back
+    q = np.array([[1.0, 0.2, 0.0, 0.1]], dtype=np.float32)
+    results = snap.search_embeddings(q, 5, rows=snap.filter_rows({"ministry_id": "m2"}))[0]
+    assert [m["doc_id"] for _, m in results] == ["1", "3"]
+
+
+def test_partitions_are_read_from_meta_store_columns(tmp_path, monkeypatch):
+    from vector_index import IndexSnapshot, FILTER_FIELDS
+    from meta_store import MetaStore, load_meta_store
+
+    meta = [
+        {"doc_id": "0", "super_category_id": "sc1", "ministry_id": "m1"},
+        {"doc_id": "1", "super_category_id": "sc1", "ministry_id": "m2"},
+        {"doc_id": "2", "super_category_id": "sc2"},
+        {"doc_id": "3", "super_category_id": "sc1", "ministry_id": "m2", "subservice_id": "s9"},
+    ]
+    path = tmp_path / "vector_meta.bin"
+    save_meta_store(path, meta, columns=FILTER_FIELDS)
+    store = load_meta_store(path)
+    assert store.column("ministry_id")[0] == ["m1", "m2"]
+    assert store.column("title") is None
+
+    # Neither the partitions nor the snapshot itself may decode a row
+    def no_decode(self, i):
+        raise AssertionError("row decoded")
+    monkeypatch.setattr(MetaStore, "__getitem__", no_decode)
+    snap = IndexSnapshot(1, store, embeddings=np.eye(4, dtype=np.float32))
+    assert snap.filter_rows({"ministry_id": "m2"}).tolist() == [1, 3]
+    assert snap.filter_rows({"super_category_id": "sc1", "ministry_id": "m2"}).tolist() == [1, 3]
+    assert snap.filter_rows({"subservice_id": "s9"}).tolist() == [3]
+    assert snap.filter_rows({"ministry_id": "missing"}).tolist() == []
+    monkeypatch.undo()
+
+    # A store written without columns still partitions by decoding its rows
+    save_meta_store(path, meta)
+    snap = IndexSnapshot(2, load_meta_store(path), embeddings=np.eye(4, dtype=np.float32))
+    assert snap.filter_rows({"ministry_id": "m2"}).tolist() == [1, 3]
+
+
+def test_index_type_is_chosen_by_size_and_searchable():
+    import pytest
+    faiss = pytest.importorskip("faiss")
+    from vector_index import choose_index_type, build_faiss_index, IndexSnapshot
+
+    assert choose_index_type(100) == "flat"
+    assert choose_index_type(50000) == "hnsw"
+    assert choose_index_type(10 ** 6) == "ivfpq"
+    assert choose_index_type(10 ** 6, "flat") == "flat"
+
+    rng = np.random.default_rng(0)
+    emb = rng.normal(size=(300, 16)).astype(np.float32)
+    emb /= np.linalg.norm(emb, axis=1, keepdims=True)
+    index, info = build_faiss_index(emb, "hnsw", {"hnsw_m": 8, "ef_search": 32})
+    assert info == {"index_type": "hnsw", "params": {"hnsw_m": 8, "ef_construction": 80, "ef_search": 32}}
+    # Too few vectors to train product quantizers: falls back to HNSW
+    assert build_faiss_index(emb, "ivfpq")[1]["index_type"] == "hnsw"
+
+    meta = [{"doc_id": str(i), "ministry_id": "m%d" % (i % 3)} for i in range(300)]
+    snap = IndexSnapshot(1, meta, faiss_index=index, info=info)
+    top = snap.search_faiss(emb[:1], 1)[0]
+    assert top[0][1]["doc_id"] == "0"
+    scoped = snap.search_faiss(emb[:1], 5, rows=snap.filter_rows({"ministry_id": "m1"}))[0]
+    assert scoped and all(m["ministry_id"] == "m1" for _, m in scoped)
+
+
+def test_meta_store_random_access_and_legacy_json(tmp_path):
+    from meta_store import load_meta_store, meta_store_count
+
+    docs = [{"doc_id": str(i), "title": "Título %d" % i} for i in range(50)]
+    path = tmp_path / "vector_meta.bin"
+    save_meta_store(path, docs)
+    assert meta_store_count(path) == 50
+    store = load_meta_store(path)
+    assert len(store) == 50
+    assert store[37] == docs[37]
+    assert store[-1]["doc_id"] == "49"
+    assert list(store)[:2] == docs[:2]
+    try:
+        store[50]
+    except IndexError:
+        pass
+    else:
+        assert False, "expected IndexError"
+    assert meta_store_count(tmp_path / "missing.bin") == 0
+
+    # An index written before the sidecar still loads from its JSON metadata
+    legacy = tmp_path / "faiss_meta.json"
+    with open(legacy, "w", encoding="utf-8") as f:
+        json.dump(docs[:3], f)
+    np.save(tmp_path / "embeddings.npy", np.eye(3, dtype=np.float32))
+    resident = ResidentIndex(tmp_path / "faiss.index", tmp_path / "none.bin", tmp_path / "embeddings.npy",
+                             legacy_meta_path=legacy)
+    assert len(resident.get(use_faiss=False)) == 3
+
+
+def test_manifest_points_at_versioned_files_and_old_ones_are_pruned(tmp_path):
+    from vector_index import index_file, prune_index_files, save_index_manifest, versioned_path
+
+    meta_path, emb_path = tmp_path / "vector_meta.bin", tmp_path / "embeddings.npy"
+    manifest_path = tmp_path / "index_manifest.json"
+    resident = ResidentIndex(tmp_path / "faiss.index", meta_path, emb_path, manifest_path=manifest_path)
+    for version, n in (("v1", 2), ("v2", 3)):
+        save_meta_store(versioned_path(meta_path, version), [{"doc_id": str(i)} for i in range(n)])
+        np.save(versioned_path(emb_path, version), np.eye(n, dtype=np.float32))
+        manifest = {"version": version, "index_type": "numpy",
+                    "files": {"meta": f"vector_meta-{version}.bin", "embeddings": f"embeddings-{version}.npy"}}
+        save_index_manifest(manifest_path, manifest)
+        snap = resident.reload(use_faiss=False)
+        assert len(snap) == n and snap.embeddings.shape == (n, n)
+
+    # Each build keeps its own file names; only the manifest pointer moves
+    assert index_file(meta_path, manifest, "meta") == tmp_path / "vector_meta-v2.bin"
+    assert index_file(meta_path, {}, "meta") == meta_path
+    # A build that could not write a file must not be paired with an older one
+    assert index_file(meta_path, {"files": {"embeddings": "embeddings-v3.npy"}}, "meta") is None
+    assert prune_index_files(meta_path, [tmp_path / "vector_meta-v2.bin"]) == 1
+    assert sorted(p.name for p in tmp_path.glob("vector_meta*")) == ["vector_meta-v2.bin"]
@@ -0,0 +1,110 @@
+import pytest
+import werkzeug
+import os, sys, pathlib
+# Ensure project root is on sys.path so 'app' can be imported when pytest runs from tests folder
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+if not hasattr(werkzeug, "__version__"):
+    werkzeug.__version__ = "3.0.0"
+
+from app import app, db, save_vector_docs, prune_vector_docs, fetch_vector_docs, iter_vector_docs
+from gridfs import GridFSBucket
+from gridfs_artifacts import put_stream, put_file, get_to_file, file_sha256, delete_files
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as c:
+        with c.session_transaction() as sess:
+            sess['admin_logged_in'] = True
+        yield c
+
+
+@pytest.fixture
+def scratch_vector_docs(monkeypatch):
+    """A throwaway collection in place of vector_docs: pruning deletes every other version."""
+    import uuid
+    import app as app_module
+    col = db["test_vector_docs_%s" % uuid.uuid4().hex[:12]]
+    monkeypatch.setattr(app_module, "vector_docs_col", col)
+    try:
+        yield col
+    finally:
+        col.drop()
+
+
+def test_vector_docs_are_stored_per_row_and_fetched_by_id(scratch_vector_docs):
+    old, new = "test-old", "test-new"
+    save_vector_docs(old, [{"doc_id": "old-%d" % i} for i in range(5)], batch_size=2)
+    save_vector_docs(new, [{"doc_id": "new-%d" % i} for i in range(3)], batch_size=2)
+
+    assert [d["doc_id"] for d in fetch_vector_docs(new, [2, 0])] == ["new-2", "new-0"]
+    assert fetch_vector_docs(new, [9]) == [None]
+    assert [d["doc_id"] for d in iter_vector_docs(new)] == ["new-0", "new-1", "new-2"]
+
+    prune_vector_docs(new)
+    assert scratch_vector_docs.count_documents({"index_version": old}) == 0
+    assert scratch_vector_docs.count_documents({"index_version": new}) == 3
+
+
+def test_admin_vector_meta_is_summary_only(client):
+    resp = client.get('/api/admin/vector_meta')
+    assert resp.status_code == 200
+    meta = resp.get_json().get('meta')
+    if meta:
+        assert 'docs' not in meta
+        paged = client.get('/api/admin/vector_meta?page=1&page_size=2').get_json()
+        if meta.get('index_version'):
+            assert len(paged['rows']) <= 2
+
+
+class FakePointerCol:
+    """vector_meta stand-in holding only the "current" pointer."""
+    def __init__(self, pointer):
+        self.pointer = pointer
+
+    def find_one(self, query, projection=None):
+        return dict(self.pointer) if query.get("name") == "current" else None
+
+
+def test_admin_vector_meta_serializes_artifact_refs(client, monkeypatch):
+    import app as app_module
+    from bson import ObjectId
+    from datetime import datetime, timezone
+
+    pointer = {"_id": ObjectId(), "name": "current", "index_version": "v1", "meta_count": 3,
+               "updated": datetime.now(timezone.utc),
+               "artifacts": {"faiss": {"file_id": ObjectId(), "sha256": "abc", "length": 10},
+                             "embeddings": {"file_id": ObjectId(), "sha256": "def", "length": 20}}}
+    monkeypatch.setattr(app_module, "db", {"vector_meta": FakePointerCol(pointer)})
+    resp = client.get('/api/admin/vector_meta')
+    assert resp.status_code == 200
+    meta = resp.get_json()['meta']
+    assert meta['artifacts'] == {"faiss": {"sha256": "abc", "length": 10},
+                                 "embeddings": {"sha256": "def", "length": 20}}
+    assert meta['index_version'] == "v1"
+
+
+def test_artifacts_stream_through_gridfs_with_checksums(tmp_path):
+    bucket = GridFSBucket(db)
+    src = tmp_path / "src.bin"
+    src.write_bytes(os.urandom(3 * 1024 * 1024 + 17))
+    ref = put_file(bucket, src, "test-artifact.bin", metadata={"kind": "test"})
+    streamed = put_stream(bucket, "test-stream.bin", lambda w: [w.write(b"x" * 1000) for _ in range(5)])
+    try:
+        assert ref["sha256"] == file_sha256(src)
+        assert ref["length"] == src.stat().st_size
+        dst = tmp_path / "dst.bin"
+        assert get_to_file(bucket, ref["file_id"], dst, sha256=ref["sha256"])["sha256"] == ref["sha256"]
+        assert dst.read_bytes() == src.read_bytes()
+        assert streamed["length"] == 5000
+
+        # A checksum mismatch leaves the existing local file untouched
+        with pytest.raises(ValueError):
+            get_to_file(bucket, streamed["file_id"], dst, sha256=ref["sha256"])
+        assert dst.read_bytes() == src.read_bytes()
+    finally:
+        delete_files(bucket, [ref["file_id"], streamed["file_id"]])
@@ -0,0 +1,548 @@
+"""Resident vector index used by the AI search endpoints.
+
+The FAISS index (or the NumPy embeddings matrix) and the document metadata are
+loaded once per process and kept in memory as an immutable snapshot. Rebuilds
+and GridFS loads produce a brand new snapshot which is swapped in with a single
+reference assignment, so a search that already grabbed the old snapshot keeps
+using it until it finishes and never sees a half-loaded index.
+"""
+import hashlib
+import json
+import os
+import pathlib
+import threading
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+from embedding_store import EmbeddingStore, load_embedding_store
+from lexical_index import BM25Index, load_bm25_index
+from meta_store import MetaStore, load_meta_store
+
+
+# Metadata fields that can scope a search to one partition of the corpus.
+FILTER_FIELDS = ("super_category_id", "ministry_id", "subservice_id")
+
+
+def top_k_rows(scores, k):
+    """Select the k best columns of each row of `scores` (n_queries, n_rows).
+
+    Uses argpartition so only the k winners are sorted; cost grows with the
+    corpus linearly and with k log k, not n log n. Returns (top_scores,
+    top_rows), both (n_queries, k) and best first.
+    """
+    scores = np.atleast_2d(scores)
+    n_queries, n_rows = scores.shape
+    k = max(0, min(int(k), n_rows))
+    if k == 0:
+        return np.zeros((n_queries, 0), dtype=scores.dtype), np.zeros((n_queries, 0), dtype=np.int64)
+    if k < n_rows:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        part = np.broadcast_to(np.arange(n_rows), (n_queries, n_rows))
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1, kind="stable")
+    return np.take_along_axis(part_scores, order, axis=1), np.take_along_axis(part, order, axis=1)
+
+
+def content_hash(text, model_name=""):
+    """Hash of the exact text that gets embedded (and the model), used to skip re-encoding."""
+    h = hashlib.sha1()
+    h.update((model_name or "").encode("utf-8"))
+    h.update(b"\0")
+    h.update((text or "").encode("utf-8"))
+    return h.hexdigest()
+
+
+def plan_incremental_build(docs, prev_meta):
+    """Decide which docs can reuse a previous vector.
+
+    `docs` and `prev_meta` carry `doc_id` and `content_hash`. Returns
+    (reuse, to_encode, counts) where `reuse` maps new row -> previous row and
+    `to_encode` lists the new rows that need a fresh embedding.
+    """
+    prev_rows = {}
+    for row, m in enumerate(prev_meta or []):
+        if m.get("doc_id") is not None and m.get("content_hash"):
+            prev_rows.setdefault(m["doc_id"], (m["content_hash"], row))
+
+    reuse = {}
+    to_encode = []
+    counts = {"added": 0, "updated": 0, "reused": 0, "removed": 0}
+    seen = set()
+    for row, d in enumerate(docs):
+        doc_id = d.get("doc_id")
+        seen.add(doc_id)
+        prev = prev_rows.get(doc_id)
+        if prev is None:
+            counts["added"] += 1
+            to_encode.append(row)
+        elif prev[0] != d.get("content_hash"):
+            counts["updated"] += 1
+            to_encode.append(row)
+        else:
+            counts["reused"] += 1
+            reuse[row] = prev[1]
+    counts["removed"] = sum(1 for doc_id in prev_rows if doc_id not in seen)
+    return reuse, to_encode, counts
+
+
+def snapshot_vectors(snapshot):
+    """Float32 copy of every vector in `snapshot`, or None if they cannot be recovered."""
+    if snapshot is None:
+        return None
+    if snapshot.embeddings is not None:
+        return snapshot.embeddings.to_float32()
+    if snapshot.faiss_index is not None:
+        try:
+            return snapshot.faiss_index.reconstruct_n(0, snapshot.faiss_index.ntotal)
+        except Exception:
+            return None
+    return None
+
+
+INDEX_TYPES = ("flat", "hnsw", "ivfpq")
+
+# Corpus sizes at which "auto" moves from brute force to graph and then to compressed IVF.
+AUTO_HNSW_MIN_DOCS = 20000
+AUTO_IVFPQ_MIN_DOCS = 500000
+
+
+def choose_index_type(n_docs, configured="auto"):
+    """Resolve the configured FAISS index type ("auto", "flat", "hnsw", "ivfpq") for a corpus size."""
+    configured = (configured or "auto").lower()
+    if configured in INDEX_TYPES:
+        return configured
+    if n_docs >= AUTO_IVFPQ_MIN_DOCS:
+        return "ivfpq"
+    if n_docs >= AUTO_HNSW_MIN_DOCS:
+        return "hnsw"
+    return "flat"
+
+
+def build_faiss_index(embeddings, index_type="flat", params=None):
+    """Build an inner-product FAISS index of the requested type.
+
+    Returns (index, info) where info records the type actually built and its
+    parameters, for storing in the vector meta. IVF-PQ needs enough vectors to
+    train its quantizers; smaller corpora fall back to HNSW.
+    """
+    import faiss
+
+    params = dict(params or {})
+    x = np.ascontiguousarray(embeddings, dtype=np.float32)
+    n, dim = x.shape
+
+    if index_type == "ivfpq":
+        nlist = int(params.get("nlist") or max(1, min(65536, int(4 * np.sqrt(n)))))
+        pq_m = int(params.get("pq_m") or next(m for m in (64, 48, 32, 24, 16, 8, 4, 2, 1) if dim % m == 0))
+        nbits = int(params.get("pq_nbits", 8))
+        if n < max(39 * nlist, 2 ** nbits * 39):
+            print(f"IVF-PQ needs more training vectors than {n}; building HNSW instead.")
+            index_type = "hnsw"
+        else:
+            quantizer = faiss.IndexFlatIP(dim)
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m, nbits, faiss.METRIC_INNER_PRODUCT)
+            index.train(x)
+            index.add(x)
+            index.nprobe = int(params.get("nprobe") or max(1, min(nlist, nlist // 16 or 1)))
+            return index, {"index_type": "ivfpq", "params": {"nlist": nlist, "pq_m": pq_m, "pq_nbits": nbits, "nprobe": index.nprobe}}
+
+    if index_type == "hnsw":
+        m = int(params.get("hnsw_m", 32))
+        index = faiss.IndexHNSWFlat(dim, m, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = int(params.get("ef_construction", 80))
+        index.hnsw.efSearch = int(params.get("ef_search", 64))
+        index.add(x)
+        return index, {"index_type": "hnsw", "params": {"hnsw_m": m, "ef_construction": index.hnsw.efConstruction, "ef_search": index.hnsw.efSearch}}
+
+    index = faiss.IndexFlatIP(dim)
+    index.add(x)
+    return index, {"index_type": "flat", "params": {}}
+
+
+def save_index_manifest(path, manifest):
+    """Write the small JSON manifest describing the on-disk index (type, params, counts)."""
+    path = pathlib.Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, default=str)
+    os.replace(tmp, path)
+
+
+def load_index_manifest(path):
+    path = pathlib.Path(path)
+    if not path.exists():
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f) or {}
+    except Exception as e:
+        print(f"Warning: could not read index manifest {path}: {e}")
+        return {}
+
+
+def versioned_path(path, version):
+    """`data/embeddings.npy` -> `data/embeddings-<version>.npy`.
+
+    Memory-mapped files are written under a new name per build and the manifest is
+    pointed at them, because a mapped file cannot be replaced in place on Windows.
+    """
+    path = pathlib.Path(path)
+    return path.with_name(f"{path.stem}-{version}{path.suffix}")
+
+
+def index_file(path, manifest, kind):
+    """The `kind` file ("meta", "embeddings", "lexical") the manifest points at, next to `path`.
+
+    Manifests written before versioned files carry no pointer; `path` itself is used then.
+    None when the manifest lists files but not this one (its build could not write it):
+    an older file under the fixed name would not match the other files.
+    """
+    path = pathlib.Path(path)
+    files = (manifest or {}).get("files")
+    if files is None:
+        return path
+    name = files.get(kind)
+    return path.with_name(name) if name else None
+
+
+def prune_index_files(path, keep):
+    """Delete the versioned siblings of `path` other than those in `keep`.
+
+    Files that cannot be deleted yet (still mapped by a process on Windows) are
+    left for the next build's pass. Returns the number of files removed.
+    """
+    path = pathlib.Path(path)
+    keep = {pathlib.Path(k).name for k in keep}
+    removed = 0
+    for old in path.parent.glob(f"{path.stem}-*{path.suffix}"):
+        if old.name in keep:
+            continue
+        try:
+            old.unlink()
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def apply_search_params(index, params):
+    """Re-apply query-time knobs (nprobe / efSearch) recorded in the vector meta."""
+    params = params or {}
+    if hasattr(index, "nprobe") and params.get("nprobe"):
+        index.nprobe = int(params["nprobe"])
+    if hasattr(index, "hnsw") and params.get("ef_search"):
+        index.hnsw.efSearch = int(params["ef_search"])
+    return index
+
+
+def _selector_params(index, rows):
+    import faiss
+    sel = faiss.IDSelectorBatch(rows)
+    if hasattr(index, "nprobe"):
+        return faiss.SearchParametersIVF(sel=sel, nprobe=index.nprobe)
+    if hasattr(index, "hnsw"):
+        return faiss.SearchParametersHNSW(sel=sel, efSearch=index.hnsw.efSearch)
+    return faiss.SearchParameters(sel=sel)
+
+
+def reciprocal_rank_fusion(rankings, k=60, top_k=None):
+    """Fuse several best-first rankings of (key, item) pairs with RRF.
+
+    Each item scores sum(1 / (k + rank)) over the rankings it appears in (rank
+    starting at 1). Returns [(score, item, {ranking_no: rank}), ...] best first.
+    """
+    fused = {}
+    for source, ranking in enumerate(rankings):
+        for rank, (key, item) in enumerate(ranking, start=1):
+            entry = fused.get(key)
+            if entry is None:
+                entry = fused[key] = [0.0, item, {}]
+            entry[0] += 1.0 / (k + rank)
+            entry[2][source] = rank
+    ranked = sorted(fused.values(), key=lambda e: e[0], reverse=True)
+    if top_k is not None:
+        ranked = ranked[:top_k]
+    return [(score, item, ranks) for score, item, ranks in ranked]
+
+
+class IndexSnapshot:
+    """Immutable view of one loaded index version."""
+
+    def __init__(self, version, meta, faiss_index=None, embeddings=None, lexical=None, info=None):
+        self.version = version
+        self.meta = meta
+        self.faiss_index = faiss_index
+        # Manifest of the build this snapshot came from (index type, params, ...)
+        self.info = info or {}
+        # BM25 postings over the same rows; built from meta on first use if not supplied
+        if lexical is not None and lexical.n_docs != len(meta):
+            lexical = None
+        self._lexical = lexical
+        self._lexical_lock = threading.Lock()
+        # Always an EmbeddingStore (possibly memory-mapped) or None.
+        if embeddings is not None and not isinstance(embeddings, EmbeddingStore):
+            embeddings = EmbeddingStore.from_array(embeddings)
+        self.embeddings = embeddings
+        self._partitions = None
+        self._partitions_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.meta)
+
+    @property
+    def lexical(self):
+        lexical = self._lexical
+        if lexical is not None:
+            return lexical
+        with self._lexical_lock:
+            if self._lexical is None:
+                self._lexical = BM25Index.build(self.meta)
+            return self._lexical
+
+    def _column_partitions(self):
+        """Partitions from the metadata store's filter columns, or None if it has none."""
+        column = getattr(self.meta, "column", None)
+        if column is None:
+            return None
+        parts = {}
+        for field in FILTER_FIELDS:
+            stored = column(field)
+            if stored is None:
+                return None
+            values, buf = stored
+            codes = np.frombuffer(buf, dtype="<i4")
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(values) + 1))
+            parts[field] = {
+                value: order[bounds[i]:bounds[i + 1]].astype(np.int64)
+                for i, value in enumerate(values)
+            }
+        return parts
+
+    def partitions(self):
+        """field -> value -> sorted row ids, built once per snapshot on first filtered search."""
+        parts = self._partitions
+        if parts is not None:
+            return parts
+        with self._partitions_lock:
+            if self._partitions is None:
+                self._partitions = self._column_partitions()
+            if self._partitions is None:
+                grouped = {field: {} for field in FILTER_FIELDS}
+                for row, m in enumerate(self.meta):
+                    for field in FILTER_FIELDS:
+                        value = m.get(field)
+                        if value is not None:
+                            grouped[field].setdefault(value, []).append(row)
+                self._partitions = {
+                    field: {value: np.asarray(rows, dtype=np.int64) for value, rows in values.items()}
+                    for field, values in grouped.items()
+                }
+            return self._partitions
+
+    def filter_rows(self, filters):
+        """Row ids matching every filter, or None when no filter is set."""
+        filters = {k: v for k, v in (filters or {}).items() if k in FILTER_FIELDS and v}
+        if not filters:
+            return None
+        parts = self.partitions()
+        rows = None
+        for field, value in filters.items():
+            field_rows = parts[field].get(value)
+            if field_rows is None:
+                return np.zeros(0, dtype=np.int64)
+            rows = field_rows if rows is None else np.intersect1d(rows, field_rows, assume_unique=True)
+        return rows
+
+    def search_faiss(self, queries, top_k, rows=None):
+        """Search the FAISS index. Returns one [(score, meta), ...] list per query row.
+
+        `rows` restricts the search to those ids via an id selector, falling back to
+        over-fetching and filtering on FAISS builds without search parameters.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if rows is None:
+            D, I = self.faiss_index.search(queries, top_k)
+            return self._pair_with_meta(D, I)
+        if len(rows) == 0:
+            return [[] for _ in range(len(queries))]
+        try:
+            params = _selector_params(self.faiss_index, rows)
+            D, I = self.faiss_index.search(queries, min(top_k, len(rows)), params=params)
+            return self._pair_with_meta(D, I)
+        except (AttributeError, TypeError, RuntimeError):
+            pass
+        allowed = set(rows.tolist())
+        ntotal = self.faiss_index.ntotal
+        fetch = min(ntotal, max(top_k * 4, 32))
+        while True:
+            D, I = self.faiss_index.search(queries, fetch)
+            keep = [[(d, i) for d, i in zip(drow, irow) if i in allowed][:top_k] for drow, irow in zip(D, I)]
+            if fetch >= ntotal or all(len(k) >= min(top_k, len(allowed)) for k in keep):
+                break
+            fetch = min(ntotal, fetch * 4)
+        return [[(float(d), self.meta[int(i)]) for d, i in k] for k in keep]
+
+    def search_embeddings(self, queries, top_k, rows=None):
+        """Brute-force search of the embedding store: one matrix-matrix product for all queries.
+
+        `rows` restricts scoring to that partition of the store.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        sims = self.embeddings.dot(queries.T, rows=rows).T
+        D, I = top_k_rows(sims, top_k)
+        if rows is not None:
+            I = rows[I]
+        return self._pair_with_meta(D, I)
+
+    def _pair_with_meta(self, D, I):
+        results = []
+        n = len(self.meta)
+        for scores, rows in zip(D, I):
+            results.append([(float(sc), self.meta[int(r)]) for sc, r in zip(scores, rows) if 0 <= r < n])
+        return results
+
+    @property
+    def backend(self):
+        if self.faiss_index is not None:
+            return "faiss"
+        if self.embeddings is not None:
+            return "numpy"
+        return "text"
+
+
+class ResidentIndex:
+    """Holds the current IndexSnapshot and swaps it atomically on reload."""
+
+    def __init__(self, index_path, meta_path, embeddings_path, lexical_path=None, manifest_path=None,
+                 legacy_meta_path=None):
+        self.index_path = pathlib.Path(index_path)
+        self.meta_path = pathlib.Path(meta_path)
+        self.legacy_meta_path = pathlib.Path(legacy_meta_path) if legacy_meta_path else None
+        self.embeddings_path = pathlib.Path(embeddings_path)
+        self.lexical_path = pathlib.Path(lexical_path) if lexical_path else None
+        self.manifest_path = pathlib.Path(manifest_path) if manifest_path else None
+        self._snapshot = None
+        self._version = 0
+        # Serialises loaders; readers never take this lock.
+        self._load_lock = threading.Lock()
+        self._listeners = []
+
+    @property
+    def version(self):
+        snap = self._snapshot
+        return snap.version if snap is not None else 0
+
+    def get(self, use_faiss=True):
+        """Return the current snapshot, loading it from disk on first use."""
+        snap = self._snapshot
+        if snap is not None:
+            return snap
+        with self._load_lock:
+            if self._snapshot is None:
+                self._swap(self._load_from_disk(use_faiss))
+            return self._snapshot
+
+    def reload(self, use_faiss=True):
+        """Load the files on disk into a new snapshot and make it current."""
+        with self._load_lock:
+            snap = self._load_from_disk(use_faiss)
+            self._swap(snap)
+            return snap
+
+    def publish(self, meta, faiss_index=None, embeddings=None, lexical=None, info=None):
+        """Make an already built in-memory index current without touching disk."""
+        with self._load_lock:
+            self._version += 1
+            snap = IndexSnapshot(self._version, meta, faiss_index=faiss_index, embeddings=embeddings,
+                                 lexical=lexical, info=info)
+            self._swap(snap)
+            return snap
+
+    def add_listener(self, fn):
+        """Register `fn(snapshot)` to be called after every swap (e.g. cache invalidation)."""
+        self._listeners.append(fn)
+
+    def clear(self):
+        with self._load_lock:
+            self._snapshot = None
+
+    def status(self):
+        snap = self._snapshot
+        if snap is None:
+            return {"loaded": False, "version": 0}
+        out = {"loaded": True, "version": snap.version, "documents": len(snap), "backend": snap.backend,
+               "index_type": snap.info.get("index_type")}
+        if snap.embeddings is not None:
+            out["embedding_store"] = snap.embeddings.status()
+        if isinstance(snap.meta, MetaStore):
+            out["meta_store"] = snap.meta.status()
+        return out
+
+    def _swap(self, snap):
+        # A plain attribute assignment is atomic; in-flight readers keep the old object.
+        self._snapshot = snap
+        for fn in list(self._listeners):
+            try:
+                fn(snap)
+            except Exception as e:
+                print(f"Warning: index swap listener failed: {e}")
+
+    def _load_from_disk(self, use_faiss):
+        info = load_index_manifest(self.manifest_path) if self.manifest_path else {}
+        meta_path = index_file(self.meta_path, info, "meta")
+        embeddings_path = index_file(self.embeddings_path, info, "embeddings")
+        lexical_path = index_file(self.lexical_path, info, "lexical") if self.lexical_path else None
+
+        meta = []
+        if meta_path is not None and meta_path.exists():
+            try:
+                meta = load_meta_store(meta_path)
+            except Exception as e:
+                print(f"Warning: could not read vector metadata {meta_path}: {e}")
+                meta = []
+        elif self.legacy_meta_path is not None and self.legacy_meta_path.exists():
+            # Index built before the binary sidecar existed
+            try:
+                with open(self.legacy_meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except Exception as e:
+                print(f"Warning: could not read vector metadata {self.legacy_meta_path}: {e}")
+                meta = []
+
+        # A manifest from a NumPy-only build means any faiss.index on disk is stale
+        faiss_built = info.get("index_type", "flat") in INDEX_TYPES
+
+        faiss_index = None
+        embeddings = None
+        if use_faiss and faiss_built and self.index_path.exists():
+            try:
+                import faiss
+                faiss_index = apply_search_params(faiss.read_index(str(self.index_path)), info.get("params"))
+            except Exception as e:
+                print(f"Warning: could not load FAISS index {self.index_path}: {e}")
+                faiss_index = None
+        # The (memory-mapped) store is opened even next to FAISS: it is cheap, backs
+        # incremental rebuilds and lets searches fall back if FAISS fails at runtime.
+        if np is not None and embeddings_path is not None and embeddings_path.exists():
+            try:
+                embeddings = load_embedding_store(embeddings_path, mmap=True)
+            except Exception as e:
+                print(f"Warning: could not load embeddings {embeddings_path}: {e}")
+                embeddings = None
+
+        lexical = None
+        if lexical_path is not None:
+            try:
+                lexical = load_bm25_index(lexical_path)
+            except Exception as e:
+                print(f"Warning: could not load BM25 index {lexical_path}: {e}")
+                lexical = None
+
+        self._version += 1
+        return IndexSnapshot(self._version, meta, faiss_index=faiss_index, embeddings=embeddings,
+                             lexical=lexical, info=info)